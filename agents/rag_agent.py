@@ -1,9 +1,12 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models import BaseChatModel
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import Document
 from pydantic import BaseModel, Field
 from models.vector_store import VectorStore
+from utils.rate_limiter import admit_llm, LoadShedError, LLM_CLIENT_MAX_RETRIES
+from utils.llm_cache import cached_llm
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -19,13 +22,19 @@ class RAGAgentState(BaseModel):
 class RAGAgent:
     """Agent that handles document-based queries using RAG"""
     
-    def __init__(self, api_key: str = GEMINI_API_KEY):
-        self.llm = ChatGoogleGenerativeAI(
+    def __init__(
+        self,
+        api_key: str = GEMINI_API_KEY,
+        vector_store: Optional[VectorStore] = None,
+        llm: Optional[BaseChatModel] = None
+    ):
+        self.llm = admit_llm(llm or ChatGoogleGenerativeAI(
             model="gemini-2.0-flash",
-            google_api_key=api_key
-        )
+            google_api_key=api_key,
+            max_retries=LLM_CLIENT_MAX_RETRIES
+        ))
         
-        self.vector_store = VectorStore()
+        self.vector_store = vector_store or VectorStore()
         
         self.rag_prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an expert research assistant helping a user understand complex topics clearly and concisely.
@@ -42,7 +51,7 @@ class RAGAgent:
                 ("human", "{query}")
             ])
         
-        self.rag_chain = self.rag_prompt | self.llm
+        self.rag_chain = self.rag_prompt | cached_llm(self.llm, "rag")
     
     def retrieve_context(self, query: str, k: int = 4) -> List[Document]:
         """Retrieve relevant context from the vector store"""
@@ -64,12 +73,17 @@ class RAGAgent:
         context_str = "\n\n".join(context_texts)
         
         # Generate response
-        response = self.rag_chain.invoke({
-            "query": query,
-            "context": context_str
-        })
+        try:
+            response = self.rag_chain.invoke({
+                "query": query,
+                "context": context_str
+            }).content
+        except LoadShedError:
+            # Degraded response: the retrieved passages without generation
+            passages = "\n\n".join(f"- {text[:300]}" for text in context_texts[:2])
+            response = "I'm handling a lot of requests right now, so here are the most relevant passages I found:\n\n" + passages
         
         return {
             "context": [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs],
-            "response": response.content
+            "response": response
         }
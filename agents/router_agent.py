@@ -1,14 +1,24 @@
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models import BaseChatModel
 from langchain.prompts import ChatPromptTemplate
 from pydantic import BaseModel , Field
 from langgraph.graph import StateGraph
+from utils.rate_limiter import admit_llm, LoadShedError, LLM_CLIENT_MAX_RETRIES
+from utils.llm_cache import cached_llm
+import re
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Used when the LLM call is shed under load
+WEATHER_KEYWORDS = re.compile(
+    r"\b(weather|forecast|temperature|rain\w*|sun\w*|snow\w*|wind\w*|humid\w*|climate|cold|hot|storm\w*)\b",
+    re.IGNORECASE
+)
+
 class RouterState(BaseModel):
     """State for the router agent"""
     query: str = Field(description="The user's query")
@@ -17,11 +27,12 @@ class RouterState(BaseModel):
 class RouterAgent:
     """Agent that decides whether to use weather API or document RAG"""
     
-    def __init__(self, api_key: str = GEMINI_API_KEY):
-        self.llm = ChatGoogleGenerativeAI(
+    def __init__(self, api_key: str = GEMINI_API_KEY, llm: Optional[BaseChatModel] = None):
+        self.llm = admit_llm(llm or ChatGoogleGenerativeAI(
             model="gemini-2.0-flash",
-            google_api_key=api_key
-        )
+            google_api_key=api_key,
+            max_retries=LLM_CLIENT_MAX_RETRIES
+        ))
         
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a router agent that decides whether a user query is about:
@@ -36,11 +47,14 @@ class RouterAgent:
             ("human", "{query}")
         ])
         
-        self.chain = self.prompt | self.llm
+        self.chain = self.prompt | cached_llm(self.llm, "router")
     
     def route_query(self, query: str) -> str:
         """Route a query to either weather API or document RAG"""
-        response = self.chain.invoke({"query": query})
+        try:
+            response = self.chain.invoke({"query": query})
+        except LoadShedError:
+            return self.route_by_keywords(query)
         # Extract just the decision: 'weather' or 'document'
         decision = response.content.strip().lower()
         
@@ -48,3 +62,7 @@ class RouterAgent:
             return "weather"
         else:
             return "document"
+    
+    def route_by_keywords(self, query: str) -> str:
+        """Degraded routing without the LLM"""
+        return "weather" if WEATHER_KEYWORDS.search(query) else "document"
@@ -1,14 +1,20 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models import BaseChatModel
 from langchain.prompts import ChatPromptTemplate
 from langchain.pydantic_v1 import BaseModel, Field
 from utils.api_handler import WeatherAPIHandler
+from utils.rate_limiter import admit_llm, LoadShedError, LLM_CLIENT_MAX_RETRIES
+from utils.llm_cache import cached_llm
+from utils.weather_templates import needs_reasoning, render_weather_response, WEATHER_LOCALE
+import re
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
+# "template" answers factual queries from templates and only uses the LLM for advice; "llm" always generates
+WEATHER_RESPONSE_MODE = os.getenv("WEATHER_RESPONSE_MODE", "template")
 
 
 class WeatherAgentState(BaseModel):
@@ -21,13 +27,26 @@ class WeatherAgentState(BaseModel):
 class WeatherAgent:
     """Agent that handles weather-related queries"""
     
-    def __init__(self, api_key: str = GEMINI_API_KEY):
-        self.llm = ChatGoogleGenerativeAI(
+    def __init__(
+        self,
+        api_key: str = GEMINI_API_KEY,
+        llm: Optional[BaseChatModel] = None,
+        weather_api: Optional[WeatherAPIHandler] = None,
+        response_mode: str = WEATHER_RESPONSE_MODE,
+        locale: str = WEATHER_LOCALE
+    ):
+        if response_mode not in ("template", "llm"):
+            raise ValueError(f"Unknown weather response mode '{response_mode}'")
+        self.response_mode = response_mode
+        self.locale = locale
+        
+        self.llm = admit_llm(llm or ChatGoogleGenerativeAI(
             model="gemini-2.0-flash",
-            google_api_key=api_key
-        )
+            google_api_key=api_key,
+            max_retries=LLM_CLIENT_MAX_RETRIES
+        ))
         
-        self.weather_api = WeatherAPIHandler()
+        self.weather_api = weather_api or WeatherAPIHandler()
         
         self.extract_city_prompt = ChatPromptTemplate.from_messages([
             ("system", """Extract the city name from the user's weather query.
@@ -43,13 +62,18 @@ class WeatherAgent:
             ("human", "Query: {query}\nWeather Data: {weather_info}")
         ])
         
-        self.extract_city_chain = self.extract_city_prompt | self.llm
-        self.response_chain = self.response_prompt | self.llm
+        self.extract_city_chain = self.extract_city_prompt | cached_llm(self.llm, "weather_city")
+        self.response_chain = self.response_prompt | cached_llm(self.llm, "weather_response")
     
     def extract_city(self, query: str) -> str:
         """Extract city name from the user query"""
-        response = self.extract_city_chain.invoke({"query": query})
-        city = response.content.strip()
+        try:
+            response = self.extract_city_chain.invoke({"query": query})
+            city = response.content.strip()
+        except LoadShedError:
+            # Degraded extraction: a capitalized name after "in", "for" or "at"
+            match = re.search(r"\b(?:in|for|at)\s+([A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*)", query)
+            city = match.group(1) if match else "Not specified"
         
         # Handle case where no city is specified
         if city.lower() == "not specified":
@@ -66,17 +90,31 @@ class WeatherAgent:
         # Get weather data
         weather_data = self.weather_api.get_weather(city)
         
+        # Factual queries and errors are rendered directly; only advice needs the LLM
+        if self.response_mode == "template" and ("error" in weather_data or not needs_reasoning(query)):
+            return {
+                "city": city,
+                "weather_data": weather_data,
+                "response": render_weather_response(weather_data, self.locale, city, variant=query),
+                "response_mode": "template"
+            }
+        
         # Format weather data
         weather_info = self.weather_api.format_weather_data(weather_data)
         
         # Generate response
-        response = self.response_chain.invoke({
-            "query": query,
-            "weather_info": weather_info
-        })
+        try:
+            response = self.response_chain.invoke({
+                "query": query,
+                "weather_info": weather_info
+            }).content
+        except LoadShedError:
+            # Degraded response: the templated answer without the conversational rewrite
+            response = render_weather_response(weather_data, self.locale, city, variant=query)
         
         return {
             "city": city,
             "weather_data": weather_data,
-            "response": response.content
+            "response": response,
+            "response_mode": "llm"
         }
\ No newline at end of file
@@ -0,0 +1,336 @@
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import json
+import os
+import tempfile
+
+from fastapi import Depends, FastAPI, HTTPException, Header, UploadFile, File, Form
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+
+from agents.rag_agent import RAGAgent
+from graph.workflow import LangGraphWorkflow
+from models.embedding import BatchingEmbeddings
+from models.vector_store import VectorStore, tenant_context, validate_tenant_id
+from utils.document_loader import DocumentLoader
+from utils.ingestion_queue import IngestionQueue
+from utils.llm_cache import bypass_cache, get_llm_cache
+from utils.rate_limiter import get_admission_controller, session_context
+from utils.snapshot import SnapshotError, export_snapshot, import_snapshot
+from dotenv import load_dotenv
+load_dotenv()
+
+SERVER_MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "8"))
+SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "64"))
+SERVER_REQUEST_TIMEOUT = float(os.getenv("SERVER_REQUEST_TIMEOUT", "30"))
+SERVER_WARMUP = os.getenv("SERVER_WARMUP", "1") == "1"
+# Bearer token for the admin endpoints (index snapshots); they are disabled when unset
+SERVER_ADMIN_TOKEN = os.getenv("SERVER_ADMIN_TOKEN")
+
+
+class QueryRequest(BaseModel):
+    """Body of a query request"""
+    query: str = Field(description="The user's query", min_length=1)
+    session_id: Optional[str] = Field(description="Caller session, used for per-session LLM rate limits", default=None)
+    no_cache: bool = Field(description="Bypass the LLM response cache, e.g. for evaluations", default=False)
+    profile: bool = Field(description="Write a sampling profile of this request", default=False)
+    tenant_id: Optional[str] = Field(
+        description="Tenant whose documents are searched (multi-tenant deployments)",
+        default=None,
+        pattern=r"^[A-Za-z0-9_-]{1,64}$"
+    )
+
+
+class QueryResponse(BaseModel):
+    """Final workflow state returned to the caller"""
+    query: str = Field(description="The user's original query")
+    action: str = Field(description="The action taken: 'weather' or 'document'", default="")
+    response: str = Field(description="The final response to the user", default="")
+    city: str = Field(description="City for weather queries", default="")
+    context: List[Dict[str, Any]] = Field(description="Retrieved context (for document queries)", default=[])
+    weather_data: Dict[str, Any] = Field(description="Weather data (for weather queries)", default={})
+    evaluation: Dict[str, Any] = Field(description="Evaluation results", default={})
+    profile: Optional[str] = Field(description="Path of the written profile, if the request was profiled", default=None)
+
+
+class ServerBusyError(Exception):
+    """Raised when the wait queue for workflow slots is full"""
+
+
+class ConcurrencyLimiter:
+    """Bounds in-flight workflow runs and rejects requests once the wait queue is full"""
+
+    def __init__(self, max_concurrency: int = SERVER_MAX_CONCURRENCY, max_queue: int = SERVER_MAX_QUEUE):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def is_saturated(self) -> bool:
+        """Whether a new request would be rejected right now"""
+        return self.in_flight >= self.max_concurrency and self.waiting >= self.max_queue
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a free slot, failing fast when too many requests are already waiting"""
+        if self.is_saturated():
+            self.rejected += 1
+            raise ServerBusyError("Server is at capacity, try again later")
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+
+class QueryService:
+    """Shared, pre-warmed workflow plus the document pipeline, served from a bounded thread pool"""
+
+    def __init__(
+        self,
+        workflow: LangGraphWorkflow,
+        doc_loader: DocumentLoader,
+        vector_store: VectorStore,
+        ingestion_queue: Optional[IngestionQueue] = None,
+        max_concurrency: int = SERVER_MAX_CONCURRENCY,
+        max_queue: int = SERVER_MAX_QUEUE,
+        request_timeout: float = SERVER_REQUEST_TIMEOUT
+    ):
+        self.workflow = workflow
+        self.doc_loader = doc_loader
+        self.vector_store = vector_store
+        self.ingestion_queue = ingestion_queue or IngestionQueue()
+        self.request_timeout = request_timeout
+        self.limiter = ConcurrencyLimiter(max_concurrency, max_queue)
+        # Workflow calls are blocking, so the executor size is the real concurrency bound.
+        # A timed-out call keeps its thread until it returns, which keeps the bound honest.
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="workflow")
+
+    async def run_blocking(self, func, *args):
+        """Run a blocking call on the service executor with the request timeout"""
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self.executor, func, *args),
+            timeout=self.request_timeout
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return limiter and batching statistics"""
+        stats = {
+            "in_flight": self.limiter.in_flight,
+            "waiting": self.limiter.waiting,
+            "rejected": self.limiter.rejected,
+        }
+        embeddings = getattr(self.vector_store, "embeddings", None)
+        if isinstance(embeddings, BatchingEmbeddings):
+            stats["embedding_batches"] = embeddings.stats()
+        stats.update(_llm_metrics())
+        return stats
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_default_service() -> QueryService:
+    """Build the production service: one VectorStore with batched query embeddings shared by the workflow"""
+    vector_store = VectorStore()
+    vector_store.embeddings = BatchingEmbeddings(
+        vector_store.embeddings,
+        query_kwargs={"task_type": "retrieval_query"}
+    )
+    vector_store.vectorstore.embeddings = vector_store.embeddings
+
+    workflow = LangGraphWorkflow(rag_agent=RAGAgent(vector_store=vector_store))
+
+    if SERVER_WARMUP:
+        # Open the embedding client's connection before the first real request
+        try:
+            vector_store.embeddings.embed_query("warmup")
+        except Exception as e:
+            print(f"Error during warmup: {str(e)}")
+
+    return QueryService(workflow, DocumentLoader(), vector_store)
+
+
+def _llm_metrics() -> Dict[str, Any]:
+    """Admission control and response cache metrics shared by all agents"""
+    cache = get_llm_cache()
+    return {
+        "llm_admission": get_admission_controller().metrics(),
+        "llm_cache": cache.stats() if cache else {},
+    }
+
+
+def _in_request(request: QueryRequest, func, *args):
+    """Run func in an executor thread with the caller's session, tenant and cache settings"""
+    with session_context(request.session_id), tenant_context(request.tenant_id):
+        if request.no_cache:
+            with bypass_cache():
+                return func(*args)
+        return func(*args)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def create_app(service: Optional[QueryService] = None, admin_token: Optional[str] = SERVER_ADMIN_TOKEN) -> FastAPI:
+    """Create the ASGI app; the default service is built once at startup and shared by all requests"""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if app.state.service is None:
+            app.state.service = await asyncio.to_thread(build_default_service)
+        yield
+        app.state.service.shutdown()
+
+    app = FastAPI(title="DOC Weather Bot API", lifespan=lifespan)
+    app.state.service = service
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        return {"status": "ok", **app.state.service.stats()}
+
+    @app.get("/metrics")
+    async def metrics() -> Dict[str, Any]:
+        return _llm_metrics()
+
+    @app.post("/query", response_model=QueryResponse)
+    async def query(request: QueryRequest) -> QueryResponse:
+        service: QueryService = app.state.service
+        try:
+            async with service.limiter.slot():
+                result = await service.run_blocking(_in_request, request, service.workflow.invoke, request.query, request.profile)
+        except ServerBusyError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Request timed out")
+
+        return QueryResponse(**dict(result))
+
+    @app.post("/query/stream")
+    async def query_stream(request: QueryRequest) -> StreamingResponse:
+        service: QueryService = app.state.service
+        if service.limiter.is_saturated():
+            service.limiter.rejected += 1
+            raise HTTPException(status_code=503, detail="Server is at capacity, try again later")
+
+        async def events():
+            try:
+                async with service.limiter.slot():
+                    loop = asyncio.get_running_loop()
+                    deadline = loop.time() + service.request_timeout
+                    steps = service.workflow.stream(request.query)
+
+                    while True:
+                        step = await asyncio.wait_for(
+                            loop.run_in_executor(service.executor, _in_request, request, next, steps, None),
+                            timeout=max(deadline - loop.time(), 0)
+                        )
+                        if step is None:
+                            break
+                        node, state = step
+                        yield _sse(node, dict(state))
+
+                yield _sse("done", {})
+            except ServerBusyError as e:
+                yield _sse("error", {"detail": str(e)})
+            except asyncio.TimeoutError:
+                yield _sse("error", {"detail": "Request timed out"})
+            except Exception as e:
+                # The 200 status is already sent, so a failing node can only be reported in the stream
+                print(f"Error streaming query: {str(e)}")
+                yield _sse("error", {"detail": f"Error processing query: {str(e)}"})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    def _check_tenant(tenant_id: Optional[str]) -> Optional[str]:
+        try:
+            return validate_tenant_id(tenant_id) if tenant_id else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @app.get("/documents")
+    async def list_documents(tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        tenant_id = _check_tenant(tenant_id)
+        return {"documents": app.state.service.doc_loader.get_available_documents(tenant_id)}
+
+    @app.post("/documents", status_code=202)
+    async def upload_document(file: UploadFile = File(...), tenant_id: Optional[str] = Form(None)) -> Dict[str, Any]:
+        service: QueryService = app.state.service
+        tenant_id = _check_tenant(tenant_id)
+        if not file.filename or not file.filename.lower().endswith(".pdf"):
+            raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+        content = await file.read()
+        pdf_path = service.doc_loader.save_pdf_bytes(file.filename, content, tenant_id)
+        if not pdf_path:
+            raise HTTPException(status_code=500, detail="Failed to save the document")
+
+        # Indexing is done by the ingestion workers; poll the job for progress
+        job = await asyncio.to_thread(service.ingestion_queue.enqueue, pdf_path, tenant_id or "")
+        return job.model_dump()
+
+    @app.get("/documents/jobs/{job_id}")
+    async def get_ingestion_job(job_id: str) -> Dict[str, Any]:
+        job = await asyncio.to_thread(app.state.service.ingestion_queue.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job.model_dump()
+
+    def _require_admin(authorization: Optional[str] = Header(None)) -> None:
+        """Snapshots expose and overwrite every tenant's index, so they need the admin token"""
+        if not admin_token:
+            raise HTTPException(status_code=404, detail="Not Found")
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), admin_token.encode()):
+            raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+    @app.get("/snapshot", dependencies=[Depends(_require_admin)])
+    async def download_snapshot() -> FileResponse:
+        service: QueryService = app.state.service
+        fd, path = tempfile.mkstemp(suffix=".snapshot.tar.gz")
+        os.close(fd)
+        try:
+            await asyncio.to_thread(export_snapshot, service.vector_store, path, service.ingestion_queue)
+        except Exception as e:
+            os.remove(path)
+            raise HTTPException(status_code=500, detail=f"Snapshot export failed: {str(e)}")
+        return FileResponse(
+            path,
+            media_type="application/gzip",
+            filename="index.snapshot.tar.gz",
+            background=BackgroundTask(os.remove, path)
+        )
+
+    @app.post("/snapshot", dependencies=[Depends(_require_admin)])
+    async def restore_snapshot(file: UploadFile = File(...), allow_model_mismatch: bool = Form(False)) -> Dict[str, Any]:
+        service: QueryService = app.state.service
+        try:
+            # The upload is spooled to disk by the server and read back as a stream
+            return await asyncio.to_thread(
+                import_snapshot, service.vector_store, file.file, service.ingestion_queue,
+                allow_model_mismatch=allow_model_mismatch
+            )
+        except SnapshotError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return app
+
+
+app = create_app()
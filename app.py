@@ -1,11 +1,17 @@
 import streamlit as st
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import tempfile
 import os
+import uuid
 
 from graph.workflow import LangGraphWorkflow
+from models.vector_store import tenant_context, validate_tenant_id
+from utils.chat_history import ChatSession, ChatStore, debug_payload
 from utils.document_loader import DocumentLoader
-from models.vector_store import VectorStore
+from utils.ingestion_queue import IngestionQueue, DONE, FAILED
+from utils.ingestion_worker import IngestionWorkerPool, INGESTION_WORKERS, INGESTION_POLL_SECONDS
+from utils.llm_cache import get_llm_cache
+from utils.rate_limiter import get_admission_controller, session_context
 
 from dotenv import load_dotenv
 
@@ -22,41 +28,92 @@ db_url = os.getenv("db_url")
 db_api = os.getenv("db_api")
 
 
+@st.cache_resource
+def get_ingestion_queue() -> IngestionQueue:
+    return IngestionQueue()
+
+
+@st.cache_resource
+def get_chat_store() -> ChatStore:
+    store = ChatStore()
+    store.prune()
+    return store
+
+
+@st.cache_resource
+def start_ingestion_workers():
+    """Start the shared worker pool once per server; set INGESTION_WORKERS=0 to run workers separately"""
+    if INGESTION_WORKERS <= 0:
+        return None
+    return IngestionWorkerPool(INGESTION_WORKERS).start()
+
+
+@st.fragment(run_every=INGESTION_POLL_SECONDS)
+def show_ingestion_jobs(ingestion_queue: IngestionQueue):
+    """Poll the status of this session's uploads without rerunning the whole app"""
+    for job in ingestion_queue.list_jobs(st.session_state.ingestion_jobs):
+        name = os.path.basename(job.file_path)
+        if job.status == DONE:
+            st.success(f"Document '{name}' processed and indexed successfully!")
+        elif job.status == FAILED:
+            st.error(f"Failed to index '{name}': {job.error}")
+        else:
+            label = f"{name}: {job.status}"
+            if job.attempts > 1:
+                label += f" (attempt {job.attempts})"
+            st.progress(job.progress, text=label)
+
+
 def main():
     st.title("DOC Weather Bot")
     
     # Initialize components
     doc_loader = DocumentLoader()
-    vector_store = VectorStore()
     workflow = LangGraphWorkflow()
+    ingestion_queue = get_ingestion_queue()
+    start_ingestion_workers()
+    
+    # Identifies this browser session for the per-session LLM rate limit
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    
+    # Multi-tenant deployments pass the tenant in the URL, e.g. ?tenant=acme
+    tenant_id = st.query_params.get("tenant")
+    if tenant_id:
+        try:
+            validate_tenant_id(tenant_id)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+    
+    if "ingestion_jobs" not in st.session_state:
+        st.session_state.ingestion_jobs = []
+        st.session_state.queued_uploads = set()
     
     # Sidebar - Document Upload
     st.sidebar.header("Upload Documents")
     uploaded_file = st.sidebar.file_uploader("Upload a PDF document", type="pdf")
     
-    if uploaded_file:
-        with st.spinner("Processing document..."):
-            # Save the uploaded file
-            pdf_path = doc_loader.save_uploaded_pdf(uploaded_file)
-            
-            if pdf_path:
-                # Load and process the document
-                documents = doc_loader.load_pdf(pdf_path)
-                
-                if documents:
-                    # Add documents to vector store
-                    success = vector_store.add_documents(documents)
-                    
-                    if success:
-                        st.sidebar.success(f"Document '{uploaded_file.name}' processed and indexed successfully!")
-                    else:
-                        st.sidebar.error("Failed to index the document.")
-                else:
-                    st.sidebar.error("Failed to process the document.")
+    # The uploader keeps its file across reruns, so only queue each upload once
+    if uploaded_file and uploaded_file.file_id not in st.session_state.queued_uploads:
+        pdf_path = doc_loader.save_uploaded_pdf(uploaded_file, tenant_id)
+        
+        if pdf_path:
+            # Indexing happens in the worker pool; the chat stays usable meanwhile
+            job = ingestion_queue.enqueue(pdf_path, tenant_id or "")
+            st.session_state.queued_uploads.add(uploaded_file.file_id)
+            if job.id not in st.session_state.ingestion_jobs:
+                st.session_state.ingestion_jobs.append(job.id)
+        else:
+            st.sidebar.error("Failed to save the document.")
+    
+    if st.session_state.ingestion_jobs:
+        with st.sidebar:
+            show_ingestion_jobs(ingestion_queue)
     
     # Available documents
     st.sidebar.header("Available Documents")
-    documents = doc_loader.get_available_documents()
+    documents = doc_loader.get_available_documents(tenant_id)
     if documents:
         st.sidebar.write(", ".join(documents))
     else:
@@ -65,52 +122,85 @@ def main():
     # Chat interface
     st.header("Chat Interface")
     
-    # Initialize chat history
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    # The transcript lives in the chat store; session state keeps a bounded tail and the paging window
+    if "chat" not in st.session_state:
+        st.session_state.chat = ChatSession(get_chat_store(), st.session_state.session_id)
+    chat: ChatSession = st.session_state.chat
     
-    # Display chat history
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.write(message["content"])
+    # Display the current page of the chat history
+    if chat.has_older():
+        st.button("Show older messages", on_click=chat.show_older)
+    for message in chat.visible_messages():
+        render_message(chat, message)
     
     # User input
     user_query = st.chat_input("Ask about weather or document information")
     
     if user_query:
-        # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": user_query})
-        
-        # Display user message
-        with st.chat_message("user"):
-            st.write(user_query)
+        # A new turn brings the window back to the latest page
+        chat.reset_window()
+        render_message(chat, chat.add("user", user_query))
         
         # Process query
         with st.spinner("Thinking..."):
-            result = workflow.invoke(user_query)
-            
-            # Add assistant message to chat history
-            st.session_state.messages.append({"role": "assistant", "content": result["response"]})
+            with session_context(st.session_state.session_id), tenant_context(tenant_id):
+                result = workflow.invoke(user_query, profile=st.session_state.get("profile_requests", False))
             
-            # Display assistant message
-            with st.chat_message("assistant"):
-                st.write(result["response"])
-                
-                # Additional debug info in expander
-                with st.expander("Debug Information"):
-                    st.write(f"Action: {result['action']}")
-                    
-                    if result['action'] == 'weather' and result['city']:
-                        st.write(f"City: {result['city']}")
-                    
-                    if result['action'] == 'document' and result['context']:
-                        st.write("Retrieved Context:")
-                        for i, ctx in enumerate(result['context']):
-                            st.write(f"Document {i+1}:")
-                            st.write(ctx['page_content'])
-                    
-                    st.write("Evaluation Metrics:")
-                    st.write(result['evaluation'])
+            # Large debug data (retrieved context, raw weather data) is kept in the chat store, not session state
+            render_message(chat, chat.add("assistant", result["response"], debug=debug_payload(result)))
+    
+    show_diagnostics()
+
+
+def render_message(chat: ChatSession, message: Dict[str, Any]):
+    """Render one chat message; its debug payload is only fetched while the toggle is on"""
+    with st.chat_message(message["role"]):
+        st.write(message["content"])
+        if message["has_debug"] and st.toggle("Debug Information", key=f"debug_{message['seq']}"):
+            render_debug(chat.debug(message))
+
+
+def render_debug(debug: Optional[Dict[str, Any]]):
+    if debug is None:
+        st.caption("Debug information has expired.")
+        return
+    
+    st.write(f"Action: {debug['action']}")
+    
+    if debug['action'] == 'weather' and debug['city']:
+        st.write(f"City: {debug['city']}")
+        st.write(debug['weather_data'])
+    
+    if debug['action'] == 'document' and debug['context']:
+        st.write("Retrieved Context:")
+        for i, ctx in enumerate(debug['context']):
+            st.write(f"Document {i+1}:")
+            st.write(ctx['page_content'])
+    
+    st.write("Evaluation Metrics:")
+    st.write(debug['evaluation'])
+    
+    if debug.get("profile") and os.path.exists(debug["profile"]):
+        st.write(f"Profile: {debug['profile']}")
+        with open(debug["profile"], "rb") as f:
+            st.download_button("Download profile (open in speedscope.app)", f, file_name=os.path.basename(debug["profile"]))
+
+
+def show_diagnostics():
+    """Server-wide LLM metrics and the per-session profiling switch"""
+    with st.sidebar.expander("Diagnostics"):
+        st.write("LLM Admission:")
+        st.write(get_admission_controller().metrics())
+        
+        llm_cache = get_llm_cache()
+        if llm_cache:
+            st.write("LLM Cache Hit Rates:")
+            st.write(llm_cache.stats())
+        
+        st.write(f"Chat history in session: {st.session_state.chat.size_bytes() / 1024:.1f} KiB")
+        
+        # Sticky per session: every following query writes a profile until unchecked
+        st.checkbox("Profile requests", key="profile_requests")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""Streamlit rerun time and memory over long chat sessions, full history vs paged history.
+
+Drives two minimal versions of the chat page through Streamlit's ``AppTest``
+harness, without the workflow: "full" keeps every message in session state
+and renders them all on each rerun, with the debug payload (four retrieved
+1000-character chunks, raw weather data) shown for the current turn only,
+like the app used to. "paged" uses ``ChatSession``, which keeps a bounded
+tail in session state, renders one page and stores debug payloads in
+``ChatStore``. Every ``--step`` turns a
+plain rerun is timed and session-state size and RSS growth are recorded::
+
+    python -m benchmarks.chat_rerun_benchmark --turns 500 --step 100
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+
+def full_history_app():
+    """The chat page as it was before paging: every message is rendered, debug info only for the current turn"""
+    import streamlit as st
+
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"]):
+            st.write(message["content"])
+
+    query = st.chat_input("Ask")
+    if query:
+        st.session_state.messages.append({"role": "user", "content": query})
+        with st.chat_message("user"):
+            st.write(query)
+
+        response = f"Answer to {query}. " * 10
+        st.session_state.messages.append({"role": "assistant", "content": response})
+        with st.chat_message("assistant"):
+            st.write(response)
+            with st.expander("Debug Information"):
+                for ctx in [{"page_content": f"{query} " + "lorem ipsum " * 83} for _ in range(4)]:
+                    st.write(ctx["page_content"])
+                st.write({"main": {"temp": 12.5, "humidity": 70}, "weather": [{"description": "light rain"}] * 3})
+
+
+def paged_history_app(db_path: str):
+    import streamlit as st
+    from utils.chat_history import ChatSession, ChatStore
+
+    if "chat" not in st.session_state:
+        st.session_state.chat = ChatSession(ChatStore(db_path), "benchmark")
+    chat = st.session_state.chat
+
+    def render(message):
+        with st.chat_message(message["role"]):
+            st.write(message["content"])
+            if message["has_debug"] and st.toggle("Debug Information", key=f"debug_{message['seq']}"):
+                debug = chat.debug(message)
+                for ctx in debug["context"]:
+                    st.write(ctx["page_content"])
+                st.write(debug["weather_data"])
+
+    if chat.has_older():
+        st.button("Show older messages", on_click=chat.show_older)
+    for message in chat.visible_messages():
+        render(message)
+
+    query = st.chat_input("Ask")
+    if query:
+        chat.reset_window()
+        debug = {
+            "context": [{"page_content": f"{query} " + "lorem ipsum " * 83} for _ in range(4)],
+            "weather_data": {"main": {"temp": 12.5, "humidity": 70}, "weather": [{"description": "light rain"}] * 3},
+        }
+        render(chat.add("user", query))
+        render(chat.add("assistant", f"Answer to {query}. " * 10, debug=debug))
+
+
+def rss_mib() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def session_bytes(at: AppTest, mode: str) -> int:
+    if mode == "full":
+        return len(json.dumps(at.session_state["messages"]))
+    return at.session_state["chat"].size_bytes()
+
+
+def run(mode: str, turns: int, step: int, reruns: int) -> List[Dict[str, float]]:
+    if mode == "full":
+        at = AppTest.from_function(full_history_app, default_timeout=60)
+    else:
+        at = AppTest.from_function(paged_history_app, kwargs={"db_path": os.path.join(tempfile.mkdtemp(), "chat.db")}, default_timeout=60)
+    at.run()
+    baseline_rss = rss_mib()
+
+    rows = []
+    for turn in range(1, turns + 1):
+        at.chat_input[0].set_value(f"question {turn}").run()
+        if turn % step == 0:
+            start = time.perf_counter()
+            for _ in range(reruns):
+                at.run()
+            rows.append({
+                "turns": turn,
+                "rerun_ms": (time.perf_counter() - start) / reruns * 1000,
+                "session_kib": session_bytes(at, mode) / 1024,
+                "rss_growth_mib": rss_mib() - baseline_rss,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--step", type=int, default=100)
+    parser.add_argument("--reruns", type=int, default=5, help="Plain reruns timed at each step")
+    parser.add_argument("--modes", default="paged,full")
+    args = parser.parse_args()
+
+    print(f"{'mode':6} {'turns':>6} {'rerun ms':>9} {'session KiB':>12} {'RSS growth MiB':>15}")
+    for mode in args.modes.split(","):
+        for row in run(mode, args.turns, args.step, args.reruns):
+            print(f"{mode:6} {row['turns']:6d} {row['rerun_ms']:9.1f} {row['session_kib']:12.1f} {row['rss_growth_mib']:15.1f}")
+
+
+if __name__ == "__main__":
+    main()
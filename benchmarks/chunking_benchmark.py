@@ -0,0 +1,105 @@
+"""Structure-aware chunker vs the legacy 1000/200 character splitter.
+
+Reports chunk count, total embedded tokens (and how much of it is duplicated
+overlap), chunking speed in pages/sec, and retrieval recall@k for questions
+built from sentences of the corpus: a hit is a top-k chunk that contains the
+whole source sentence. Retrieval uses the hashed bag-of-words fake embeddings
+so the comparison isolates the chunk boundaries. Run with::
+
+    python -m benchmarks.chunking_benchmark --pages 2000
+    python -m benchmarks.chunking_benchmark --pdf   # parse generated PDFs first
+"""
+from typing import Dict, List
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+import numpy as np
+from langchain.schema import Document
+from langchain_community.document_loaders import PyPDFLoader
+
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.pdf_corpus import build_corpus, generate_manual
+from utils.chunking import approximate_token_count, get_chunker
+
+
+def page_documents(args: argparse.Namespace) -> List[Document]:
+    if args.pdf:
+        corpus = build_corpus(tempfile.mkdtemp(), args.files, args.pages // args.files)
+        return [doc for path, _ in corpus for doc in PyPDFLoader(path).load()]
+
+    documents = []
+    for f in range(args.files):
+        for i, lines in enumerate(generate_manual(args.pages // args.files, seed=f)):
+            documents.append(Document(page_content="\n".join(lines), metadata={"source": f"manual_{f}.pdf", "page": i}))
+    return documents
+
+
+def questions(documents: List[Document], count: int, seed: int = 1) -> List[str]:
+    """Pick full sentences from paragraph text as the facts to retrieve"""
+    rng = random.Random(seed)
+    sentences = []
+    for doc in documents:
+        text = re.sub(r"\s*\n\s*", " ", doc.page_content)
+        sentences.extend(s for s in re.findall(r"[A-Z][a-z][^.]{40,}\.", text))
+    return rng.sample(sentences, min(count, len(sentences)))
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text)
+
+
+def evaluate(name: str, documents: List[Document], facts: List[str], k: int) -> Dict[str, float]:
+    chunker = get_chunker(name)
+    start = time.perf_counter()
+    chunks = chunker.split_documents(documents)
+    elapsed = time.perf_counter() - start
+
+    source_tokens = sum(approximate_token_count(doc.page_content) for doc in documents)
+    chunk_tokens = sum(approximate_token_count(chunk.page_content) for chunk in chunks)
+
+    embeddings = FakeEmbeddings(call_latency=0, text_latency=0)
+    matrix = np.array(embeddings.embed_documents([chunk.page_content for chunk in chunks]), dtype=np.float32)
+    texts = [normalize(chunk.page_content) for chunk in chunks]
+
+    hits = 0
+    for fact in facts:
+        # Drop a few words so the query is not an exact copy of the sentence
+        words = fact.split()
+        query = " ".join(words[:2] + words[4:-1])
+        top = np.argsort(-(matrix @ np.array(embeddings.embed_query(query), dtype=np.float32)))[:k]
+        hits += any(fact in texts[i] for i in top)
+
+    return {
+        "chunks": len(chunks),
+        "tokens": chunk_tokens,
+        "duplicated": chunk_tokens / source_tokens - 1,
+        "pages_per_sec": len(documents) / elapsed,
+        "recall": hits / len(facts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=300)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--pdf", action="store_true", help="Extract text from generated PDFs with PyPDFLoader")
+    args = parser.parse_args()
+
+    documents = page_documents(args)
+    facts = questions(documents, args.questions)
+
+    print(f"{len(documents)} pages, {len(facts)} questions")
+    print(f"{'chunker':10} {'chunks':>7} {'embedded tokens':>16} {'duplicated':>11} {'pages/s':>9} {f'recall@{args.k}':>9}")
+    for name in ("recursive", "structure"):
+        row = evaluate(name, documents, facts, args.k)
+        print(f"{name:10} {row['chunks']:7d} {row['tokens']:16d} {row['duplicated']:11.1%} {row['pages_per_sec']:9.0f} {row['recall']:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""In-process fakes for the external services used by the pipeline.
+
+The benchmarks build real agents, workflow and vector store on top of these so
+that only the network calls are simulated: Gemini chat and embeddings,
+OpenWeatherMap, LangSmith and Qdrant (served by qdrant-client's local mode).
+"""
+from typing import Any, Callable, Dict, List, Optional
+import hashlib
+import math
+import re
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from qdrant_client import QdrantClient
+
+
+def default_responder(messages: List[BaseMessage]) -> str:
+    """Answer the repo's prompts well enough for the workflow to take realistic branches"""
+    system = messages[0].content if messages else ""
+    human = messages[-1].content if messages else ""
+
+    if "router agent" in system:
+        return "weather" if re.search(r"weather|forecast|temperature|rain", human, re.I) else "document"
+    if "Extract the city name" in system:
+        match = re.search(r"\bin ([A-Z][a-zA-Z]+)", human)
+        return match.group(1) if match else "Not specified"
+    if "weather assistant" in system:
+        return "It's a pleasant day. " + human.split("Weather Data:")[-1].strip()[:200]
+    return "Based on the documents: " + system[-200:]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with a fixed latency and a deterministic responder"""
+
+    latency: float = 0.05
+    responder: Callable[[List[BaseMessage]], str] = default_responder
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": "fake-chat", "latency": self.latency}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.responder(messages)))])
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic hashed bag-of-words embeddings with per-call and per-text latency.
+
+    ``max_concurrent_calls`` models the connection pool / request quota of the
+    real embedding API, which is what makes per-request calls queue up under load.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 768,
+        call_latency: float = 0.02,
+        text_latency: float = 0.0005,
+        max_concurrent_calls: int = 4
+    ):
+        self.dimension = dimension
+        self.call_latency = call_latency
+        self.text_latency = text_latency
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max_concurrent_calls)
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode()).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimension
+            vector[index] += 1.0 if digest[4] % 2 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str], **kwargs) -> List[List[float]]:
+        with self._slots:
+            time.sleep(self.call_latency + self.text_latency * len(texts))
+        with self._lock:
+            self.calls += 1
+            self.texts += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str, **kwargs) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeWeatherAPIHandler:
+    """Stands in for WeatherAPIHandler, returning OpenWeatherMap-shaped payloads"""
+
+    def __init__(self, latency: float = 0.03):
+        self.latency = latency
+
+    def get_weather(self, city: str) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        if city.lower() == "atlantis":
+            return {"error": f"City {city} not found"}
+        seed = int(hashlib.md5(city.lower().encode()).hexdigest()[:6], 16)
+        return {
+            "name": city,
+            "sys": {"country": "GB"},
+            "main": {"temp": round(5 + seed % 250 / 10, 1), "feels_like": round(4 + seed % 240 / 10, 1), "humidity": 40 + seed % 50},
+            "weather": [[
+                {"id": 800, "main": "Clear", "description": "clear sky"},
+                {"id": 500, "main": "Rain", "description": "light rain"},
+                {"id": 802, "main": "Clouds", "description": "scattered clouds"},
+                {"id": 804, "main": "Clouds", "description": "overcast clouds"},
+            ][seed % 4]],
+            "wind": {"speed": round(seed % 120 / 10, 1)},
+        }
+
+    def format_weather_data(self, weather_data: Dict[str, Any]) -> str:
+        from utils.api_handler import WeatherAPIHandler
+        return WeatherAPIHandler(api_key="fake").format_weather_data(weather_data)
+
+
+class FakeEvaluator:
+    """Stands in for LangSmithEvaluator without contacting LangSmith"""
+
+    def evaluate_response(self, query: str, response: str, reference: str = None) -> Dict[str, Any]:
+        return {"query": query, "response": response}
+
+
+def local_qdrant_client() -> QdrantClient:
+    """An in-process Qdrant instance"""
+    return QdrantClient(":memory:")
+
+
+def build_fake_workflow(vector_store, llm_latency: float = 0.05):
+    """The real workflow and agents with a fake LLM, weather API and evaluator"""
+    from agents.rag_agent import RAGAgent
+    from agents.router_agent import RouterAgent
+    from agents.weather_agent import WeatherAgent
+    from graph.workflow import LangGraphWorkflow
+
+    llm = FakeChatModel(latency=llm_latency)
+    return LangGraphWorkflow(
+        router_agent=RouterAgent(llm=llm),
+        weather_agent=WeatherAgent(llm=llm, weather_api=FakeWeatherAPIHandler()),
+        rag_agent=RAGAgent(vector_store=vector_store, llm=llm),
+        evaluator=FakeEvaluator(),
+    )
+
+
+SAMPLE_TEXTS = [
+    "LangChain is a framework for developing applications powered by large language models.",
+    "LangGraph builds stateful, multi-actor applications with LLMs as graphs of nodes and edges.",
+    "Qdrant is a vector similarity search engine with payload filtering and quantization.",
+    "Retrieval-augmented generation grounds model answers in retrieved document context.",
+    "Streamlit turns Python scripts into shareable web apps with a rerun-on-interaction model.",
+    "Gemini text-embedding-004 produces 768 dimensional embeddings for retrieval tasks.",
+]
+
+SAMPLE_QUERIES = [
+    "What's the weather in London?",
+    "What is LangChain?",
+    "Is there rain forecast in Paris?",
+    "How does Qdrant filter payloads?",
+    "What is the temperature in Tokyo?",
+    "Explain retrieval-augmented generation",
+]
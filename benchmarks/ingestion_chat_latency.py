@@ -0,0 +1,131 @@
+"""Chat latency while several large PDFs are being ingested.
+
+Compares three situations for the same stream of chat queries:
+
+* ``idle``    - nothing is being ingested
+* ``inline``  - PDFs are parsed and indexed on threads of the chat process,
+                as the Streamlit app did before the ingestion queue
+* ``queue``   - PDFs are enqueued and indexed by an ``IngestionWorkerPool``
+
+The uploading session itself used to be blocked for the whole indexing time;
+that wait is reported as ``inline blocking wait``. Run with::
+
+    python -m benchmarks.ingestion_chat_latency --pdfs 4 --pages 150 --workers 2
+"""
+from typing import List
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.fakes import FakeEmbeddings, SAMPLE_QUERIES, build_fake_workflow, local_qdrant_client
+from benchmarks.load_test import percentile
+from benchmarks.pdf_corpus import build_corpus
+from models.vector_store import VectorStore
+from utils.document_loader import DocumentLoader
+from utils.ingestion_queue import IngestionQueue, DONE, FAILED
+from utils.ingestion_worker import IngestionWorkerPool
+from utils.llm_cache import LLMCache, bypass_cache, set_llm_cache
+from utils.pdf_extraction import PDFExtractor
+
+COMPONENTS = "benchmarks.ingestion_chat_latency:fake_components"
+
+
+def fake_components():
+    """Loader and vector store used by both the inline path and the worker processes"""
+    vector_store = VectorStore(
+        collection_name="ingestion_bench",
+        client=local_qdrant_client(),
+        embeddings=FakeEmbeddings(call_latency=0.05, max_concurrent_calls=8)
+    )
+    # No page cache: the inline phase would warm it and the workers would skip parsing, and it would leave pdf_pages.db behind
+    return DocumentLoader(document_dir=tempfile.mkdtemp(), extractor=PDFExtractor(use_cache=False)), vector_store
+
+
+def chat_latencies(workflow, stop: threading.Event, max_queries: int) -> List[float]:
+    """Send chat queries back to back until stopped, returning per-query latency"""
+    latencies = []
+    for i in range(max_queries):
+        if stop.is_set():
+            break
+        start = time.perf_counter()
+        with bypass_cache():
+            workflow.invoke(SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)])
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies: List[float], extra: str = ""):
+    print(
+        f"{name:8} queries={len(latencies):4d}  p50={percentile(latencies, 50) * 1000:7.1f} ms  "
+        f"p95={percentile(latencies, 95) * 1000:7.1f} ms  p99={percentile(latencies, 99) * 1000:7.1f} ms  {extra}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=150)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--llm-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    corpus = build_corpus(os.path.join(work_dir, "pdfs"), args.pdfs, args.pages)
+    paths = [path for path, _ in corpus]
+
+    # Queries repeat, so measure generations rather than cache hits; memory-only so no llm_cache.db is left behind
+    set_llm_cache(LLMCache(db_path=None))
+    doc_loader, vector_store = fake_components()
+    workflow = build_fake_workflow(vector_store, args.llm_latency)
+    workflow.invoke("warmup")
+
+    # Nothing ingesting
+    report("idle", chat_latencies(workflow, threading.Event(), args.queries))
+
+    # Inline: every upload parsed and indexed on a thread of the chat process
+    def ingest_inline(path):
+        vector_store.add_documents(doc_loader.load_pdf(path))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=ingest_inline, args=(path,)) for path in paths]
+    for thread in threads:
+        thread.start()
+    stop = threading.Event()
+    threading.Thread(target=lambda: ([t.join() for t in threads], stop.set()), daemon=True).start()
+    latencies = chat_latencies(workflow, stop, args.queries)
+    for thread in threads:
+        thread.join()
+    inline_elapsed = time.perf_counter() - start
+    report("inline", latencies, f"ingest={inline_elapsed:.1f}s")
+
+    # Queue: uploads return immediately, worker processes do the indexing
+    queue = IngestionQueue(os.path.join(work_dir, "jobs.db"))
+    pool = IngestionWorkerPool(args.workers, queue.db_path, COMPONENTS).start()
+    start = time.perf_counter()
+    job_ids = [queue.enqueue(path).id for path in paths]
+    enqueue_elapsed = time.perf_counter() - start
+
+    stop = threading.Event()
+
+    def wait_for_jobs():
+        while not all(job.status in (DONE, FAILED) for job in queue.list_jobs(job_ids)):
+            time.sleep(0.2)
+        stop.set()
+
+    waiter = threading.Thread(target=wait_for_jobs, daemon=True)
+    waiter.start()
+    latencies = chat_latencies(workflow, stop, args.queries)
+    waiter.join()
+    queue_elapsed = time.perf_counter() - start
+    pool.stop()
+    report("queue", latencies, f"ingest={queue_elapsed:.1f}s (incl. worker start-up)")
+
+    print(f"\nuploading session wait: inline blocking wait={inline_elapsed:.1f}s, queue enqueue={enqueue_elapsed * 1000:.1f} ms")
+    print(f"job states: {queue.counts()}")
+
+
+if __name__ == "__main__":
+    main()
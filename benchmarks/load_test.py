@@ -0,0 +1,118 @@
+"""Local load test for the HTTP API.
+
+Builds the real workflow, agents and vector store on top of the fakes in
+``benchmarks.fakes`` and drives ``api.server`` in-process, then reports
+throughput and tail latency. Run with::
+
+    python -m benchmarks.load_test --requests 500 --concurrency 32
+    python -m benchmarks.load_test --no-batching   # compare without micro-batching
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+from langchain.schema import Document
+
+from api.server import QueryService, create_app
+from benchmarks.fakes import SAMPLE_QUERIES, SAMPLE_TEXTS, FakeEmbeddings, build_fake_workflow, local_qdrant_client
+from models.embedding import BatchingEmbeddings
+from models.vector_store import VectorStore
+from utils.document_loader import DocumentLoader
+from utils.ingestion_queue import IngestionQueue
+from utils.llm_cache import LLMCache, set_llm_cache
+from utils.rate_limiter import AdmissionController, set_admission_controller
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def build_service(args: argparse.Namespace) -> QueryService:
+    # The fake LLM has no quota; only the concurrency cap of the admission controller applies
+    set_admission_controller(AdmissionController(global_rate=1e6, global_burst=1e6, max_concurrency=args.llm_concurrency))
+    # Queries repeat, so measure generations rather than cache hits; memory-only so no llm_cache.db is left behind
+    set_llm_cache(LLMCache(db_path=None))
+
+    embeddings = FakeEmbeddings(call_latency=args.embedding_latency)
+    if not args.no_batching:
+        embeddings = BatchingEmbeddings(embeddings, max_batch_size=args.batch_size, max_wait_ms=args.batch_wait_ms)
+
+    vector_store = VectorStore(collection_name="load_test", client=local_qdrant_client(), embeddings=embeddings)
+    vector_store.add_documents([Document(page_content=text, metadata={"source": "sample.pdf"}) for text in SAMPLE_TEXTS])
+
+    workflow = build_fake_workflow(vector_store, args.llm_latency)
+    return QueryService(
+        workflow,
+        DocumentLoader(),
+        vector_store,
+        IngestionQueue(os.path.join(tempfile.mkdtemp(), "jobs.db")),
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        request_timeout=args.timeout,
+    )
+
+
+async def run_load(app, total: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    counter = iter(range(total))
+
+    async def client_loop(client: httpx.AsyncClient):
+        for i in counter:
+            query = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+            start = time.perf_counter()
+            response = await client.post("/query", json={"query": query, "no_cache": True})
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {"elapsed": elapsed, "latencies": latencies, "statuses": statuses}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Server workflow slots")
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--llm-concurrency", type=int, default=64, help="Concurrent LLM calls admitted")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0)
+    parser.add_argument("--no-batching", action="store_true")
+    args = parser.parse_args()
+
+    service = build_service(args)
+    app = create_app(service)
+    result = asyncio.run(run_load(app, args.requests, args.concurrency))
+
+    latencies = result["latencies"]
+    print(f"requests:    {len(latencies)} in {result['elapsed']:.2f}s")
+    print(f"throughput:  {len(latencies) / result['elapsed']:.1f} req/s")
+    for pct in (50, 95, 99):
+        print(f"p{pct}:         {percentile(latencies, pct) * 1000:.1f} ms")
+    print(f"max:         {max(latencies) * 1000:.1f} ms")
+    print(f"statuses:    {dict(result['statuses'])}")
+    print(f"server:      {service.stats()}")
+    service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
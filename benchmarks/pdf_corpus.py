@@ -0,0 +1,131 @@
+"""Synthetic PDF corpus for the ingestion and extraction benchmarks.
+
+``write_pdf`` emits a minimal, valid PDF with one Helvetica text line per
+``Tj`` so any extractor can read it back, and ``generate_manual`` produces
+manual-like pages (numbered headings, paragraphs, small tables) together with
+the ground-truth text of every page.
+"""
+from typing import List, Tuple
+import os
+import random
+
+WORDS = (
+    "system pressure valve sensor module configure install filter signal output input "
+    "voltage current network cable firmware update restart operator manual safety warning "
+    "temperature calibration threshold alarm status display button panel battery charge "
+    "storage memory interface protocol connection device controller motor speed torque"
+).split()
+
+LINES_PER_PAGE = 48
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: List[List[str]]) -> str:
+    """Write a PDF where each page is a list of text lines"""
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    page_tree = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for lines in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+        for line in lines:
+            ops.append(f"({_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (page_tree, font, content)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % page_tree
+    objects[page_tree - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 16))]
+    return " ".join(words).capitalize() + "."
+
+
+def generate_manual(num_pages: int, seed: int = 0) -> List[List[str]]:
+    """Generate manual-like pages: numbered sections, wrapped paragraphs and small tables"""
+    rng = random.Random(seed)
+    pages: List[List[str]] = []
+    lines: List[str] = []
+    section = 0
+    subsection = 0
+
+    def emit(line: str):
+        nonlocal lines
+        lines.append(line)
+        if len(lines) >= LINES_PER_PAGE:
+            pages.append(lines)
+            lines = []
+
+    while len(pages) < num_pages:
+        roll = rng.random()
+        if roll < 0.08:
+            section += 1
+            subsection = 0
+            emit(f"{section} {rng.choice(WORDS).title()} {rng.choice(WORDS).title()}")
+        elif roll < 0.2 and section:
+            subsection += 1
+            emit(f"{section}.{subsection} {rng.choice(WORDS).title()} {rng.choice(WORDS)}")
+        elif roll < 0.27:
+            emit("Parameter    Value    Unit")
+            for _ in range(rng.randint(2, 5)):
+                emit(f"{rng.choice(WORDS)}    {rng.randint(1, 999)}    {rng.choice(['V', 'A', 'rpm', 'C', 'ms'])}")
+        else:
+            paragraph = " ".join(_sentence(rng) for _ in range(rng.randint(2, 5)))
+            # Wrap at roughly 90 characters like a typeset page would
+            words, current = paragraph.split(), ""
+            for word in words:
+                if len(current) + len(word) + 1 > 90:
+                    emit(current)
+                    current = word
+                else:
+                    current = f"{current} {word}".strip()
+            if current:
+                emit(current)
+        # Blank line between blocks
+        if lines:
+            emit("")
+
+    return pages[:num_pages]
+
+
+def build_corpus(directory: str, num_files: int, pages_per_file: int) -> List[Tuple[str, List[List[str]]]]:
+    """Write ``num_files`` manuals and return (path, ground-truth pages) pairs"""
+    corpus = []
+    for i in range(num_files):
+        pages = generate_manual(pages_per_file, seed=i)
+        corpus.append((write_pdf(os.path.join(directory, f"manual_{i}.pdf"), pages), pages))
+    return corpus
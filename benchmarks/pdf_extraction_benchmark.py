@@ -0,0 +1,83 @@
+"""PDF text extraction speed and fidelity per backend.
+
+Generates a corpus of manual-style PDFs with known text and runs every
+available backend over it, reporting pages/sec and text fidelity: the word
+sequence similarity (difflib ratio) between extracted and generated text. A
+second pass through ``PDFExtractor`` with a warm page cache shows the cost of
+re-chunking a document that was already parsed. Run with::
+
+    python -m benchmarks.pdf_extraction_benchmark --files 4 --pages 100
+"""
+from typing import Dict, List
+import argparse
+import difflib
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.pdf_corpus import build_corpus
+from utils.pdf_extraction import PDF_BACKENDS, PageTextCache, PDFExtractor, get_pdf_backend
+
+
+def fidelity(extracted: str, expected: str) -> float:
+    matcher = difflib.SequenceMatcher(None, extracted.split(), expected.split(), autojunk=False)
+    return matcher.ratio()
+
+
+def evaluate(name: str, corpus, sample_pages: int, cache_dir: str) -> Dict[str, float]:
+    backend = get_pdf_backend(name)
+
+    start = time.perf_counter()
+    extracted = [backend.extract_pages(path) for path, _ in corpus]
+    elapsed = time.perf_counter() - start
+    total_pages = sum(len(pages) for pages in extracted)
+
+    pairs = [
+        (text, "\n".join(expected))
+        for pages, (_, truth) in zip(extracted, corpus)
+        for text, expected in zip(pages, truth)
+    ]
+    sample = random.Random(0).sample(pairs, min(sample_pages, len(pairs)))
+    missing = sum(max(len(truth) - len(pages), 0) for pages, (_, truth) in zip(extracted, corpus))
+
+    # Warm the page cache, then time a cached pass as re-chunking would see it
+    extractor = PDFExtractor(backend, cache=PageTextCache(os.path.join(cache_dir, f"{name}.db")))
+    for path, _ in corpus:
+        extractor.extract(path)
+    start = time.perf_counter()
+    for path, _ in corpus:
+        extractor.extract(path)
+    cached_elapsed = time.perf_counter() - start
+
+    return {
+        "pages_per_sec": total_pages / elapsed,
+        "cached_pages_per_sec": total_pages / cached_elapsed,
+        "fidelity": sum(fidelity(text, expected) for text, expected in sample) / len(sample),
+        "missing_pages": missing,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=100, help="Pages per file")
+    parser.add_argument("--fidelity-pages", type=int, default=50, help="Pages sampled for the fidelity score")
+    parser.add_argument("--backends", default=",".join(PDF_BACKENDS))
+    args = parser.parse_args()
+
+    corpus = build_corpus(tempfile.mkdtemp(), args.files, args.pages)
+    cache_dir = tempfile.mkdtemp()
+    print(f"{args.files} PDFs x {args.pages} pages")
+    print(f"{'backend':10} {'pages/s':>9} {'cached pages/s':>15} {'fidelity':>9} {'missing':>8}")
+    for name in args.backends.split(","):
+        try:
+            row = evaluate(name.strip(), corpus, args.fidelity_pages, cache_dir)
+        except ImportError as e:
+            print(f"{name:10} skipped: {e}")
+            continue
+        print(f"{name:10} {row['pages_per_sec']:9.0f} {row['cached_pages_per_sec']:15.0f} {row['fidelity']:9.3f} {row['missing_pages']:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Overhead of request sampling in ``LangGraphWorkflow.invoke``.
+
+Runs the fake workflow with profiling off, at a 1% sample rate and with every
+request profiled, interleaving the modes in rounds to cancel out drift, and
+reports the mean latency and overhead of each against the unprofiled baseline.
+Profiles are written to a temporary directory. Run with::
+
+    python -m benchmarks.profiler_overhead --requests 2000 --rounds 5
+"""
+from typing import Dict, List
+import argparse
+import tempfile
+import time
+
+from langchain.schema import Document
+
+from benchmarks.fakes import SAMPLE_QUERIES, SAMPLE_TEXTS, FakeEmbeddings, build_fake_workflow, local_qdrant_client
+from benchmarks.load_test import percentile
+from models.vector_store import VectorStore
+from utils import profiling
+from utils.llm_cache import LLMCache, bypass_cache, set_llm_cache
+from utils.rate_limiter import AdmissionController, set_admission_controller
+
+RATES = {"off": 0.0, "1%": 0.01, "100%": 1.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per mode and round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.002)
+    parser.add_argument("--interval-ms", type=float, default=profiling.PROFILE_INTERVAL_MS)
+    args = parser.parse_args()
+
+    set_admission_controller(AdmissionController(global_rate=1e6, global_burst=1e6))
+    profiling.PROFILE_DIR = tempfile.mkdtemp()
+    profiling.PROFILE_INTERVAL_MS = args.interval_ms
+    # Bypassed below; memory-only so no llm_cache.db is left behind
+    set_llm_cache(LLMCache(db_path=None))
+
+    vector_store = VectorStore(collection_name="profiler_bench", client=local_qdrant_client(), embeddings=FakeEmbeddings(call_latency=0))
+    vector_store.add_documents([Document(page_content=text, metadata={"source": "sample.pdf"}) for text in SAMPLE_TEXTS])
+    workflow = build_fake_workflow(vector_store, args.llm_latency)
+
+    latencies: Dict[str, List[float]] = {mode: [] for mode in RATES}
+    profiles = 0
+    with bypass_cache():
+        for _ in range(args.rounds):
+            for mode, rate in RATES.items():
+                profiling.PROFILE_SAMPLE_RATE = rate
+                for i in range(args.requests):
+                    start = time.perf_counter()
+                    result = workflow.invoke(SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)])
+                    latencies[mode].append(time.perf_counter() - start)
+                    profiles += "profile" in result
+
+    baseline = sum(latencies["off"]) / len(latencies["off"])
+    print(f"{args.requests * args.rounds} requests per mode, {profiles} profiles written, interval {args.interval_ms} ms")
+    print(f"{'sampling':9} {'mean ms':>8} {'p50 ms':>8} {'overhead':>9}")
+    for mode, values in latencies.items():
+        mean = sum(values) / len(values)
+        print(f"{mode:9} {mean * 1000:8.2f} {percentile(values, 50) * 1000:8.2f} {mean / baseline - 1:9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Memory, p99 search latency and recall@4 for each collection configuration.
+
+Synthetic 768-dim embeddings are generated with most of their variance in the
+leading dimensions (like Matryoshka-trained models) and clustered like
+document chunks. Ground truth is exact cosine top-4 on the full float32
+vectors. Run against a Qdrant server to measure quantization and HNSW::
+
+    docker run -p 6333:6333 qdrant/qdrant
+    python -m benchmarks.quantization_benchmark --url http://localhost:6333 --points 100000
+
+Without ``--url`` it uses qdrant-client's local mode, which searches exactly and
+ignores quantization, so only the dimension-reduction rows change recall there.
+"""
+from typing import Dict, List, Tuple
+import argparse
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as rest
+
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.load_test import percentile
+from models.embedding import EMBEDDING_DIMENSION
+from models.vector_store import CollectionConfig, VectorStore
+
+CONFIGS: Dict[str, CollectionConfig] = {
+    "float32": CollectionConfig(),
+    "scalar": CollectionConfig(quantization="scalar"),
+    "scalar+disk": CollectionConfig(quantization="scalar", on_disk_vectors=True),
+    "binary": CollectionConfig(quantization="binary", oversampling=3.0),
+    "binary+disk": CollectionConfig(quantization="binary", oversampling=3.0, on_disk_vectors=True),
+    "dim256": CollectionConfig(dimension=256),
+    "dim256+scalar": CollectionConfig(dimension=256, quantization="scalar"),
+}
+
+
+def synthetic_embeddings(num_points: int, num_queries: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Clustered vectors whose per-dimension scale decays, normalized to unit length"""
+    rng = np.random.default_rng(seed)
+    scale = 1.0 / np.sqrt(1.0 + np.arange(EMBEDDING_DIMENSION) / 48.0)
+    centroids = rng.standard_normal((max(num_points // 50, 1), EMBEDDING_DIMENSION)) * scale
+
+    assignment = rng.integers(0, len(centroids), num_points)
+    points = centroids[assignment] + 0.6 * rng.standard_normal((num_points, EMBEDDING_DIMENSION)) * scale
+    sources = rng.integers(0, num_points, num_queries)
+    queries = points[sources] + 0.4 * rng.standard_normal((num_queries, EMBEDDING_DIMENSION)) * scale
+
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return points.astype(np.float32), queries.astype(np.float32)
+
+
+def truncate(vectors: np.ndarray, dimension: int) -> np.ndarray:
+    head = vectors[:, :dimension]
+    return head / np.linalg.norm(head, axis=1, keepdims=True)
+
+
+def run_config(client: QdrantClient, name: str, config: CollectionConfig, points: np.ndarray,
+               queries: np.ndarray, truth: List[set], k: int) -> Dict[str, float]:
+    collection = f"quant_bench_{name.replace('+', '_')}"
+    if client.collection_exists(collection):
+        client.delete_collection(collection)
+    # VectorStore creates the collection exactly as the app would
+    VectorStore(collection_name=collection, client=client, embeddings=FakeEmbeddings(), config=config)
+
+    vectors = truncate(points, config.dimension) if config.dimension < EMBEDDING_DIMENSION else points
+    query_vectors = truncate(queries, config.dimension) if config.dimension < EMBEDDING_DIMENSION else queries
+
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), 1000):
+        batch = vectors[offset:offset + 1000]
+        client.upsert(collection, points=rest.Batch(
+            ids=list(range(offset, offset + len(batch))),
+            vectors=batch.tolist(),
+            payloads=[{"page_content": "", "metadata": {}} for _ in range(len(batch))],
+        ))
+    upsert_seconds = time.perf_counter() - start
+
+    latencies, hits = [], 0
+    for query, expected in zip(query_vectors, truth):
+        start = time.perf_counter()
+        result = client.search(collection, query_vector=query.tolist(), limit=k, search_params=config.search_params())
+        latencies.append(time.perf_counter() - start)
+        hits += len(expected & {point.id for point in result})
+
+    client.delete_collection(collection)
+    return {
+        "memory_mb": config.estimated_memory_bytes(len(points)) / 2 ** 20,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "recall": hits / (k * len(truth)),
+        "upsert_s": upsert_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Qdrant server URL; defaults to local in-memory mode")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--configs", nargs="*", default=list(CONFIGS), choices=list(CONFIGS))
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url) if args.url else QdrantClient(":memory:")
+    points, queries = synthetic_embeddings(args.points, args.queries)
+    # Exact top-k on the full float32 vectors
+    truth = [set(np.argsort(-points @ query)[:args.k].tolist()) for query in queries]
+
+    print(f"{'config':15} {'vector RAM MB':>13} {'p50 ms':>8} {'p99 ms':>8} {f'recall@{args.k}':>9} {'upsert s':>9}")
+    for name in args.configs:
+        row = run_config(client, name, CONFIGS[name], points, queries, truth, args.k)
+        print(f"{name:15} {row['memory_mb']:13.1f} {row['p50_ms']:8.2f} {row['p99_ms']:8.2f} {row['recall']:9.3f} {row['upsert_s']:9.1f}")
+
+    if not args.url:
+        print("\nlocal mode: exact search, quantization and on-disk settings do not change latency or recall")
+
+
+if __name__ == "__main__":
+    main()
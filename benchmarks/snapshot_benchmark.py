@@ -0,0 +1,93 @@
+"""Replica bootstrap from a snapshot vs full re-ingestion.
+
+Fills a source collection with ``--chunks`` chunks, exports a snapshot and
+imports it into an empty collection, timing both and reporting the archive
+size. Re-ingestion is timed on a ``--reingest-chunks`` sample through
+``VectorStore.add_documents`` with an embedding API that costs
+``--embed-call-latency`` per request plus ``--embed-text-latency`` per text,
+in ingestion-sized batches, and extrapolated to the full index. PDF parsing
+and chunking are not included, so the re-ingestion figure is a lower bound::
+
+    docker run -p 6333:6333 qdrant/qdrant
+    python -m benchmarks.snapshot_benchmark --url http://localhost:6333 --chunks 100000
+
+Without ``--url`` both collections live in qdrant-client's local mode.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from langchain.schema import Document
+from qdrant_client import QdrantClient
+
+from benchmarks.fakes import SAMPLE_TEXTS, FakeEmbeddings, local_qdrant_client
+from models.vector_store import CollectionConfig, VectorStore
+from utils.ingestion_worker import INGESTION_BATCH_SIZE, chunk_id
+from utils.snapshot import SNAPSHOT_BATCH_SIZE, export_snapshot, import_snapshot
+
+
+def chunks(start: int, n: int):
+    return [
+        Document(page_content=f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} chunk {i}", metadata={"source": f"manual{i // 500}.pdf", "page": i % 500})
+        for i in range(start, start + n)
+    ]
+
+
+def fill(store: VectorStore, n: int, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, n, batch_size):
+        batch = chunks(i, min(batch_size, n - i))
+        store.add_documents(batch, ids=[chunk_id("benchmark", j) for j in range(i, i + len(batch))])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Qdrant server URL; defaults to local mode")
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--reingest-chunks", type=int, default=5000, help="Sample re-ingested with embedding latency")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--embed-call-latency", type=float, default=0.1)
+    parser.add_argument("--embed-text-latency", type=float, default=0.001)
+    parser.add_argument("--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE, help="Import upsert batch size")
+    parser.add_argument("--parallel", type=int, default=1)
+    args = parser.parse_args()
+
+    def client() -> QdrantClient:
+        return QdrantClient(url=args.url) if args.url else local_qdrant_client()
+
+    config = CollectionConfig(dimension=args.dimension)
+    free = FakeEmbeddings(dimension=args.dimension, call_latency=0, text_latency=0)
+    source = VectorStore(collection_name="snapshot_bench_source", client=client(), embeddings=free, config=config)
+    fill(source, args.chunks, 1024)
+
+    api = FakeEmbeddings(
+        dimension=args.dimension, call_latency=args.embed_call_latency, text_latency=args.embed_text_latency
+    )
+    sample = VectorStore(collection_name="snapshot_bench_reingest", client=client(), embeddings=api, config=config)
+    reingest = fill(sample, args.reingest_chunks, INGESTION_BATCH_SIZE) * args.chunks / args.reingest_chunks
+
+    path = os.path.join(tempfile.mkdtemp(), "index.snapshot.tar.gz")
+    start = time.perf_counter()
+    export_snapshot(source, path)
+    export_seconds = time.perf_counter() - start
+
+    target_embeddings = FakeEmbeddings(dimension=args.dimension, call_latency=0, text_latency=0)
+    target = VectorStore(collection_name="snapshot_bench_target", client=client(), embeddings=target_embeddings, config=config)
+    stats = import_snapshot(target, path, batch_size=args.batch_size, parallel=args.parallel)
+
+    print(f"{args.chunks} chunks, {args.dimension} dims, archive {os.path.getsize(path) / 2 ** 20:.1f} MiB")
+    print(f"{'step':44} {'seconds':>8} {'embedding calls':>16}")
+    print(f"{'re-ingestion (extrapolated)':44} {reingest:8.1f} {api.calls * args.chunks // args.reingest_chunks:16d}")
+    print(f"{'snapshot export':44} {export_seconds:8.1f} {0:16d}")
+    print(f"{'snapshot import':44} {stats['seconds']:8.1f} {target_embeddings.calls:16d}")
+    print(f"bootstrap speedup: {reingest / stats['seconds']:.1f}x")
+
+    if args.url:
+        for store in (source, sample, target):
+            store.client.delete_collection(store.collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Search latency of small tenants while a large tenant bulk-uploads.
+
+Simulates many tenants with Zipf-distributed document counts, indexes all but
+the largest, then uploads the largest in batches while small tenants keep
+searching. Runs once with every tenant in the shared collection and once with
+promotion enabled, and reports small-tenant search p50/p99 before and during
+the upload, plus how many tenants ended up in dedicated collections::
+
+    docker run -p 6333:6333 qdrant/qdrant
+    python -m benchmarks.tenant_load_test --url http://localhost:6333 --tenants 500 --points 200000
+
+Against a server the upload runs in a background thread, concurrently with the
+searches. Without ``--url`` it uses qdrant-client's local mode, which is not
+thread-safe and searches exactly, so searches are interleaved with the upload
+batches and the numbers mostly reflect how many points a search has to scan.
+"""
+from typing import Dict, List
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+from langchain.schema import Document
+from qdrant_client import QdrantClient
+
+from benchmarks.fakes import SAMPLE_TEXTS, FakeEmbeddings, local_qdrant_client
+from benchmarks.load_test import percentile
+from models.vector_store import CollectionConfig, VectorStore
+
+MODES: Dict[str, int] = {"shared only": 0, "promotion": -1}
+
+
+def tenant_sizes(num_tenants: int, total_points: int, zipf_s: float) -> List[int]:
+    """Chunks per tenant, largest first"""
+    weights = 1.0 / np.arange(1, num_tenants + 1) ** zipf_s
+    return [max(1, int(w)) for w in weights / weights.sum() * total_points]
+
+
+def tenant_documents(tenant: str, n: int) -> List[Document]:
+    return [
+        Document(page_content=f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} {tenant} section {i}", metadata={"source": f"{tenant}.pdf"})
+        for i in range(n)
+    ]
+
+
+def run_mode(client: QdrantClient, name: str, promotion_points: int, sizes: List[int], args) -> Dict[str, float]:
+    config = CollectionConfig(dimension=args.dimension, multi_tenant=True, tenant_promotion_points=promotion_points)
+    embeddings = FakeEmbeddings(dimension=args.dimension, call_latency=0, text_latency=0)
+    collection = f"tenant_bench_{name.replace(' ', '_')}"
+    store = VectorStore(collection_name=collection, client=client, embeddings=embeddings, config=config)
+
+    tenants = [f"tenant{i:04d}" for i in range(len(sizes))]
+    start = time.perf_counter()
+    for tenant, size in zip(tenants[1:], sizes[1:]):
+        docs = tenant_documents(tenant, size)
+        for i in range(0, size, args.batch_size):
+            store.add_documents(docs[i:i + args.batch_size], tenant_id=tenant)
+    index_seconds = time.perf_counter() - start
+
+    # Small tenants are the bottom half by size
+    small = tenants[len(tenants) // 2:]
+    rng = random.Random(0)
+
+    def search() -> float:
+        began = time.perf_counter()
+        store.similarity_search("section maintenance schedule", k=4, tenant_id=rng.choice(small))
+        return time.perf_counter() - began
+
+    quiet = [search() for _ in range(args.searches)]
+
+    whale = tenant_documents(tenants[0], sizes[0])
+    batches = [whale[i:i + args.batch_size] for i in range(0, len(whale), args.batch_size)]
+    during: List[float] = []
+    start = time.perf_counter()
+    if args.url:
+        done = threading.Event()
+
+        def upload():
+            for batch in batches:
+                store.add_documents(batch, tenant_id=tenants[0])
+            done.set()
+
+        thread = threading.Thread(target=upload)
+        thread.start()
+        while not done.is_set():
+            during.append(search())
+        thread.join()
+    else:
+        per_batch = max(1, args.searches // len(batches))
+        for batch in batches:
+            store.add_documents(batch, tenant_id=tenants[0])
+            during.extend(search() for _ in range(per_batch))
+    upload_seconds = time.perf_counter() - start
+
+    dedicated = store._dedicated_tenants(refresh=True)
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name.startswith(collection + "__"):
+            client.delete_collection(alias.collection_name)
+    client.delete_collection(collection)
+
+    return {
+        "index_seconds": index_seconds,
+        "upload_seconds": upload_seconds,
+        "quiet_p50": percentile(quiet, 50),
+        "quiet_p99": percentile(quiet, 99),
+        "during_p50": percentile(during, 50),
+        "during_p99": percentile(during, 99),
+        "dedicated": len(dedicated),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Qdrant server URL; defaults to local mode")
+    parser.add_argument("--tenants", type=int, default=200)
+    parser.add_argument("--points", type=int, default=20000, help="Total chunks across all tenants")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of the tenant sizes")
+    parser.add_argument("--promotion-points", type=int, default=2000, help="Threshold used by the promotion mode")
+    parser.add_argument("--dimension", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--searches", type=int, default=300)
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url) if args.url else local_qdrant_client()
+    sizes = tenant_sizes(args.tenants, args.points, args.zipf)
+    print(f"{args.tenants} tenants, {sum(sizes)} chunks, largest {sizes[0]}, median {sizes[len(sizes) // 2]}")
+    print(f"{'mode':12} {'index s':>8} {'upload s':>9} {'quiet p50':>10} {'quiet p99':>10} "
+          f"{'upload p50':>11} {'upload p99':>11} {'dedicated':>10}")
+    for name, promotion_points in MODES.items():
+        if promotion_points < 0:
+            promotion_points = args.promotion_points
+        row = run_mode(client, name, promotion_points, sizes, args)
+        print(f"{name:12} {row['index_seconds']:8.1f} {row['upload_seconds']:9.1f} "
+              f"{row['quiet_p50'] * 1000:8.2f}ms {row['quiet_p99'] * 1000:8.2f}ms "
+              f"{row['during_p50'] * 1000:9.2f}ms {row['during_p99'] * 1000:9.2f}ms {row['dedicated']:10d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Weather answers rendered from templates vs generated by the LLM.
+
+Runs the same mix of weather queries through ``WeatherAgent`` in both response
+modes and reports p50/p95 latency, LLM calls and estimated Gemini cost per
+query. Only the network calls are faked: the LLM sleeps for ``--llm-latency``
+per call and tokens are estimated from the rendered prompts and replies. The
+response cache is bypassed so every query pays for its calls. Run with::
+
+    python -m benchmarks.weather_response_benchmark --queries 200 --llm-latency 0.6
+"""
+from typing import Any, Dict, List
+import argparse
+import random
+import time
+
+from agents.weather_agent import WeatherAgent
+from benchmarks.fakes import FakeChatModel, FakeWeatherAPIHandler, default_responder
+from benchmarks.load_test import percentile
+from utils.chunking import approximate_token_count
+from utils.llm_cache import bypass_cache
+from utils.rate_limiter import AdmissionController, set_admission_controller
+
+CITIES = ["London", "Paris", "Tokyo", "Berlin", "Madrid", "Oslo", "Cairo", "Lima", "Toronto", "Sydney"]
+
+FACTUAL_QUERIES = [
+    "What's the weather in {city}?",
+    "How hot is it in {city} right now?",
+    "Current temperature in {city}",
+    "Is it windy in {city}?",
+    "What's the humidity in {city}?",
+]
+
+REASONING_QUERIES = [
+    "Should I bring an umbrella in {city} today?",
+    "Do I need a jacket in {city}?",
+    "Is it a good day for a picnic in {city}?",
+]
+
+
+class TokenCounter:
+    """Responder wrapper that tallies input and output tokens of every LLM call"""
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def __call__(self, messages) -> str:
+        reply = default_responder(messages)
+        self.calls += 1
+        self.input_tokens += sum(approximate_token_count(m.content) for m in messages)
+        self.output_tokens += approximate_token_count(reply)
+        return reply
+
+
+def build_queries(count: int, reasoning_share: float, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        templates = REASONING_QUERIES if rng.random() < reasoning_share else FACTUAL_QUERIES
+        queries.append(rng.choice(templates).format(city=rng.choice(CITIES)))
+    return queries
+
+
+def run(mode: str, queries: List[str], args: argparse.Namespace) -> Dict[str, Any]:
+    counter = TokenCounter()
+    agent = WeatherAgent(
+        llm=FakeChatModel(latency=args.llm_latency, responder=counter),
+        weather_api=FakeWeatherAPIHandler(latency=args.weather_latency),
+        response_mode=mode
+    )
+
+    latencies = []
+    with bypass_cache():
+        for query in queries:
+            start = time.perf_counter()
+            agent.get_weather_response(query)
+            latencies.append(time.perf_counter() - start)
+
+    cost = (counter.input_tokens * args.input_price + counter.output_tokens * args.output_price) / 1e6
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "calls": counter.calls / len(queries),
+        "cost": cost / len(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--reasoning-share", type=float, default=0.2, help="Fraction of advice-style queries")
+    parser.add_argument("--llm-latency", type=float, default=0.6, help="Seconds per Gemini call")
+    parser.add_argument("--weather-latency", type=float, default=0.1, help="Seconds per OpenWeatherMap call")
+    parser.add_argument("--input-price", type=float, default=0.10, help="USD per million input tokens")
+    parser.add_argument("--output-price", type=float, default=0.40, help="USD per million output tokens")
+    args = parser.parse_args()
+
+    set_admission_controller(AdmissionController(global_rate=1e6, global_burst=1e6))
+    queries = build_queries(args.queries, args.reasoning_share)
+
+    print(f"{len(queries)} weather queries, {args.reasoning_share:.0%} need reasoning")
+    print(f"{'mode':10} {'p50 ms':>8} {'p95 ms':>8} {'LLM calls/q':>12} {'USD / 1k q':>11}")
+    for mode in ("llm", "template"):
+        row = run(mode, queries, args)
+        print(f"{mode:10} {row['p50'] * 1000:8.0f} {row['p95'] * 1000:8.0f} {row['calls']:12.2f} {row['cost'] * 1000:11.4f}")
+
+
+if __name__ == "__main__":
+    main()
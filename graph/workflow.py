@@ -1,4 +1,4 @@
-from typing import Dict, Any, List, Literal, TypedDict, Annotated, Union
+from typing import Dict, Any, List, Literal, TypedDict, Annotated, Union, Iterator, Optional, Tuple
 from langchain.schema import Document
 from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph, END
@@ -6,6 +6,7 @@ from agents.router_agent import RouterAgent
 from agents.weather_agent import WeatherAgent
 from agents.rag_agent import RAGAgent
 from utils.evaluation import LangSmithEvaluator
+from utils.profiling import annotated, profile_request
 
 
 class WorkflowState(BaseModel):
@@ -21,11 +22,17 @@ class WorkflowState(BaseModel):
 class LangGraphWorkflow:
     """LangGraph workflow for the AI pipeline"""
     
-    def __init__(self):
-        self.router_agent = RouterAgent()
-        self.weather_agent = WeatherAgent()
-        self.rag_agent = RAGAgent()
-        self.evaluator = LangSmithEvaluator()
+    def __init__(
+        self,
+        router_agent: Optional[RouterAgent] = None,
+        weather_agent: Optional[WeatherAgent] = None,
+        rag_agent: Optional[RAGAgent] = None,
+        evaluator: Optional[LangSmithEvaluator] = None
+    ):
+        self.router_agent = router_agent or RouterAgent()
+        self.weather_agent = weather_agent or WeatherAgent()
+        self.rag_agent = rag_agent or RAGAgent()
+        self.evaluator = evaluator or LangSmithEvaluator()
         
         # Build the workflow graph
         self.workflow = self.build_workflow()
@@ -71,10 +78,11 @@ class LangGraphWorkflow:
         workflow = StateGraph(WorkflowState)
         
         # Register nodes with names + actual methods
-        workflow.add_node("router", self.route)  # Use callable (method) for logic
-        workflow.add_node("weather", self.process_weather)  # Use callable
-        workflow.add_node("document", self.process_document)  # Use callable
-        workflow.add_node("evaluate", self.evaluate_response)  # Use callable
+        # Nodes are annotated so sampled profiles show time per node
+        workflow.add_node("router", annotated("router", self.route))  # Use callable (method) for logic
+        workflow.add_node("weather", annotated("weather", self.process_weather))  # Use callable
+        workflow.add_node("document", annotated("document", self.process_document))  # Use callable
+        workflow.add_node("evaluate", annotated("evaluate", self.evaluate_response))  # Use callable
 
         # Conditional edges — based on state.action
         workflow.add_conditional_edges(
@@ -95,8 +103,23 @@ class LangGraphWorkflow:
 
         return workflow.compile()
     
-    def invoke(self, query: str) -> Dict[str, Any]:
-        """Invoke the workflow with a query"""
-        state = WorkflowState(query=query)
-        result = self.workflow.invoke(state)
+    def invoke(self, query: str, profile: bool = False) -> Dict[str, Any]:
+        """Invoke the workflow with a query.
+
+        A sampled fraction of calls (PROFILE_SAMPLE_RATE), or every call with
+        ``profile=True``, is profiled; the result then carries the path of the
+        written profile under "profile".
+        """
+        with profile_request("workflow", force=profile) as profiler:
+            state = WorkflowState(query=query)
+            result = self.workflow.invoke(state)
+        if profiler is not None:
+            result["profile"] = profiler.output_path
         return result
+    
+    def stream(self, query: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Run the workflow and yield (node name, state after that node) as each node finishes"""
+        state = WorkflowState(query=query)
+        for update in self.workflow.stream(state, stream_mode="updates"):
+            for node, node_state in update.items():
+                yield node, node_state
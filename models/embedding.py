@@ -1,4 +1,10 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from concurrent.futures import Future
+import math
+import queue
+import threading
+import time
+from langchain_core.embeddings import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain.schema import Document
 import os
@@ -6,6 +12,10 @@ from dotenv import load_dotenv
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBEDDING_DIMENSION = 768
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "10"))
 
 
 class EmbeddingModel:
@@ -14,7 +24,7 @@ class EmbeddingModel:
     def __init__(self, api_key: str = GEMINI_API_KEY):
         self.embeddings = GoogleGenerativeAIEmbeddings(
             google_api_key=api_key,
-            model="models/text-embedding-004"
+            model=EMBEDDING_MODEL
         )
     
     def embed_documents(self, documents: List[Document]) -> List[List[float]]:
@@ -25,3 +35,106 @@ class EmbeddingModel:
     def embed_query(self, query: str) -> List[float]:
         """Generate embedding for a query string"""
         return self.embeddings.embed_query(query)
+
+
+class TruncatedEmbeddings(Embeddings):
+    """Matryoshka-style dimension reduction: keep the leading dimensions and re-normalize.
+
+    text-embedding-004 is trained so that its leading dimensions carry most of the
+    signal, which makes truncated vectors usable for cosine search at a fraction of
+    the memory.
+    """
+    
+    def __init__(self, embeddings: Embeddings, dimension: int):
+        self.embeddings = embeddings
+        self.dimension = dimension
+    
+    def _truncate(self, vector: List[float]) -> List[float]:
+        head = vector[:self.dimension]
+        norm = math.sqrt(sum(v * v for v in head)) or 1.0
+        return [v / norm for v in head]
+    
+    def embed_documents(self, texts: List[str], **kwargs) -> List[List[float]]:
+        return [self._truncate(vector) for vector in self.embeddings.embed_documents(texts, **kwargs)]
+    
+    def embed_query(self, text: str, **kwargs) -> List[float]:
+        return self._truncate(self.embeddings.embed_query(text, **kwargs))
+
+
+class BatchingEmbeddings(Embeddings):
+    """Coalesces concurrent embed_query calls into batched embed_documents calls.
+
+    Each caller blocks on a future while a single background thread drains the
+    queue, waiting at most ``max_wait_ms`` for more queries to arrive before
+    sending up to ``max_batch_size`` texts in one request.
+    """
+    
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_wait_ms: float = EMBEDDING_BATCH_WAIT_MS,
+        query_kwargs: Optional[Dict[str, Any]] = None
+    ):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        # Extra arguments for the batched call, e.g. the query task type for Gemini
+        self.query_kwargs = query_kwargs or {}
+        self.batch_count = 0
+        self.query_count = 0
+        
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Documents are already batched by the caller, so pass them straight through"""
+        return self.embeddings.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Queue the query and wait for the batch that contains it"""
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return batching statistics"""
+        return {
+            "batches": self.batch_count,
+            "queries": self.query_count,
+            "avg_batch_size": self.query_count / self.batch_count if self.batch_count else 0.0
+        }
+    
+    def _collect_batch(self) -> List[tuple]:
+        """Block for the first query, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            texts = [text for text, _ in batch]
+            
+            try:
+                vectors = self.embeddings.embed_documents(texts, **self.query_kwargs)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            self.batch_count += 1
+            self.query_count += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
@@ -1,36 +1,161 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from contextlib import contextmanager
+import contextvars
+import math
+import re
+import threading
+import time
+import uuid
 from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores import Qdrant
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from pydantic import BaseModel, Field
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as rest
+from models.embedding import EMBEDDING_MODEL, EMBEDDING_DIMENSION, TruncatedEmbeddings
 from dotenv import load_dotenv
 import os
 
 QDRANT_COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME")
+QDRANT_TENANT_ROUTE_TTL = float(os.getenv("QDRANT_TENANT_ROUTE_TTL", "30"))
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 db_url = os.getenv("db_url")
 db_api = os.getenv("db_api")
 
+DEFAULT_TENANT = "default"
+TENANT_FIELD = "metadata.tenant_id"
+_TENANT_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_tenant_id: contextvars.ContextVar = contextvars.ContextVar("tenant_id", default=None)
+
+
+@contextmanager
+def tenant_context(tenant_id: Optional[str]) -> Iterator[None]:
+    """Route the vector store calls made inside the block to a tenant"""
+    token = _tenant_id.set(tenant_id)
+    try:
+        yield
+    finally:
+        _tenant_id.reset(token)
+
+
+def validate_tenant_id(tenant_id: str) -> str:
+    """Tenant ids become part of collection names, so only letters, digits, '-' and '_' are allowed"""
+    if not _TENANT_ID_RE.match(tenant_id):
+        raise ValueError(f"Invalid tenant id '{tenant_id}'")
+    return tenant_id
+
+
+def _env_list(name: str) -> Optional[List[str]]:
+    value = os.getenv(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class CollectionConfig(BaseModel):
+    """Storage settings for the Qdrant collection"""
+    dimension: int = Field(description="Vector size; below 768 the embeddings are truncated Matryoshka-style", default=EMBEDDING_DIMENSION)
+    quantization: str = Field(description="'none', 'scalar' (int8) or 'binary'", default="none")
+    quantization_always_ram: bool = Field(description="Keep quantized vectors in RAM", default=True)
+    rescore: bool = Field(description="Rescore quantized candidates with the original vectors", default=True)
+    oversampling: float = Field(description="Candidates fetched per result before rescoring", default=2.0)
+    on_disk_vectors: bool = Field(description="Store original vectors on disk (memmap)", default=False)
+    on_disk_payload: bool = Field(description="Store payloads on disk", default=False)
+    payload_indexes: List[str] = Field(description="Payload fields we filter on; only these get an index", default=[])
+    payload_metadata_fields: Optional[List[str]] = Field(
+        description="Metadata keys kept in each point's payload; None keeps all", default=None
+    )
+    multi_tenant: bool = Field(description="Partition the collection by tenant and route requests per tenant", default=False)
+    tenant_promotion_points: int = Field(
+        description="Points after which a tenant moves to a dedicated collection; 0 disables promotion", default=20000
+    )
+
+    @classmethod
+    def from_env(cls) -> "CollectionConfig":
+        """Build the config from QDRANT_* environment variables, falling back to the defaults"""
+        values: Dict[str, Any] = {
+            "dimension": os.getenv("QDRANT_VECTOR_DIMENSION"),
+            "quantization": os.getenv("QDRANT_QUANTIZATION"),
+            "quantization_always_ram": os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM"),
+            "rescore": os.getenv("QDRANT_RESCORE"),
+            "oversampling": os.getenv("QDRANT_OVERSAMPLING"),
+            "on_disk_vectors": os.getenv("QDRANT_ON_DISK_VECTORS"),
+            "on_disk_payload": os.getenv("QDRANT_ON_DISK_PAYLOAD"),
+            "payload_indexes": _env_list("QDRANT_PAYLOAD_INDEXES"),
+            "payload_metadata_fields": _env_list("QDRANT_PAYLOAD_METADATA_FIELDS"),
+            "multi_tenant": os.getenv("QDRANT_MULTI_TENANT"),
+            "tenant_promotion_points": os.getenv("QDRANT_TENANT_PROMOTION_POINTS"),
+        }
+        return cls(**{key: value for key, value in values.items() if value is not None})
+
+    def vectors_config(self) -> rest.VectorParams:
+        return rest.VectorParams(
+            size=self.dimension,
+            distance=rest.Distance.COSINE,
+            on_disk=self.on_disk_vectors or None
+        )
+
+    def quantization_config(self) -> Optional[rest.QuantizationConfig]:
+        if self.quantization == "scalar":
+            return rest.ScalarQuantization(
+                scalar=rest.ScalarQuantizationConfig(
+                    type=rest.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram
+                )
+            )
+        if self.quantization == "binary":
+            return rest.BinaryQuantization(
+                binary=rest.BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        if self.quantization != "none":
+            raise ValueError(f"Unknown quantization '{self.quantization}'")
+        return None
+
+    def search_params(self) -> Optional[rest.SearchParams]:
+        if self.quantization == "none":
+            return None
+        return rest.SearchParams(
+            quantization=rest.QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        )
+
+    def estimated_memory_bytes(self, num_points: int) -> int:
+        """Rough RAM needed for vectors: originals unless on disk, plus quantized copies when kept in RAM"""
+        total = 0 if self.on_disk_vectors else num_points * self.dimension * 4
+        if self.quantization_always_ram:
+            if self.quantization == "scalar":
+                total += num_points * self.dimension
+            elif self.quantization == "binary":
+                total += num_points * ((self.dimension + 7) // 8)
+        return total
+
 
 class VectorStore:
     """Interface to the Qdrant vector database"""
     
     def __init__(
-        self, 
+        self,
         collection_name: str = QDRANT_COLLECTION_NAME,
         db_url: str = db_url,
         db_api: int = db_api,
-        api_key: str = GEMINI_API_KEY
+        api_key: str = GEMINI_API_KEY,
+        embeddings: Optional[Embeddings] = None,
+        client: Optional[QdrantClient] = None,
+        config: Optional[CollectionConfig] = None
     ):
         self.collection_name = collection_name
-        self.embeddings = GoogleGenerativeAIEmbeddings(
+        self.config = config or CollectionConfig.from_env()
+        self.embeddings = embeddings or GoogleGenerativeAIEmbeddings(
             google_api_key=api_key,
-            model="models/text-embedding-004"
+            model=EMBEDDING_MODEL
         )
+        if self.config.dimension < EMBEDDING_DIMENSION:
+            self.embeddings = TruncatedEmbeddings(self.embeddings, self.config.dimension)
         
         # Initialize Qdrant client
-        self.client = QdrantClient( url=f"https://{db_url}",
+        self.client = client or QdrantClient( url=f"https://{db_url}",
             api_key=db_api)
         
         # Create collection if it doesn't exist
@@ -38,13 +163,7 @@ class VectorStore:
         collection_names = [collection.name for collection in collections]
         
         if collection_name not in collection_names:
-            self.client.create_collection(
-                collection_name=collection_name,
-                vectors_config=rest.VectorParams(
-                    size=768,  # Gemini embedding dimension
-                    distance=rest.Distance.COSINE
-                )
-            )
+            self._create_collection(collection_name, shared=True)
         
         # Initialize Qdrant vectorstore
         self.vectorstore = Qdrant(
@@ -52,21 +171,305 @@ class VectorStore:
             collection_name=collection_name,
             embeddings=self.embeddings
         )
+        
+        # Tenant router state: wrappers per collection and the cached set of dedicated tenants
+        self._stores: Dict[str, Qdrant] = {collection_name: self.vectorstore}
+        self._dedicated: set = set()
+        self._dedicated_checked = 0.0
+        self._tenant_points: Dict[str, int] = {}
+        # When each dedicated tenant's leftovers in the shared collection may be deleted (monotonic time)
+        self._sweep_due: Dict[str, float] = {}
+        # Latest timer or thread started to sweep each tenant
+        self._sweeps: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+    
+    def _create_collection(self, name: str, shared: bool) -> None:
+        """Create a collection from the config; the shared one of a multi-tenant store gets a tenant index"""
+        hnsw_config = None
+        if shared and self.config.multi_tenant:
+            # Build one HNSW graph per tenant instead of a global one; every search filters by tenant
+            hnsw_config = rest.HnswConfigDiff(payload_m=16, m=0)
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=self.config.vectors_config(),
+            quantization_config=self.config.quantization_config(),
+            on_disk_payload=self.config.on_disk_payload or None,
+            hnsw_config=hnsw_config
+        )
+        if shared and self.config.multi_tenant:
+            self.client.create_payload_index(
+                collection_name=name,
+                field_name=TENANT_FIELD,
+                field_schema=rest.KeywordIndexParams(type=rest.KeywordIndexType.KEYWORD, is_tenant=True)
+            )
+        for field_name in self.config.payload_indexes:
+            if shared and self.config.multi_tenant and field_name == TENANT_FIELD:
+                continue
+            self.client.create_payload_index(
+                collection_name=name,
+                field_name=field_name,
+                field_schema=rest.PayloadSchemaType.KEYWORD
+            )
+    
+    def _store(self, name: str) -> Qdrant:
+        with self._lock:
+            if name not in self._stores:
+                self._stores[name] = Qdrant(client=self.client, collection_name=name, embeddings=self.embeddings)
+            return self._stores[name]
+    
+    def dedicated_collection_name(self, tenant_id: str) -> str:
+        """Alias of a promoted tenant's collection"""
+        return f"{self.collection_name}__{tenant_id}"
+    
+    def _dedicated_tenants(self, refresh: bool = False) -> set:
+        """Tenants with a dedicated collection, refreshed from the collection aliases every QDRANT_TENANT_ROUTE_TTL seconds"""
+        now = time.monotonic()
+        if refresh or now - self._dedicated_checked > QDRANT_TENANT_ROUTE_TTL:
+            prefix = self.collection_name + "__"
+            aliases = self.client.get_aliases().aliases
+            dedicated = {alias.alias_name[len(prefix):] for alias in aliases if alias.alias_name.startswith(prefix)}
+            with self._lock:
+                for tenant in dedicated - self._dedicated:
+                    self._sweep_due.setdefault(tenant, now + QDRANT_TENANT_ROUTE_TTL)
+                self._dedicated = dedicated
+                self._dedicated_checked = now
+        return self._dedicated
+    
+    def resolve_tenant(self, tenant_id: Optional[str] = None) -> Optional[str]:
+        """The explicit tenant, else the one set by tenant_context; None when the store is single-tenant"""
+        if not self.config.multi_tenant:
+            return None
+        return validate_tenant_id(tenant_id or _tenant_id.get() or DEFAULT_TENANT)
+    
+    def route(self, tenant_id: Optional[str] = None, refresh: bool = False) -> Tuple[str, Optional[rest.Filter]]:
+        """Pick the collection (and tenant filter) that serves a request"""
+        tenant = self.resolve_tenant(tenant_id)
+        if tenant is None:
+            return self.collection_name, None
+        if tenant in self._dedicated_tenants(refresh):
+            return self.dedicated_collection_name(tenant), None
+        return self.collection_name, self._tenant_filter(tenant)
     
-    def add_documents(self, documents: List[Document]) -> bool:
-        """Add documents to the vector store"""
+    def _tenant_filter(self, tenant: str) -> rest.Filter:
+        return rest.Filter(must=[rest.FieldCondition(key=TENANT_FIELD, match=rest.MatchValue(value=tenant))])
+    
+    def tenant_point_count(self, tenant_id: str) -> int:
+        """Points a tenant has in the shared collection"""
+        return self.client.count(
+            collection_name=self.collection_name,
+            count_filter=self._tenant_filter(tenant_id),
+            exact=True
+        ).count
+    
+    def promote_tenant(self, tenant_id: str, batch_size: int = 256) -> bool:
+        """Move a tenant from the shared collection to a dedicated one.
+
+        Points are copied into a new collection, then an alias named after the
+        tenant is switched to it and a second pass copies only the points the
+        tenant wrote during the first one. Other processes keep searching the
+        shared collection until their cached routes expire, so the tenant's
+        points stay there for QDRANT_TENANT_ROUTE_TTL seconds; a timer then
+        deletes them (see ``_sweep_shared``). Returns False if the tenant
+        already has a dedicated collection.
+        """
+        tenant = validate_tenant_id(tenant_id)
+        alias = self.dedicated_collection_name(tenant)
+        if any(a.alias_name == alias for a in self.client.get_aliases().aliases):
+            return False
+        
+        physical = f"{alias}__{uuid.uuid4().hex[:8]}"
+        self._create_collection(physical, shared=False)
+        self._copy_tenant_points(tenant, physical, batch_size, delete=False)
+        
+        try:
+            self.client.update_collection_aliases(change_aliases_operations=[
+                rest.CreateAliasOperation(create_alias=rest.CreateAlias(collection_name=physical, alias_name=alias))
+            ])
+        except Exception:
+            # Another process promoted the tenant first
+            self.client.delete_collection(physical)
+            return False
+        
+        with self._lock:
+            self._dedicated = self._dedicated | {tenant}
+            self._sweep_due[tenant] = time.monotonic() + QDRANT_TENANT_ROUTE_TTL
+        self._copy_missing_tenant_points(tenant, alias, batch_size)
+        
+        sweep = threading.Timer(QDRANT_TENANT_ROUTE_TTL, self._sweep_shared, args=(tenant, batch_size))
+        sweep.daemon = True
+        self._sweeps[tenant] = sweep
+        sweep.start()
+        return True
+
+    def _sweep_shared(self, tenant: str, batch_size: int = 256) -> None:
+        """Move a dedicated tenant's points out of the shared collection once no process can be routed there.
+
+        Runs once per tenant and process, QDRANT_TENANT_ROUTE_TTL seconds after
+        this process saw the promotion: by then every process routes the tenant
+        to its dedicated collection, and a write that raced the alias switch has
+        landed, so it is moved rather than lost. Triggered by the promotion's
+        timer, or by the first write or search for the tenant once it is due.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now < self._sweep_due.get(tenant, now):
+                return
+            self._sweep_due[tenant] = math.inf
         try:
-            self.vectorstore.add_documents(documents)
+            self._copy_tenant_points(tenant, self.dedicated_collection_name(tenant), batch_size, delete=True)
+        except Exception as e:
+            print(f"Error sweeping tenant {tenant} from the shared collection: {str(e)}")
+            with self._lock:
+                self._sweep_due[tenant] = time.monotonic() + QDRANT_TENANT_ROUTE_TTL
+    
+    def _sweep_shared_in_background(self, tenant: str) -> None:
+        """Start _sweep_shared on a daemon thread if it is due, so searches never wait for it"""
+        with self._lock:
+            due = self._sweep_due.get(tenant, 0.0)
+        if time.monotonic() >= due:
+            sweep = threading.Thread(target=self._sweep_shared, args=(tenant,), name=f"sweep-{tenant}", daemon=True)
+            self._sweeps[tenant] = sweep
+            sweep.start()
+    
+    def create_dedicated_collection(self, tenant_id: str) -> str:
+        """Create an empty dedicated collection for a tenant unless it has one; returns its alias.
+
+        Unlike promote_tenant nothing is moved, so this is only for filling a
+        dedicated collection from elsewhere, such as a snapshot import.
+        """
+        tenant = validate_tenant_id(tenant_id)
+        alias = self.dedicated_collection_name(tenant)
+        if not any(a.alias_name == alias for a in self.client.get_aliases().aliases):
+            physical = f"{alias}__{uuid.uuid4().hex[:8]}"
+            self._create_collection(physical, shared=False)
+            self.client.update_collection_aliases(change_aliases_operations=[
+                rest.CreateAliasOperation(create_alias=rest.CreateAlias(collection_name=physical, alias_name=alias))
+            ])
+        with self._lock:
+            self._dedicated = self._dedicated | {tenant}
+        return alias
+    
+    def _copy_tenant_points(self, tenant: str, target: str, batch_size: int, delete: bool) -> None:
+        offset = None
+        while True:
+            points, next_offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._tenant_filter(tenant),
+                limit=batch_size,
+                offset=None if delete else offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            if not points:
+                return
+            self.client.upsert(
+                collection_name=target,
+                points=[rest.PointStruct(id=point.id, vector=point.vector, payload=point.payload) for point in points]
+            )
+            if delete:
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=rest.PointIdsList(points=[point.id for point in points])
+                )
+            elif next_offset is None:
+                return
+            offset = next_offset
+    
+    def _copy_missing_tenant_points(self, tenant: str, target: str, batch_size: int) -> None:
+        """Copy the tenant's shared points that ``target`` does not have yet, without re-sending the others.
+
+        Chunk ids are derived from the content, so a point that already exists
+        in ``target`` holds the same chunk.
+        """
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._tenant_filter(tenant),
+                limit=batch_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            ids = [point.id for point in points]
+            if ids:
+                existing = {point.id for point in self.client.retrieve(collection_name=target, ids=ids, with_payload=False)}
+                missing = [point_id for point_id in ids if point_id not in existing]
+                if missing:
+                    new_points = self.client.retrieve(
+                        collection_name=self.collection_name, ids=missing, with_payload=True, with_vectors=True
+                    )
+                    self.client.upsert(
+                        collection_name=target,
+                        points=[rest.PointStruct(id=point.id, vector=point.vector, payload=point.payload) for point in new_points]
+                    )
+            if offset is None:
+                return
+    
+    def _should_promote(self, tenant: str, added: int) -> bool:
+        """Whether a tenant in the shared collection has reached the promotion threshold.
+
+        Counting on every write is expensive, so the last exact count plus the
+        points this process wrote since is used as an estimate, and only an
+        estimate at the threshold is confirmed with an exact count.
+        """
+        promotion_points = self.config.tenant_promotion_points
+        if not promotion_points:
+            return False
+        with self._lock:
+            estimate = self._tenant_points.get(tenant)
+            if estimate is not None:
+                estimate += added
+                self._tenant_points[tenant] = estimate
+        if estimate is None or estimate >= promotion_points:
+            estimate = self.tenant_point_count(tenant)
+            with self._lock:
+                self._tenant_points[tenant] = estimate
+        return estimate >= promotion_points
+    
+    def _compact(self, document: Document, tenant: Optional[str] = None) -> Document:
+        """Drop metadata keys that are not configured to be stored in the payload and tag the tenant"""
+        fields = self.config.payload_metadata_fields
+        metadata = document.metadata
+        if fields is not None:
+            metadata = {key: value for key, value in metadata.items() if key in fields}
+        if tenant is not None:
+            metadata = {**metadata, "tenant_id": tenant}
+        if metadata is document.metadata:
+            return document
+        return Document(page_content=document.page_content, metadata=metadata)
+    
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None, tenant_id: Optional[str] = None) -> bool:
+        """Add documents to the vector store; stable ids make re-adding the same chunks an overwrite.
+
+        In a multi-tenant store the documents go to the tenant's collection, and a
+        tenant that outgrows the shared collection is promoted to a dedicated one.
+        """
+        try:
+            tenant = self.resolve_tenant(tenant_id)
+            # Writes always re-check promotions so no process keeps writing to the shared collection afterwards
+            collection, tenant_filter = self.route(tenant, refresh=tenant is not None)
+            self._store(collection).add_documents([self._compact(doc, tenant) for doc in documents], ids=ids)
+            
+            if tenant_filter is not None and self._should_promote(tenant, len(documents)):
+                self.promote_tenant(tenant)
+            elif tenant is not None and tenant_filter is None:
+                self._sweep_shared(tenant)
             return True
         except Exception as e:
             print(f"Error adding documents to vector store: {str(e)}")
             return False
     
-    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
-        """Perform similarity search for a query"""
+    def similarity_search(self, query: str, k: int = 4, tenant_id: Optional[str] = None) -> List[Document]:
+        """Perform similarity search for a query, restricted to the requesting tenant"""
         try:
-            return self.vectorstore.similarity_search(query, k=k)
+            tenant = self.resolve_tenant(tenant_id)
+            collection, tenant_filter = self.route(tenant)
+            if tenant is not None and tenant_filter is None:
+                self._sweep_shared_in_background(tenant)
+            return self._store(collection).similarity_search(
+                query, k=k, filter=tenant_filter, search_params=self.config.search_params()
+            )
         except Exception as e:
             print(f"Error during similarity search: {str(e)}")
             return []
-    
\ No newline at end of file
@@ -0,0 +1,76 @@
+import unittest
+import os
+import tempfile
+import time
+from utils.chat_history import ChatSession, ChatStore, debug_payload
+
+class TestChatHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = ChatStore(os.path.join(self.tmpdir.name, "chat.db"))
+        self.chat = ChatSession(self.store, "s1", page_size=4, max_messages=6, max_bytes=10_000)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _turns(self, n):
+        for i in range(n):
+            self.chat.add("user", f"question {i}")
+            self.chat.add("assistant", f"answer {i}", debug=debug_payload({"action": "document", "context": [{"page_content": "x" * 1000}]}))
+
+    def test_session_state_keeps_a_bounded_tail(self):
+        self._turns(50)
+
+        self.assertEqual(self.chat.total, 100)
+        self.assertEqual(len(self.chat.recent), 6)
+        self.assertEqual(self.chat.recent[-1]["content"], "answer 49")
+        # Debug payloads are not kept in session state
+        self.assertNotIn("debug", self.chat.recent[-1])
+        self.assertLess(self.chat.size_bytes(), 1000)
+
+    def test_byte_cap(self):
+        chat = ChatSession(self.store, "s2", max_messages=100, max_bytes=500)
+        for i in range(10):
+            chat.add("assistant", "y" * 200)
+
+        self.assertLessEqual(chat.size_bytes(), 500)
+        self.assertEqual(chat.total, 10)
+
+    def test_older_pages_are_loaded_from_the_store(self):
+        self._turns(10)
+
+        self.assertEqual([m["content"] for m in self.chat.visible_messages()],
+                         ["question 8", "answer 8", "question 9", "answer 9"])
+        self.assertTrue(self.chat.has_older())
+
+        self.chat.show_older()
+        self.chat.show_older()
+        page = self.chat.visible_messages()
+        self.assertEqual([m["seq"] for m in page], list(range(8, 20)))
+        self.assertEqual(page[0]["content"], "question 4")
+
+        self.chat.reset_window()
+        self.assertEqual(len(self.chat.visible_messages()), 4)
+
+    def test_debug_payload_is_fetched_on_demand(self):
+        self._turns(1)
+        user, assistant = self.chat.visible_messages()
+
+        self.assertIsNone(self.chat.debug(user))
+        debug = self.chat.debug(assistant)
+        self.assertEqual(debug["action"], "document")
+        self.assertEqual(len(debug["context"][0]["page_content"]), 1000)
+
+    def test_sessions_are_separate_and_pruned(self):
+        self._turns(2)
+        other = ChatSession(self.store, "s2", page_size=10)
+        other.add("user", "hello")
+        other.recent.clear()
+
+        self.assertEqual([m["content"] for m in other.visible_messages()], ["hello"])
+
+        self.store.ttl = 0
+        time.sleep(0.01)
+        self.assertEqual(self.store.prune(), 5)
+        self.assertEqual(other.visible_messages(), [])
@@ -0,0 +1,136 @@
+import unittest
+from langchain.schema import Document
+from utils.chunking import StructureAwareChunker, approximate_token_count, get_chunker, parse_blocks
+
+def word_count(text):
+    return len(text.split())
+
+class TestParseBlocks(unittest.TestCase):
+
+    def test_headings_paragraphs_and_tables(self):
+        page = "\n".join([
+            "1 Installation",
+            "Mount the unit on a flat surface and",
+            "connect the power cable.",
+            "",
+            "Parameter    Value    Unit",
+            "voltage    230    V",
+            "1.1 Wiring",
+            "Use shielded cables.",
+        ])
+
+        blocks = parse_blocks([(0, page)])
+
+        self.assertEqual([b.kind for b in blocks], ["heading", "paragraph", "table", "heading", "paragraph"])
+        self.assertEqual(blocks[1].text, "Mount the unit on a flat surface and connect the power cable.")
+        self.assertEqual(blocks[2].text.count("\n"), 1)
+        self.assertEqual(blocks[3].level, 2)
+
+    def test_upper_case_table_rows_are_not_headings(self):
+        page = "\n".join([
+            "MODEL    VOLTAGE    CURRENT",
+            "X100     220 V      5 A",
+            "X200     110 V      9 A",
+        ])
+
+        blocks = parse_blocks([(0, page)])
+
+        self.assertEqual([b.kind for b in blocks], ["table"])
+        self.assertEqual(blocks[0].text.count("\n"), 2)
+
+    def test_paragraph_continues_across_pages(self):
+        blocks = parse_blocks([(0, "The valve must be closed before"), (1, "the filter is removed.")])
+
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual((blocks[0].page_start, blocks[0].page_end), (0, 1))
+
+
+class TestStructureAwareChunker(unittest.TestCase):
+
+    def setUp(self):
+        # Word counts keep the expected sizes easy to reason about
+        self.chunker = StructureAwareChunker(max_tokens=20, min_tokens=5, overlap_tokens=6, token_counter=word_count)
+
+    def _pages(self, *texts):
+        return [Document(page_content=text, metadata={"source": "manual.pdf", "page": i}) for i, text in enumerate(texts)]
+
+    def test_sections_are_boundaries_with_metadata(self):
+        docs = self._pages(
+            "1 Safety\nAlways disconnect power before opening the panel. Wear gloves when handling parts.",
+            "2 Maintenance\nClean the filter every month with warm water.\n2.1 Filters\nReplace filters yearly or when damaged."
+        )
+
+        chunks = self.chunker.split_documents(docs)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(chunks[0].page_content.startswith("1 Safety"))
+        self.assertEqual(chunks[0].metadata["section"], "1 Safety")
+        self.assertEqual(chunks[2].metadata["section"], "2 Maintenance > 2.1 Filters")
+        self.assertEqual(chunks[2].metadata["page_start"], 1)
+        self.assertEqual(chunks[2].metadata["source"], "manual.pdf")
+        self.assertEqual([c.metadata["chunk_index"] for c in chunks], [0, 1, 2])
+
+    def test_long_paragraph_gets_sentence_overlap(self):
+        sentence = "Check the pressure gauge daily."
+        docs = self._pages(" ".join([sentence] * 8))
+
+        chunks = self.chunker.split_documents(docs)
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(chunk.metadata["tokens"], 20)
+        # The second chunk repeats the last sentence of the first
+        self.assertTrue(chunks[1].page_content.startswith(sentence))
+
+    def test_paragraph_boundary_has_no_overlap(self):
+        first = "The motor runs at a fixed speed of three thousand rpm under load."
+        second = "The controller reports faults over the serial interface every second."
+        docs = self._pages(first + "\n\n" + second)
+
+        chunks = self.chunker.split_documents(docs)
+
+        self.assertEqual([c.page_content for c in chunks], [first, second])
+
+    def test_heading_is_not_left_at_chunk_end(self):
+        docs = self._pages("Intro text that is long enough to fill most of this chunk here.\n3 Alarms\nAlarms sound when the threshold is crossed twice.")
+
+        chunks = self.chunker.split_documents(docs)
+
+        self.assertFalse(chunks[0].page_content.endswith("3 Alarms"))
+        self.assertTrue(chunks[1].page_content.startswith("3 Alarms"))
+
+    def test_trailing_heading_is_kept(self):
+        chunks = self.chunker.split_documents(self._pages("Some paragraph.\n\nWARNING LABEL"))
+
+        self.assertIn("WARNING LABEL", "\n".join(c.page_content for c in chunks))
+
+        long_text = "Intro text that is long enough to fill most of this chunk here."
+        chunks = self.chunker.split_documents(self._pages(long_text + "\n3 Alarms"))
+        self.assertEqual(chunks[-1].page_content, "3 Alarms")
+
+    def test_upper_case_table_keeps_all_rows(self):
+        rows = ["MODEL    VOLTAGE    CURRENT", "X100     220 V      5 A", "X200     110 V      9 A"]
+        chunks = self.chunker.split_documents(self._pages("Specifications\n" + "\n".join(rows)))
+
+        text = "\n".join(c.page_content for c in chunks)
+        for row in rows:
+            self.assertIn(row, text)
+        self.assertNotIn("MODEL", chunks[0].metadata["section"])
+
+    def test_large_table_repeats_header(self):
+        rows = ["Parameter    Value    Unit"] + [f"sensor{i}    {i}    V" for i in range(12)]
+        docs = self._pages("\n".join(rows))
+
+        chunks = self.chunker.split_documents(docs)
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertTrue(chunk.page_content.startswith("Parameter    Value    Unit"))
+
+    def test_token_count(self):
+        self.assertEqual(approximate_token_count("Hello, world!"), 4)
+
+    def test_get_chunker(self):
+        self.assertIsInstance(get_chunker("structure"), StructureAwareChunker)
+        with self.assertRaises(ValueError):
+            get_chunker("unknown")
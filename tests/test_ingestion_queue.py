@@ -0,0 +1,222 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sqlite3
+import tempfile
+import time
+from langchain.schema import Document
+from utils.ingestion_queue import IngestionQueue, QUEUED, RUNNING, DONE, FAILED
+from utils.ingestion_worker import IngestionWorker, IngestionWorkerPool, chunk_id
+
+class TestIngestionQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.queue = IngestionQueue(
+            os.path.join(self.tmp_dir.name, "jobs.db"),
+            max_attempts=2,
+            lease_seconds=60,
+            retry_backoff_seconds=0
+        )
+        self.pdf_path = self._write_file("manual.pdf", b"%PDF-1.4 manual")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write_file(self, name, content):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_enqueue_is_idempotent(self):
+        first = self.queue.enqueue(self.pdf_path)
+        # Same content under another name is the same job
+        second = self.queue.enqueue(self._write_file("copy.pdf", b"%PDF-1.4 manual"))
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(first.status, QUEUED)
+        self.assertEqual(self.queue.counts(), {QUEUED: 1})
+
+    def test_enqueue_is_idempotent_per_tenant(self):
+        default = self.queue.enqueue(self.pdf_path)
+        acme = self.queue.enqueue(self.pdf_path, tenant_id="acme")
+
+        self.assertNotEqual(default.id, acme.id)
+        self.assertEqual(acme.tenant_id, "acme")
+        self.assertEqual(self.queue.enqueue(self.pdf_path, tenant_id="acme").id, acme.id)
+
+    def test_queue_without_tenants_is_migrated(self):
+        path = os.path.join(self.tmp_dir.name, "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE jobs (
+                id TEXT PRIMARY KEY, file_path TEXT NOT NULL, file_hash TEXT NOT NULL UNIQUE, status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, chunks INTEGER NOT NULL DEFAULT 0,
+                error TEXT NOT NULL DEFAULT '', worker_id TEXT, available_at REAL NOT NULL, lease_expires_at REAL,
+                created_at REAL NOT NULL, updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("INSERT INTO jobs (id, file_path, file_hash, status, available_at, created_at, updated_at) "
+                     "VALUES ('old', 'manual.pdf', 'abc', 'done', 0, 0, 0)")
+        conn.commit()
+        conn.close()
+
+        queue = IngestionQueue(path)
+
+        job = queue.get("old")
+        self.assertEqual((job.status, job.tenant_id), (DONE, ""))
+        self.assertEqual(queue.enqueue(self.pdf_path, tenant_id="acme").tenant_id, "acme")
+
+    def test_claim_and_complete(self):
+        job = self.queue.enqueue(self.pdf_path)
+
+        claimed = self.queue.claim("worker-1")
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(self.queue.claim("worker-2"))
+
+        self.assertTrue(self.queue.update_progress(job.id, "worker-1", 0.5, 10))
+        self.assertEqual(self.queue.get(job.id).progress, 0.5)
+
+        self.queue.complete(job.id, "worker-1")
+        self.assertEqual(self.queue.get(job.id).status, DONE)
+
+    def test_retry_then_fail(self):
+        job = self.queue.enqueue(self.pdf_path)
+
+        self.queue.claim("worker-1")
+        self.queue.fail(job.id, "worker-1", "quota exceeded")
+        self.assertEqual(self.queue.get(job.id).status, QUEUED)
+
+        self.queue.claim("worker-1")
+        self.queue.fail(job.id, "worker-1", "quota exceeded")
+        failed = self.queue.get(job.id)
+        self.assertEqual(failed.status, FAILED)
+        self.assertEqual(failed.error, "quota exceeded")
+
+        # Uploading the same document again gives it a fresh start
+        self.assertEqual(self.queue.enqueue(self.pdf_path).status, QUEUED)
+
+    def test_expired_lease_is_reclaimed(self):
+        self.queue.lease_seconds = -1
+        job = self.queue.enqueue(self.pdf_path)
+        self.queue.claim("dead-worker")
+
+        reclaimed = self.queue.claim("worker-2")
+
+        self.assertEqual(reclaimed.id, job.id)
+        self.assertEqual(reclaimed.attempts, 2)
+        # The original worker can no longer report progress
+        self.assertFalse(self.queue.update_progress(job.id, "dead-worker", 0.5))
+
+    def test_expired_lease_on_last_attempt_fails(self):
+        self.queue.lease_seconds = -1
+        job = self.queue.enqueue(self.pdf_path)
+        self.queue.claim("dead-worker")
+        self.queue.claim("dead-worker-2")
+
+        # A document that kills its worker every time is not handed out forever
+        self.assertIsNone(self.queue.claim("worker-3"))
+        failed = self.queue.get(job.id)
+        self.assertEqual(failed.status, FAILED)
+        self.assertEqual(failed.attempts, 2)
+        self.assertIn("lease expired", failed.error)
+
+
+class TestIngestionWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.queue = IngestionQueue(os.path.join(self.tmp_dir.name, "jobs.db"), retry_backoff_seconds=0)
+        self.pdf_path = os.path.join(self.tmp_dir.name, "manual.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 manual")
+
+        self.mock_doc_loader = MagicMock()
+        self.mock_doc_loader.load_pdf.return_value = [Document(page_content=f"chunk {i}") for i in range(5)]
+        self.mock_vector_store = MagicMock()
+        self.mock_vector_store.add_documents.return_value = True
+
+        self.worker = IngestionWorker(self.queue, self.mock_doc_loader, self.mock_vector_store, batch_size=2, worker_id="w1")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_run_once_indexes_in_batches(self):
+        job = self.queue.enqueue(self.pdf_path)
+
+        self.assertTrue(self.worker.run_once())
+
+        done = self.queue.get(job.id)
+        self.assertEqual(done.status, DONE)
+        self.assertEqual(done.chunks, 5)
+        self.assertEqual(self.mock_vector_store.add_documents.call_count, 3)
+        # Chunk ids are derived from the content hash, so retries overwrite instead of duplicating
+        first_ids = self.mock_vector_store.add_documents.call_args_list[0].kwargs["ids"]
+        self.assertEqual(first_ids, [chunk_id(job.file_hash, 0), chunk_id(job.file_hash, 1)])
+
+    def test_tenant_jobs_are_indexed_for_the_tenant(self):
+        job = self.queue.enqueue(self.pdf_path, tenant_id="acme")
+
+        self.worker.run_once()
+
+        call = self.mock_vector_store.add_documents.call_args_list[0]
+        self.assertEqual(call.kwargs["tenant_id"], "acme")
+        self.assertEqual(call.kwargs["ids"][0], chunk_id(job.file_hash, 0, "acme"))
+        self.assertNotEqual(call.kwargs["ids"][0], chunk_id(job.file_hash, 0))
+
+    def test_failed_indexing_is_requeued(self):
+        self.mock_vector_store.add_documents.return_value = False
+        job = self.queue.enqueue(self.pdf_path)
+
+        self.worker.run_once()
+
+        requeued = self.queue.get(job.id)
+        self.assertEqual(requeued.status, QUEUED)
+        self.assertIn("Failed to index", requeued.error)
+
+    def test_run_once_without_jobs(self):
+        self.assertFalse(self.worker.run_once())
+
+    def test_lease_is_renewed_during_a_long_parse(self):
+        self.queue.lease_seconds = 0.2
+        worker = IngestionWorker(self.queue, self.mock_doc_loader, self.mock_vector_store, batch_size=2, worker_id="w1", heartbeat_seconds=0.05)
+        stolen = []
+
+        def slow_parse(path):
+            time.sleep(0.6)
+            stolen.append(self.queue.claim("w2"))
+            return [Document(page_content=f"chunk {i}") for i in range(5)]
+
+        self.mock_doc_loader.load_pdf.side_effect = slow_parse
+        job = self.queue.enqueue(self.pdf_path)
+
+        worker.run_once()
+
+        self.assertEqual(stolen, [None])
+        done = self.queue.get(job.id)
+        self.assertEqual(done.status, DONE)
+        self.assertEqual(done.attempts, 1)
+
+
+class TestIngestionWorkerPool(unittest.TestCase):
+
+    def test_dead_workers_are_respawned(self):
+        pool = IngestionWorkerPool(2, db_path=":memory:")
+        alive, dead, replacement = MagicMock(), MagicMock(), MagicMock()
+        alive.is_alive.return_value = True
+        dead.is_alive.return_value = False
+        pool._processes = [alive, dead]
+
+        with patch.object(pool, "_spawn", return_value=replacement) as spawn:
+            self.assertEqual(pool.respawn_dead(), 1)
+            spawn.assert_called_once_with(1)
+            self.assertEqual(pool._processes, [alive, replacement])
+            self.assertEqual(pool.restarts, 1)
+
+            # Workers that exit because the pool is stopping stay stopped
+            replacement.is_alive.return_value = False
+            pool._stop_event.set()
+            self.assertEqual(pool.respawn_dead(), 0)
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch
+import os
+import tempfile
+from langchain.prompts import ChatPromptTemplate
+from langchain_core.messages import AIMessage, HumanMessage
+from benchmarks.fakes import FakeChatModel
+from utils.llm_cache import CachedChatModel, LLMCache, bypass_cache, cache_key
+from utils.rate_limiter import AdmittedChatModel, AdmissionController
+
+class TestLLMCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "cache.db")
+        self.cache = LLMCache(self.db_path, memory_size=2, chain_ttls={"router": 60, "weather_response": 0.05})
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_memory_and_disk_tiers(self):
+        self.cache.update("a", "router", AIMessage(content="weather"))
+
+        self.assertEqual(self.cache.lookup("a", "router").content, "weather")
+
+        # A new instance on the same file only has the disk tier
+        restarted = LLMCache(self.db_path, chain_ttls={"router": 60})
+        self.assertEqual(restarted.lookup("a", "router").content, "weather")
+        self.assertEqual(restarted.stats()["router"]["disk_hits"], 1)
+        # The disk hit was promoted into memory
+        self.assertIn("a", restarted._memory)
+
+    def test_lru_eviction(self):
+        for key in ("a", "b", "c"):
+            self.cache.update(key, "router", AIMessage(content=key))
+
+        self.assertEqual(list(self.cache._memory), ["b", "c"])
+        # Evicted from memory, still on disk
+        self.assertEqual(self.cache.lookup("a", "router").content, "a")
+
+    def test_ttl_expiry(self):
+        self.cache.update("w", "weather_response", AIMessage(content="sunny"))
+        self.assertIsNotNone(self.cache.lookup("w", "weather_response"))
+
+        with patch('utils.llm_cache.time.time', return_value=self.cache._memory["w"][0] + 1):
+            self.assertIsNone(self.cache.lookup("w", "weather_response"))
+            self.assertEqual(self.cache.prune(), 1)
+
+    def test_hit_rate_per_chain(self):
+        self.cache.update("a", "router", AIMessage(content="document"))
+        self.cache.lookup("a", "router")
+        self.cache.lookup("a", "router")
+        self.cache.lookup("b", "router")
+        self.cache.lookup("c", "rag")
+
+        stats = self.cache.stats()
+        self.assertAlmostEqual(stats["router"]["hit_rate"], 2 / 3)
+        self.assertEqual(stats["rag"], {"hits": 0, "disk_hits": 0, "misses": 1, "hit_rate": 0.0})
+
+    def test_key_depends_on_model_and_messages(self):
+        messages = [HumanMessage(content="weather in Paris")]
+        base = cache_key("gemini temperature=0.7", messages)
+
+        self.assertEqual(base, cache_key("gemini temperature=0.7", [HumanMessage(content="weather in Paris")]))
+        self.assertNotEqual(base, cache_key("gemini temperature=0.2", messages))
+        self.assertNotEqual(base, cache_key("gemini temperature=0.7", [HumanMessage(content="weather in Rome")]))
+        self.assertNotEqual(base, cache_key("gemini temperature=0.7", messages, stop=["\n"]))
+
+
+class TestCachedChatModel(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = LLMCache(db_path=None, chain_ttls={"weather_city": 60})
+        self.llm = FakeChatModel(latency=0, responder=lambda messages: "Paris")
+        self.prompt = ChatPromptTemplate.from_messages([("system", "Extract the city name"), ("human", "{query}")])
+
+    def test_chain_is_served_from_cache(self):
+        chain = self.prompt | CachedChatModel(self.llm, "weather_city", cache=self.cache)
+
+        first = chain.invoke({"query": "weather in Paris"})
+        second = chain.invoke({"query": "weather in Paris"})
+        chain.invoke({"query": "weather in Lyon"})
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(self.llm.calls, 2)
+        self.assertEqual(self.cache.stats()["weather_city"]["hits"], 1)
+
+    def test_hit_skips_admission(self):
+        controller = AdmissionController()
+        model = CachedChatModel(AdmittedChatModel(self.llm, controller=controller), "weather_city", cache=self.cache)
+
+        model.invoke("weather in Paris")
+        model.invoke("weather in Paris")
+
+        self.assertEqual(controller.metrics()["admitted"], 1)
+        # The key is built from the wrapped chat model's parameters
+        self.assertEqual(model.llm_string, self.llm._get_llm_string())
+
+    def test_bypass(self):
+        model = CachedChatModel(self.llm, "weather_city", cache=self.cache)
+        model.invoke("weather in Paris")
+
+        with bypass_cache():
+            model.invoke("weather in Paris")
+
+        self.assertEqual(self.llm.calls, 2)
+        self.assertEqual(self.cache.stats()["weather_city"]["misses"], 1)
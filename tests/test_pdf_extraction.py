@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import MagicMock
+import importlib.util
+import os
+import tempfile
+from benchmarks.pdf_corpus import write_pdf
+from utils.document_loader import DocumentLoader
+from utils.pdf_extraction import PageTextCache, PDFBackend, PDFExtractor, get_pdf_backend
+
+PAGES = [
+    ["1 Installation", "Mount the unit on a flat surface."],
+    ["2 Maintenance", "Clean the filter every month."],
+]
+
+class CountingBackend(PDFBackend):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def extract_pages(self, file_path):
+        self.calls += 1
+        return ["\n".join(lines) for lines in PAGES]
+
+class TestPDFExtraction(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pdf_path = write_pdf(os.path.join(self.tmpdir.name, "manual.pdf"), PAGES)
+        self.cache = PageTextCache(os.path.join(self.tmpdir.name, "pages.db"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_pypdf_backend(self):
+        pages = get_pdf_backend("pypdf").extract_pages(self.pdf_path)
+
+        self.assertEqual(len(pages), 2)
+        self.assertIn("Mount the unit on a flat surface.", pages[0])
+
+    @unittest.skipUnless(importlib.util.find_spec("pypdfium2"), "pypdfium2 not installed")
+    def test_pdfium_backend(self):
+        pages = get_pdf_backend("pdfium").extract_pages(self.pdf_path)
+
+        self.assertEqual(pages[1].splitlines(), PAGES[1])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_pdf_backend("tesseract")
+
+    def test_backends_must_implement_extract_pages(self):
+        class Incomplete(PDFBackend):
+            name = "incomplete"
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_pages_are_cached_by_file_hash(self):
+        backend = CountingBackend()
+        extractor = PDFExtractor(backend, cache=self.cache)
+
+        first = extractor.extract(self.pdf_path)
+        second = extractor.extract(self.pdf_path)
+
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual([d.page_content for d in first], [d.page_content for d in second])
+        self.assertEqual(second[1].metadata, {"source": self.pdf_path, "page": 1, "total_pages": 2})
+
+        # A copy with the same content is a cache hit as well
+        copy_path = write_pdf(os.path.join(self.tmpdir.name, "copy.pdf"), PAGES)
+        self.assertEqual(extractor.extract(copy_path)[0].metadata["source"], copy_path)
+        self.assertEqual(backend.calls, 1)
+
+    def test_cache_is_per_backend(self):
+        self.cache.put("abc", "pypdf", ["page one", "page two"])
+
+        self.assertEqual(self.cache.get("abc", "pypdf"), ["page one", "page two"])
+        self.assertIsNone(self.cache.get("abc", "pdfium"))
+
+    def test_rechunking_does_not_reparse(self):
+        backend = CountingBackend()
+        extractor = PDFExtractor(backend, cache=self.cache)
+        chunker = MagicMock()
+        chunker.split_documents.side_effect = lambda docs: docs
+
+        DocumentLoader(self.tmpdir.name, chunker=chunker, extractor=extractor).load_pdf(self.pdf_path)
+        DocumentLoader(self.tmpdir.name, chunker=chunker, extractor=extractor).load_pdf(self.pdf_path)
+
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(chunker.split_documents.call_count, 2)
+
+    def test_cache_can_be_disabled(self):
+        backend = CountingBackend()
+        extractor = PDFExtractor(backend, use_cache=False)
+
+        extractor.extract(self.pdf_path)
+        extractor.extract(self.pdf_path)
+
+        self.assertIsNone(extractor.cache)
+        self.assertEqual(backend.calls, 2)
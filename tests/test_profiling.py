@@ -0,0 +1,75 @@
+import unittest
+import json
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from utils.profiling import SamplingProfiler, annotate, annotated, current_profiler, profile_request
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_forced_profile_writes_speedscope(self):
+        router = annotated("router", busy)
+
+        with profile_request("workflow", force=True, directory=self.tmpdir.name) as profiler:
+            router(0.05)
+            with annotate("evaluate"):
+                busy(0.02)
+
+        self.assertTrue(profiler.output_path.endswith(".speedscope.json"))
+        with open(profiler.output_path) as f:
+            data = json.load(f)
+
+        frames = [frame["name"] for frame in data["shared"]["frames"]]
+        sampled, evented = data["profiles"]
+        self.assertGreater(len(sampled["samples"]), 3)
+        self.assertEqual(len(sampled["samples"]), len(sampled["weights"]))
+        # Samples taken inside a node start with the node's synthetic frame
+        self.assertTrue(any(frames[stack[0]] == "[router]" for stack in sampled["samples"]))
+        self.assertIn("busy", frames)
+        self.assertEqual([(e["type"], frames[e["frame"]]) for e in evented["events"]],
+                         [("O", "[router]"), ("C", "[router]"), ("O", "[evaluate]"), ("C", "[evaluate]")])
+
+    def test_unsampled_requests_are_not_profiled(self):
+        with profile_request("workflow", sample_rate=0, directory=self.tmpdir.name) as profiler:
+            with annotate("router"):
+                self.assertIsNone(current_profiler())
+
+        self.assertIsNone(profiler)
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+    def test_nested_requests_share_the_profiler(self):
+        with profile_request("workflow", force=True, directory=self.tmpdir.name) as outer:
+            with profile_request("ingestion", force=True, directory=self.tmpdir.name) as inner:
+                self.assertIsNone(inner)
+                self.assertIs(current_profiler(), outer)
+
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 1)
+
+    def test_folded_output(self):
+        profiler = SamplingProfiler("ingestion", interval_ms=1).start()
+        with annotate("parse_pdf"):
+            busy(0.03)
+        profiler.stop()
+
+        lines = profiler.to_folded().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any(line.startswith("[parse_pdf];") for line in lines))
+        path = profiler.save(self.tmpdir.name, fmt="folded")
+        self.assertTrue(path.endswith(".folded"))
+
+    def test_interval_follows_the_module_setting(self):
+        with patch("utils.profiling.PROFILE_INTERVAL_MS", 1):
+            self.assertEqual(SamplingProfiler("workflow").interval, 0.001)
+        self.assertEqual(SamplingProfiler("workflow", interval_ms=20).interval, 0.02)
@@ -0,0 +1,176 @@
+import unittest
+from unittest.mock import patch
+import threading
+import time
+from benchmarks.fakes import FakeChatModel
+from agents.router_agent import RouterAgent
+from utils.rate_limiter import (
+    AdmissionController, AdmittedChatModel, LoadShedError, TokenBucket,
+    BACKGROUND, INTERACTIVE, session_context
+)
+
+class FlakyResponder:
+    """Raises a quota error for the first `failures` calls"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, messages):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED: quota exceeded")
+        return "document"
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_refill_and_pause(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        now = bucket.updated
+
+        self.assertTrue(bucket.try_acquire(now))
+        self.assertTrue(bucket.try_acquire(now))
+        self.assertFalse(bucket.try_acquire(now))
+        self.assertAlmostEqual(bucket.wait_time(now), 0.1)
+        self.assertTrue(bucket.try_acquire(now + 0.11))
+
+        bucket.pause(now + 0.11, 1.0)
+        self.assertFalse(bucket.try_acquire(now + 0.5))
+        self.assertAlmostEqual(bucket.wait_time(now + 0.5), 0.71)
+
+
+class TestAdmissionController(unittest.TestCase):
+
+    def controller(self, **kwargs):
+        params = dict(global_rate=1000, global_burst=1000, session_rate=1000, session_burst=1000,
+                      max_concurrency=4, queue_limit=16, queue_timeout=1.0, rate_limit_cooldown=0.05)
+        params.update(kwargs)
+        return AdmissionController(**params)
+
+    def test_deadline_shedding(self):
+        controller = self.controller(max_concurrency=1)
+        controller.acquire()
+
+        with self.assertRaises(LoadShedError) as ctx:
+            controller.acquire(timeout=0.05)
+
+        self.assertEqual(ctx.exception.reason, "deadline")
+        metrics = controller.metrics()
+        self.assertEqual(metrics["shed_count"], 1)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["in_flight"], 1)
+
+    def test_queue_full(self):
+        controller = self.controller(max_concurrency=1, queue_limit=0)
+        with self.assertRaises(LoadShedError) as ctx:
+            controller.acquire()
+        self.assertEqual(ctx.exception.reason, "queue_full")
+
+    def test_interactive_before_background(self):
+        controller = self.controller(max_concurrency=1)
+        controller.acquire()
+        order = []
+
+        def call(priority, name):
+            with controller.admit(priority):
+                order.append(name)
+
+        threads = [threading.Thread(target=call, args=(BACKGROUND, "background"))]
+        threads[0].start()
+        time.sleep(0.05)
+        threads.append(threading.Thread(target=call, args=(INTERACTIVE, "interactive")))
+        threads[1].start()
+        time.sleep(0.05)
+
+        self.assertEqual(controller.metrics()["queue_depth"], 2)
+        controller.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, ["interactive", "background"])
+
+    def test_per_session_limit(self):
+        controller = self.controller(session_rate=0.1, session_burst=2)
+
+        with session_context("alice"):
+            controller.acquire()
+            controller.acquire()
+            with self.assertRaises(LoadShedError) as ctx:
+                controller.acquire(timeout=0.05)
+
+        # Other sessions are not affected
+        controller.acquire(session_id="bob")
+        self.assertEqual(ctx.exception.reason, "session_rate")
+        self.assertEqual(controller.metrics()["admitted"], 3)
+
+    def test_session_waiters_respect_their_deadline(self):
+        controller = self.controller(session_rate=5, session_burst=1)
+        controller.acquire(session_id="alice")
+        results = []
+
+        def call():
+            start = time.monotonic()
+            try:
+                controller.acquire(session_id="alice", timeout=0.3)
+                results.append(("admitted", time.monotonic() - start))
+            except LoadShedError as e:
+                results.append((e.reason, time.monotonic() - start))
+
+        # Both fit the deadline on arrival, but only one token refills before it
+        threads = [threading.Thread(target=call) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcome for outcome, _ in results), ["admitted", "session_rate"])
+        self.assertTrue(all(elapsed < 0.35 for _, elapsed in results))
+
+    def test_retries_after_429(self):
+        controller = self.controller()
+        responder = FlakyResponder(failures=1)
+        llm = AdmittedChatModel(FakeChatModel(latency=0, responder=responder), controller=controller, max_retries=2)
+
+        start = time.monotonic()
+        result = llm.invoke("Tell me about the documents")
+
+        self.assertEqual(result.content, "document")
+        self.assertEqual(responder.calls, 2)
+        # The retry waited out the cooldown on the global bucket
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+        self.assertEqual(controller.metrics()["rate_limited"], 1)
+        self.assertEqual(controller.metrics()["in_flight"], 0)
+
+    def test_persistent_429_is_shed(self):
+        controller = self.controller(rate_limit_cooldown=0.01)
+        llm = AdmittedChatModel(FakeChatModel(latency=0, responder=FlakyResponder(failures=10)), controller=controller, max_retries=1)
+
+        with self.assertRaises(LoadShedError) as ctx:
+            llm.invoke("hello")
+
+        self.assertEqual(ctx.exception.reason, "rate_limited")
+        self.assertEqual(controller.metrics()["shed_by_reason"], {"rate_limited": 1})
+
+    def test_other_errors_are_not_retried(self):
+        controller = self.controller()
+        def broken(messages):
+            raise ValueError("bad request")
+        llm = AdmittedChatModel(FakeChatModel(latency=0, responder=broken), controller=controller)
+
+        with self.assertRaises(ValueError):
+            llm.invoke("hello")
+        self.assertEqual(controller.metrics()["rate_limited"], 0)
+
+
+class TestDegradedResponses(unittest.TestCase):
+
+    def test_router_falls_back_to_keywords(self):
+        controller = AdmissionController(queue_limit=0)
+        with patch('utils.rate_limiter.get_admission_controller', return_value=controller), \
+             patch('utils.llm_cache.get_llm_cache', return_value=None):
+            router = RouterAgent(api_key="test", llm=FakeChatModel(latency=0))
+
+            self.assertEqual(router.route_query("Will it rain in Paris tomorrow?"), "weather")
+            self.assertEqual(router.route_query("Summarize the uploaded manual"), "document")
+
+        self.assertEqual(controller.metrics()["shed_count"], 2)
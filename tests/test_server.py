@@ -0,0 +1,212 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import threading
+import time
+from fastapi.testclient import TestClient
+from api.server import QueryService, create_app
+from models.embedding import BatchingEmbeddings
+from utils.snapshot import SnapshotError
+
+class TestQueryServer(unittest.TestCase):
+
+    def setUp(self):
+        # Mock the shared workflow and document pipeline
+        self.mock_workflow = MagicMock()
+        self.mock_doc_loader = MagicMock()
+        self.mock_vector_store = MagicMock()
+        self.mock_ingestion_queue = MagicMock()
+
+        self.service = QueryService(
+            self.mock_workflow,
+            self.mock_doc_loader,
+            self.mock_vector_store,
+            self.mock_ingestion_queue,
+            max_concurrency=2,
+            max_queue=2,
+            request_timeout=0.5
+        )
+        self.client = TestClient(create_app(self.service))
+
+    def test_query_success(self):
+        self.mock_workflow.invoke.return_value = {
+            "query": "What's the weather in London?",
+            "action": "weather",
+            "city": "London",
+            "weather_data": {"temp": 15.5},
+            "response": "It's 15.5°C in London."
+        }
+
+        response = self.client.post("/query", json={"query": "What's the weather in London?"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["response"], "It's 15.5°C in London.")
+        self.assertEqual(response.json()["context"], [])
+        self.mock_workflow.invoke.assert_called_once_with("What's the weather in London?", False)
+
+    def test_query_rejects_empty(self):
+        response = self.client.post("/query", json={"query": ""})
+
+        self.assertEqual(response.status_code, 422)
+        self.mock_workflow.invoke.assert_not_called()
+
+    def test_query_timeout(self):
+        self.mock_workflow.invoke.side_effect = lambda query, profile: time.sleep(1)
+
+        response = self.client.post("/query", json={"query": "What is LangChain?"})
+
+        self.assertEqual(response.status_code, 504)
+
+    def test_query_stream(self):
+        self.mock_workflow.stream.return_value = iter([
+            ("router", {"query": "What is LangChain?", "action": "document"}),
+            ("document", {"query": "What is LangChain?", "action": "document", "response": "A framework."})
+        ])
+
+        response = self.client.post("/query/stream", json={"query": "What is LangChain?"})
+
+        self.assertEqual(response.status_code, 200)
+        events = [line for line in response.text.splitlines() if line.startswith("event:")]
+        self.assertEqual(events, ["event: router", "event: document", "event: done"])
+
+    def test_query_stream_reports_node_errors(self):
+        def steps():
+            yield ("router", {"query": "What is LangChain?", "action": "document"})
+            raise RuntimeError("vector store unavailable")
+
+        self.mock_workflow.stream.return_value = steps()
+
+        response = self.client.post("/query/stream", json={"query": "What is LangChain?"})
+
+        self.assertEqual(response.status_code, 200)
+        events = [line for line in response.text.splitlines() if line.startswith("event:")]
+        self.assertEqual(events, ["event: router", "event: error"])
+        self.assertIn("vector store unavailable", response.text)
+        # The workflow slot is released
+        self.assertEqual(self.service.limiter.in_flight, 0)
+
+    def test_list_documents(self):
+        self.mock_doc_loader.get_available_documents.return_value = ["manual.pdf"]
+
+        response = self.client.get("/documents")
+
+        self.assertEqual(response.json(), {"documents": ["manual.pdf"]})
+
+    def test_upload_document_is_queued(self):
+        self.mock_doc_loader.save_pdf_bytes.return_value = "documents/manual.pdf"
+        self.mock_ingestion_queue.enqueue.return_value.model_dump.return_value = {"id": "job1", "status": "queued"}
+
+        response = self.client.post("/documents", files={"file": ("manual.pdf", b"%PDF-1.4", "application/pdf")})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {"id": "job1", "status": "queued"})
+        self.mock_ingestion_queue.enqueue.assert_called_once_with("documents/manual.pdf", "")
+        self.mock_vector_store.add_documents.assert_not_called()
+
+    def test_upload_document_for_tenant(self):
+        self.mock_doc_loader.save_pdf_bytes.return_value = "documents/tenants/acme/manual.pdf"
+        self.mock_ingestion_queue.enqueue.return_value.model_dump.return_value = {"id": "job1", "status": "queued"}
+
+        response = self.client.post(
+            "/documents",
+            files={"file": ("manual.pdf", b"%PDF-1.4", "application/pdf")},
+            data={"tenant_id": "acme"}
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.mock_doc_loader.save_pdf_bytes.assert_called_once_with("manual.pdf", b"%PDF-1.4", "acme")
+        self.mock_ingestion_queue.enqueue.assert_called_once_with("documents/tenants/acme/manual.pdf", "acme")
+
+    def test_invalid_tenant_is_rejected(self):
+        response = self.client.post("/documents", files={"file": ("manual.pdf", b"%PDF-1.4", "application/pdf")},
+                                    data={"tenant_id": "../acme"})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post("/query", json={"query": "What is LangChain?", "tenant_id": "a b"})
+        self.assertEqual(response.status_code, 422)
+
+    def _admin_client(self):
+        return TestClient(create_app(self.service, admin_token="secret"), headers={"Authorization": "Bearer secret"})
+
+    def test_snapshot_download(self):
+        def export(vector_store, path, queue):
+            with open(path, "wb") as f:
+                f.write(b"archive")
+
+        with patch("api.server.export_snapshot", side_effect=export) as mock_export:
+            response = self._admin_client().get("/snapshot")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"archive")
+        self.assertIs(mock_export.call_args.args[0], self.mock_vector_store)
+
+    def test_snapshot_restore(self):
+        with patch("api.server.import_snapshot", return_value={"points": 3}) as mock_import:
+            response = self._admin_client().post("/snapshot", files={"file": ("index.snapshot.tar.gz", b"archive", "application/gzip")})
+
+        self.assertEqual(response.json(), {"points": 3})
+        self.assertIs(mock_import.call_args.args[2], self.mock_ingestion_queue)
+        self.assertFalse(mock_import.call_args.kwargs["allow_model_mismatch"])
+
+    def test_incompatible_snapshot_is_rejected(self):
+        with patch("api.server.import_snapshot", side_effect=SnapshotError("dimension mismatch")):
+            response = self._admin_client().post("/snapshot", files={"file": ("index.snapshot.tar.gz", b"archive", "application/gzip")})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "dimension mismatch")
+
+    def test_snapshot_endpoints_need_the_admin_token(self):
+        with patch("api.server.export_snapshot") as mock_export, patch("api.server.import_snapshot") as mock_import:
+            # Disabled without SERVER_ADMIN_TOKEN
+            self.assertEqual(self.client.get("/snapshot").status_code, 404)
+
+            client = TestClient(create_app(self.service, admin_token="secret"))
+            self.assertEqual(client.get("/snapshot").status_code, 401)
+            response = client.post("/snapshot", files={"file": ("index.snapshot.tar.gz", b"archive", "application/gzip")},
+                                   headers={"Authorization": "Bearer wrong"})
+            self.assertEqual(response.status_code, 401)
+
+        mock_export.assert_not_called()
+        mock_import.assert_not_called()
+
+    def test_get_unknown_job(self):
+        self.mock_ingestion_queue.get.return_value = None
+
+        response = self.client.get("/documents/jobs/missing")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_upload_rejects_non_pdf(self):
+        response = self.client.post("/documents", files={"file": ("notes.txt", b"hello", "text/plain")})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TestBatchingEmbeddings(unittest.TestCase):
+
+    def test_concurrent_queries_are_batched(self):
+        mock_embeddings = MagicMock()
+        mock_embeddings.embed_documents.side_effect = lambda texts, **kwargs: [[float(len(t))] for t in texts]
+        batching = BatchingEmbeddings(mock_embeddings, max_batch_size=8, max_wait_ms=50)
+
+        results = {}
+        def worker(text):
+            results[text] = batching.embed_query(text)
+
+        threads = [threading.Thread(target=worker, args=("x" * n,)) for n in range(1, 7)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Every caller gets its own vector back, from fewer upstream calls than callers
+        self.assertEqual(results["xxx"], [3.0])
+        self.assertEqual(len(results), 6)
+        self.assertLess(mock_embeddings.embed_documents.call_count, 6)
+
+    def test_errors_propagate_to_callers(self):
+        mock_embeddings = MagicMock()
+        mock_embeddings.embed_documents.side_effect = RuntimeError("quota exceeded")
+        batching = BatchingEmbeddings(mock_embeddings, max_wait_ms=1)
+
+        with self.assertRaises(RuntimeError):
+            batching.embed_query("hello")
@@ -0,0 +1,156 @@
+import unittest
+import io
+import json
+import os
+import tarfile
+import tempfile
+from langchain.schema import Document
+from benchmarks.fakes import FakeEmbeddings, local_qdrant_client
+from models.vector_store import CollectionConfig, VectorStore
+from utils.ingestion_queue import IngestionQueue, DONE
+from utils.snapshot import SnapshotError, export_snapshot, import_snapshot
+
+def build_store(config, embeddings=None, name="docs"):
+    embeddings = embeddings or FakeEmbeddings(dimension=64, call_latency=0, text_latency=0)
+    return VectorStore(collection_name=name, client=local_qdrant_client(), embeddings=embeddings, config=config)
+
+def documents(tenant, n):
+    return [Document(page_content=f"{tenant} manual section {i}", metadata={"source": f"{tenant}.pdf", "page": i}) for i in range(n)]
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "index.snapshot.tar.gz")
+        self.config = CollectionConfig(dimension=64)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip_without_embedding(self):
+        source = build_store(self.config)
+        source.add_documents(documents("manual", 5))
+        queue = IngestionQueue(os.path.join(self.tmpdir.name, "source.db"))
+        pdf_path = os.path.join(self.tmpdir.name, "manual.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 manual")
+        job = queue.enqueue(pdf_path)
+        queue.claim("w1")
+        queue.complete(job.id, "w1")
+
+        manifest = export_snapshot(source, self.path, queue, part_points=2)
+
+        self.assertEqual(manifest["embedding"]["dimension"], 64)
+        self.assertEqual(manifest["collections"], [{"tenant": None, "points": 5}])
+
+        embeddings = FakeEmbeddings(dimension=64, call_latency=0, text_latency=0)
+        target = build_store(self.config, embeddings, name="replica")
+        target_queue = IngestionQueue(os.path.join(self.tmpdir.name, "target.db"))
+        stats = import_snapshot(target, self.path, target_queue, batch_size=2)
+
+        self.assertEqual(stats["points"], 5)
+        self.assertEqual(stats["documents"], 1)
+        self.assertEqual(stats["jobs_restored"], 1)
+        self.assertEqual(embeddings.calls, 0)
+        self.assertEqual(target.client.count("replica").count, 5)
+        self.assertEqual(
+            target.similarity_search("manual section 3", k=1)[0].page_content,
+            source.similarity_search("manual section 3", k=1)[0].page_content
+        )
+        self.assertEqual(target.similarity_search("manual section 3", k=1)[0].metadata["page"], 3)
+        # The restored job makes a re-upload of the same PDF a no-op
+        self.assertEqual(target_queue.enqueue(pdf_path).status, DONE)
+
+    def test_dedicated_tenant_collections_are_restored(self):
+        config = CollectionConfig(dimension=64, multi_tenant=True, tenant_promotion_points=3)
+        source = build_store(config)
+        source.add_documents(documents("small", 2), tenant_id="small")
+        source.add_documents(documents("big", 4), tenant_id="big")
+
+        manifest = export_snapshot(source, self.path)
+        self.assertEqual([entry["tenant"] for entry in manifest["collections"]], [None, "big"])
+
+        target = build_store(config)
+        import_snapshot(target, self.path)
+
+        self.assertEqual(target.route("big")[0], "docs__big")
+        self.assertEqual(len(target.similarity_search("manual", k=10, tenant_id="big")), 4)
+        self.assertEqual(len(target.similarity_search("manual", k=10, tenant_id="small")), 2)
+
+    def test_incompatible_dimension_is_rejected(self):
+        source = build_store(self.config)
+        source.add_documents(documents("manual", 2))
+        export_snapshot(source, self.path)
+
+        target = build_store(CollectionConfig(dimension=32), FakeEmbeddings(dimension=32, call_latency=0))
+        with self.assertRaises(SnapshotError):
+            import_snapshot(target, self.path)
+        self.assertEqual(target.client.count("docs").count, 0)
+
+    def test_model_mismatch_needs_opt_in(self):
+        source = build_store(self.config)
+        source.add_documents(documents("manual", 2))
+        archive = io.BytesIO()
+        manifest = export_snapshot(source, archive)
+
+        # Rewrite the archive as if another embedding model had produced it
+        archive.seek(0)
+        rewritten = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="r:gz") as src, tarfile.open(fileobj=rewritten, mode="w:gz") as dst:
+            for member in src.getmembers():
+                data = src.extractfile(member).read()
+                if member.name == "manifest.json":
+                    data = json.dumps({**manifest, "embedding": {**manifest["embedding"], "model": "other-model"}}).encode()
+                    member.size = len(data)
+                dst.addfile(member, io.BytesIO(data))
+
+        target = build_store(self.config)
+        rewritten.seek(0)
+        with self.assertRaises(SnapshotError):
+            import_snapshot(target, rewritten)
+        rewritten.seek(0)
+        self.assertEqual(import_snapshot(target, rewritten, allow_model_mismatch=True)["points"], 2)
+
+    def test_not_a_snapshot(self):
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+            tar.addfile(tarfile.TarInfo("readme.txt"), io.BytesIO(b""))
+        archive.seek(0)
+
+        with self.assertRaises(SnapshotError):
+            import_snapshot(build_store(self.config), archive)
+
+    def test_tampered_members_are_rejected(self):
+        source = build_store(self.config)
+        source.add_documents(documents("manual", 2))
+        archive = io.BytesIO()
+        manifest = export_snapshot(source, archive)
+        archive.seek(0)
+        with tarfile.open(fileobj=archive, mode="r:gz") as tar:
+            members = {member.name: tar.extractfile(member).read() for member in tar.getmembers()}
+
+        def build(extra):
+            rewritten = io.BytesIO()
+            with tarfile.open(fileobj=rewritten, mode="w:gz") as tar:
+                for name, data in [("manifest.json", members["manifest.json"]), *extra]:
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+            rewritten.seek(0)
+            return rewritten
+
+        point = members["points/000/000000.jsonl"]
+        for extra in (
+            [("points/007/000000.jsonl", point)],
+            [("points/x/000000.jsonl", point)],
+            [("../escape.jsonl", point)],
+            [("points/000/000000.jsonl", b'{"id": 1, "vector": "not base64!"}\n')],
+            [("documents.json", b"{not json")],
+        ):
+            with self.assertRaises(SnapshotError):
+                import_snapshot(build_store(self.config, name="target"), build(extra))
+
+        bad_manifest = json.dumps({**manifest, "collections": [{"tenant": "../acme"}]}).encode()
+        members["manifest.json"] = bad_manifest
+        with self.assertRaises(SnapshotError):
+            import_snapshot(build_store(CollectionConfig(dimension=64), name="target"), build([]))
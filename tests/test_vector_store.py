@@ -0,0 +1,232 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import math
+from langchain.schema import Document
+from qdrant_client.http import models as rest
+from models.embedding import TruncatedEmbeddings
+from models.vector_store import VectorStore, CollectionConfig, tenant_context
+
+class TestVectorStore(unittest.TestCase):
+
+    def setUp(self):
+        # Mock the LangChain Qdrant wrapper
+        self.qdrant_patch = patch('models.vector_store.Qdrant')
+        self.mock_qdrant_class = self.qdrant_patch.start()
+        self.mock_vectorstore = self.mock_qdrant_class.return_value
+
+        self.mock_client = MagicMock()
+        self.mock_client.get_collections.return_value.collections = []
+        self.mock_embeddings = MagicMock()
+
+    def tearDown(self):
+        self.qdrant_patch.stop()
+
+    def test_default_collection(self):
+        VectorStore(collection_name="docs", client=self.mock_client, embeddings=self.mock_embeddings, config=CollectionConfig())
+
+        kwargs = self.mock_client.create_collection.call_args.kwargs
+        self.assertEqual(kwargs["vectors_config"].size, 768)
+        self.assertEqual(kwargs["vectors_config"].distance, rest.Distance.COSINE)
+        self.assertIsNone(kwargs["quantization_config"])
+        self.mock_client.create_payload_index.assert_not_called()
+
+    def test_quantized_collection(self):
+        config = CollectionConfig(
+            quantization="scalar",
+            on_disk_vectors=True,
+            payload_indexes=["metadata.source"]
+        )
+
+        store = VectorStore(collection_name="docs", client=self.mock_client, embeddings=self.mock_embeddings, config=config)
+
+        kwargs = self.mock_client.create_collection.call_args.kwargs
+        self.assertTrue(kwargs["vectors_config"].on_disk)
+        self.assertEqual(kwargs["quantization_config"].scalar.type, rest.ScalarType.INT8)
+        self.mock_client.create_payload_index.assert_called_once()
+        self.assertEqual(self.mock_client.create_payload_index.call_args.kwargs["field_name"], "metadata.source")
+
+        # Searches rescore the quantized candidates
+        store.similarity_search("What is LangChain?")
+        search_params = self.mock_vectorstore.similarity_search.call_args.kwargs["search_params"]
+        self.assertTrue(search_params.quantization.rescore)
+
+    def test_multi_tenant_collection(self):
+        config = CollectionConfig(multi_tenant=True, payload_indexes=["metadata.tenant_id"])
+
+        VectorStore(collection_name="docs", client=self.mock_client, embeddings=self.mock_embeddings, config=config)
+
+        kwargs = self.mock_client.create_collection.call_args.kwargs
+        self.assertEqual(kwargs["hnsw_config"].payload_m, 16)
+        self.assertEqual(kwargs["hnsw_config"].m, 0)
+        # The tenant field is indexed once, as the tenant key
+        self.mock_client.create_payload_index.assert_called_once()
+        index = self.mock_client.create_payload_index.call_args.kwargs
+        self.assertEqual(index["field_name"], "metadata.tenant_id")
+        self.assertTrue(index["field_schema"].is_tenant)
+
+    def test_existing_collection_is_not_recreated(self):
+        existing = MagicMock()
+        existing.name = "docs"
+        self.mock_client.get_collections.return_value.collections = [existing]
+
+        VectorStore(collection_name="docs", client=self.mock_client, embeddings=self.mock_embeddings, config=CollectionConfig())
+
+        self.mock_client.create_collection.assert_not_called()
+
+    def test_reduced_dimension_truncates_embeddings(self):
+        store = VectorStore(
+            collection_name="docs",
+            client=self.mock_client,
+            embeddings=self.mock_embeddings,
+            config=CollectionConfig(dimension=256)
+        )
+
+        self.assertIsInstance(store.embeddings, TruncatedEmbeddings)
+        self.assertEqual(self.mock_client.create_collection.call_args.kwargs["vectors_config"].size, 256)
+
+    def test_compact_payload_metadata(self):
+        store = VectorStore(
+            collection_name="docs",
+            client=self.mock_client,
+            embeddings=self.mock_embeddings,
+            config=CollectionConfig(payload_metadata_fields=["source", "page"])
+        )
+        doc = Document(page_content="text", metadata={"source": "a.pdf", "page": 1, "producer": "PyPDF"})
+
+        store.add_documents([doc])
+
+        stored = self.mock_vectorstore.add_documents.call_args.args[0][0]
+        self.assertEqual(stored.metadata, {"source": "a.pdf", "page": 1})
+
+    def test_from_env(self):
+        env = {"QDRANT_QUANTIZATION": "binary", "QDRANT_VECTOR_DIMENSION": "512", "QDRANT_PAYLOAD_INDEXES": "metadata.source, metadata.tenant_id"}
+        with patch.dict('os.environ', env):
+            config = CollectionConfig.from_env()
+
+        self.assertEqual(config.quantization, "binary")
+        self.assertEqual(config.dimension, 512)
+        self.assertEqual(config.payload_indexes, ["metadata.source", "metadata.tenant_id"])
+        self.assertIsInstance(config.quantization_config(), rest.BinaryQuantization)
+
+    def test_unknown_quantization(self):
+        with self.assertRaises(ValueError):
+            CollectionConfig(quantization="pq").quantization_config()
+
+
+class TestTruncatedEmbeddings(unittest.TestCase):
+
+    def test_truncates_and_normalizes(self):
+        mock_embeddings = MagicMock()
+        mock_embeddings.embed_query.return_value = [3.0, 4.0, 12.0]
+
+        vector = TruncatedEmbeddings(mock_embeddings, 2).embed_query("hello")
+
+        self.assertEqual(len(vector), 2)
+        self.assertAlmostEqual(math.hypot(*vector), 1.0)
+        self.assertAlmostEqual(vector[0], 0.6)
+
+
+class TestMultiTenantVectorStore(unittest.TestCase):
+
+    def setUp(self):
+        from benchmarks.fakes import FakeEmbeddings, local_qdrant_client
+        self.client = local_qdrant_client()
+        self.config = CollectionConfig(dimension=64, multi_tenant=True, tenant_promotion_points=5)
+        self.store = VectorStore(
+            collection_name="docs",
+            client=self.client,
+            embeddings=FakeEmbeddings(dimension=64, call_latency=0, text_latency=0),
+            config=self.config
+        )
+
+    def _docs(self, tenant, n):
+        return [Document(page_content=f"{tenant} manual section {i}", metadata={"source": f"{tenant}.pdf"}) for i in range(n)]
+
+    def test_searches_are_isolated_per_tenant(self):
+        self.assertTrue(self.store.add_documents(self._docs("acme", 2), tenant_id="acme"))
+        with tenant_context("globex"):
+            self.assertTrue(self.store.add_documents(self._docs("globex", 2)))
+
+        results = self.store.similarity_search("manual section", k=10, tenant_id="acme")
+        self.assertEqual({doc.metadata["tenant_id"] for doc in results}, {"acme"})
+        with tenant_context("globex"):
+            self.assertEqual(len(self.store.similarity_search("manual section", k=10)), 2)
+        self.assertEqual(self.store.similarity_search("manual section", k=10, tenant_id="initech"), [])
+
+    def test_large_tenant_is_promoted(self):
+        self.store.add_documents(self._docs("small", 2), tenant_id="small")
+        self.store.add_documents(self._docs("big", 3), tenant_id="big")
+        self.assertEqual(self.store.route("big"), ("docs", self.store._tenant_filter("big")))
+
+        self.store.add_documents(self._docs("big", 6)[3:], tenant_id="big")
+
+        collection, tenant_filter = self.store.route("big")
+        self.assertEqual(collection, "docs__big")
+        self.assertIsNone(tenant_filter)
+        self.assertEqual(self.client.count("docs__big").count, 6)
+        # Processes with a cached route still search the shared collection, so the points stay there for now
+        self.assertEqual(self.store.tenant_point_count("big"), 6)
+        self.assertEqual(len(self.store.similarity_search("manual section", k=10, tenant_id="big")), 6)
+        self.assertEqual(len(self.store.similarity_search("manual section", k=10, tenant_id="small")), 2)
+        self.assertFalse(self.store.promote_tenant("big"))
+
+        # Another store instance picks the promotion up from the collection aliases
+        other = VectorStore(collection_name="docs", client=self.client, embeddings=self.store.embeddings, config=self.config)
+        self.assertEqual(other.route("big")[0], "docs__big")
+
+        # Before the route TTL has passed, writes leave the shared copies alone
+        self.store.add_documents(self._docs("big", 7)[6:], tenant_id="big")
+        self.assertEqual(self.store.tenant_point_count("big"), 6)
+
+    def test_shared_copies_are_swept_after_the_route_ttl(self):
+        with patch('models.vector_store.QDRANT_TENANT_ROUTE_TTL', 0.2):
+            # The upload that promotes the tenant is its last one
+            self.store.add_documents(self._docs("big", 6), tenant_id="big")
+            self.assertEqual(self.store.route("big")[0], "docs__big")
+            # A process that routed to the shared collection just before the alias switch
+            self.store._store("docs").add_documents(
+                [Document(page_content="late chunk", metadata={"source": "big.pdf", "tenant_id": "big"})]
+            )
+            self.assertEqual(self.store.tenant_point_count("big"), 7)
+
+            self.store._sweeps["big"].join(5)
+
+        self.assertEqual(self.store.tenant_point_count("big"), 0)
+        self.assertEqual(self.client.count("docs__big").count, 7)
+        self.assertEqual(len(self.store.similarity_search("manual section", k=10, tenant_id="big")), 7)
+
+    def test_search_sweeps_tenants_promoted_elsewhere(self):
+        # Promoted by another process: this store only learns about it from the aliases
+        self.store.create_dedicated_collection("acme")
+        self.store._store("docs").add_documents(
+            [Document(page_content="acme manual", metadata={"source": "acme.pdf", "tenant_id": "acme"})]
+        )
+
+        self.store.similarity_search("manual", tenant_id="acme")
+        self.store._sweeps["acme"].join(5)
+
+        self.assertEqual(self.store.tenant_point_count("acme"), 0)
+        self.assertEqual(self.client.count("docs__acme").count, 1)
+
+    def test_second_promotion_pass_copies_only_new_points(self):
+        self.store.add_documents(self._docs("big", 4), tenant_id="big")
+
+        with patch.object(self.client, "upsert", wraps=self.client.upsert) as upsert:
+            self.assertTrue(self.store.promote_tenant("big"))
+
+        self.assertEqual(sum(len(call.kwargs["points"]) for call in upsert.call_args_list), 4)
+        self.assertEqual(self.client.count("docs__big").count, 4)
+
+    def test_invalid_tenant_is_rejected(self):
+        self.assertFalse(self.store.add_documents(self._docs("acme", 1), tenant_id="../acme"))
+        with self.assertRaises(ValueError):
+            self.store.route("acme corp")
+
+    def test_single_tenant_store_ignores_tenants(self):
+        store = VectorStore(collection_name="plain", client=self.client, embeddings=self.store.embeddings,
+                            config=CollectionConfig(dimension=64))
+
+        store.add_documents(self._docs("acme", 2), tenant_id="acme")
+
+        self.assertEqual(store.route("acme"), ("plain", None))
+        self.assertNotIn("tenant_id", store.similarity_search("manual", k=1)[0].metadata)
@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from agents.weather_agent import WeatherAgent
+from utils.api_handler import WeatherAPIHandler
+from utils.weather_templates import condition_group, needs_reasoning, render_weather_response
+
+SAMPLE_WEATHER = {
+    "name": "London",
+    "sys": {"country": "GB"},
+    "main": {"temp": 15.5, "feels_like": 14.8, "humidity": 76},
+    "weather": [{"id": 802, "description": "scattered clouds"}],
+    "wind": {"speed": 3.6}
+}
+
+class TestWeatherAgent(unittest.TestCase):
+
+    def setUp(self):
+        # Mock the LLM chains and the weather API
+        self.llm_patch = patch('agents.weather_agent.ChatGoogleGenerativeAI')
+        self.mock_llm_class = self.llm_patch.start()
+        self.mock_weather_api = MagicMock()
+        self.mock_weather_api.get_weather.return_value = SAMPLE_WEATHER
+
+        self.agent = WeatherAgent(api_key="test_api_key", weather_api=self.mock_weather_api)
+        self.agent.response_chain = MagicMock()
+        self.agent.response_chain.invoke.return_value.content = "Bring an umbrella just in case."
+
+    def tearDown(self):
+        self.llm_patch.stop()
+
+    def test_client_retries_are_left_to_the_admission_controller(self):
+        self.assertEqual(self.mock_llm_class.call_args.kwargs["max_retries"], 1)
+
+    def test_factual_query_uses_template(self):
+        result = self.agent.get_weather_response("What's the weather in London?", city="London")
+
+        self.agent.response_chain.invoke.assert_not_called()
+        self.assertEqual(result["response_mode"], "template")
+        self.assertIn("15.5°C", result["response"])
+        self.assertIn("scattered clouds", result["response"])
+
+    def test_reasoning_query_uses_llm(self):
+        result = self.agent.get_weather_response("Should I bring an umbrella in London?", city="London")
+
+        self.agent.response_chain.invoke.assert_called_once()
+        self.assertEqual(result["response_mode"], "llm")
+        self.assertEqual(result["response"], "Bring an umbrella just in case.")
+
+    def test_errors_skip_llm(self):
+        self.mock_weather_api.get_weather.return_value = {"error": "City Atlantis not found"}
+
+        result = self.agent.get_weather_response("Should I bring a coat in Atlantis?", city="Atlantis")
+
+        self.agent.response_chain.invoke.assert_not_called()
+        self.assertIn("Atlantis", result["response"])
+
+    def test_llm_mode(self):
+        self.agent.response_mode = "llm"
+
+        result = self.agent.get_weather_response("What's the weather in London?", city="London")
+
+        self.agent.response_chain.invoke.assert_called_once()
+        self.assertEqual(result["response_mode"], "llm")
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            WeatherAgent(api_key="test_api_key", weather_api=self.mock_weather_api, response_mode="fast")
+
+
+class TestWeatherTemplates(unittest.TestCase):
+
+    def test_localized_units(self):
+        self.assertIn("59.9°F", render_weather_response(SAMPLE_WEATHER, "en_US"))
+        self.assertIn("8.1 mph", render_weather_response(SAMPLE_WEATHER, "en-US"))
+
+        french = render_weather_response(SAMPLE_WEATHER, "fr")
+        self.assertIn("15,5°C", french)
+        self.assertIn("quelques nuages", french)
+
+    def test_variants_are_deterministic(self):
+        first = render_weather_response(SAMPLE_WEATHER, "en", variant="weather in London")
+        self.assertEqual(first, render_weather_response(SAMPLE_WEATHER, "en", variant="weather in London"))
+
+        answers = {render_weather_response(SAMPLE_WEATHER, "en", variant=f"query {i}") for i in range(20)}
+        self.assertGreater(len(answers), 1)
+
+    def test_error_cases(self):
+        self.assertIn("Paris", render_weather_response({"error": "City Paris not found"}, "en", "Paris"))
+        self.assertIn("weather service", render_weather_response({"error": "Request Error: timeout"}, "en"))
+        self.assertIn("incomplete", render_weather_response({"name": "London", "main": {}}, "en"))
+        # Unknown locales fall back to English
+        self.assertIn("couldn't find", render_weather_response({"error": "City X not found"}, "pt", "X"))
+
+    def test_not_found_from_the_api_handler(self):
+        response = requests.Response()
+        response.status_code = 404
+        response.reason = "Not Found"
+        response.url = "https://api.openweathermap.org/data/2.5/weather?q=Atlantis"
+
+        with patch("utils.api_handler.requests.get", return_value=response):
+            weather_data = WeatherAPIHandler(api_key="test_api_key").get_weather("Atlantis")
+
+        self.assertEqual(weather_data, {"error": "City Atlantis not found"})
+        self.assertIn("couldn't find", render_weather_response(weather_data, "en", "Atlantis"))
+        # Raw HTTP errors for a 404 are still recognised
+        raw = {"error": "HTTP Error: 404 Client Error: Not Found for url: https://api.openweathermap.org"}
+        self.assertIn("couldn't find", render_weather_response(raw, "en", "Atlantis"))
+
+    def test_condition_group(self):
+        self.assertEqual(condition_group({"id": 500}), "rain")
+        self.assertEqual(condition_group({"id": 800}), "clear")
+        self.assertEqual(condition_group({"description": "light snow"}), "snow")
+
+    def test_needs_reasoning(self):
+        self.assertTrue(needs_reasoning("Should I bring an umbrella?"))
+        self.assertTrue(needs_reasoning("Do I need a jacket in Oslo?"))
+        self.assertFalse(needs_reasoning("What's the weather in Paris?"))
+        self.assertFalse(needs_reasoning("How hot is it in Rome right now?"))
@@ -30,7 +30,8 @@ class WeatherAPIHandler:
             return response.json()
         
         except requests.exceptions.HTTPError as e:
-            status_code = e.response.status_code if e.response else None
+            # A 4xx/5xx Response is falsy, so compare against None
+            status_code = e.response.status_code if e.response is not None else None
             if status_code == 404:
                 return {"error": f"City {city} not found"}
             return {"error": f"HTTP Error: {str(e)}"}
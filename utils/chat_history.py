@@ -0,0 +1,166 @@
+from typing import Any, Dict, List, Optional
+import json
+import sqlite3
+import threading
+import time
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+CHAT_DB_PATH = os.getenv("CHAT_DB_PATH", "chat_history.db")
+CHAT_HISTORY_TTL = float(os.getenv("CHAT_HISTORY_TTL", str(7 * 24 * 3600)))
+CHAT_PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", "20"))
+# Cap on the transcript tail kept in Streamlit session state; older turns are read back from CHAT_DB_PATH
+CHAT_SESSION_MAX_MESSAGES = int(os.getenv("CHAT_SESSION_MAX_MESSAGES", "40"))
+CHAT_SESSION_MAX_BYTES = int(os.getenv("CHAT_SESSION_MAX_BYTES", str(64 * 1024)))
+
+
+def debug_payload(result: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a workflow result shown under "Debug Information" """
+    return {
+        "action": result.get("action", ""),
+        "city": result.get("city", ""),
+        "context": result.get("context", []),
+        "weather_data": result.get("weather_data", {}),
+        "evaluation": result.get("evaluation", {}),
+        "profile": result.get("profile"),
+    }
+
+
+class ChatStore:
+    """Chat transcripts and their debug payloads in SQLite, shared by all sessions of a server.
+
+    Session state only keeps a bounded tail of each transcript; older turns and
+    the (large) debug payloads are read from here when they are displayed.
+    """
+
+    def __init__(self, db_path: str = CHAT_DB_PATH, ttl: float = CHAT_HISTORY_TTL):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    debug TEXT,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS messages_created ON messages (created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, session_id: str, seq: int, role: str, content: str, debug: Optional[Dict[str, Any]] = None) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO messages (session_id, seq, role, content, debug, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (session_id, seq, role, content, json.dumps(debug, default=str) if debug is not None else None, time.time())
+        )
+
+    def messages(self, session_id: str, before_seq: int, limit: int) -> List[Dict[str, Any]]:
+        """Up to ``limit`` messages preceding ``before_seq``, oldest first, without debug payloads"""
+        rows = self._connect().execute(
+            "SELECT seq, role, content, debug IS NOT NULL FROM messages "
+            "WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (session_id, before_seq, limit)
+        ).fetchall()
+        return [
+            {"seq": seq, "role": role, "content": content, "has_debug": bool(has_debug)}
+            for seq, role, content, has_debug in reversed(rows)
+        ]
+
+    def debug(self, session_id: str, seq: int) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT debug FROM messages WHERE session_id = ? AND seq = ?", (session_id, seq)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def prune(self) -> int:
+        """Delete transcripts older than the TTL; returns the number of messages removed"""
+        return self._connect().execute(
+            "DELETE FROM messages WHERE created_at <= ?", (time.time() - self.ttl,)
+        ).rowcount
+
+
+class ChatSession:
+    """One browser session's transcript as kept in session state: a bounded tail plus a paging window.
+
+    ``recent`` holds at most ``max_messages`` messages and about ``max_bytes`` of
+    content; everything is also written to the store, which serves older pages
+    when the user asks for them.
+    """
+
+    def __init__(
+        self,
+        store: ChatStore,
+        session_id: str,
+        page_size: int = CHAT_PAGE_SIZE,
+        max_messages: int = CHAT_SESSION_MAX_MESSAGES,
+        max_bytes: int = CHAT_SESSION_MAX_BYTES
+    ):
+        self.store = store
+        self.session_id = session_id
+        self.page_size = page_size
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.recent: List[Dict[str, Any]] = []
+        self.total = 0
+        self.visible = page_size
+        self._recent_bytes = 0
+
+    @staticmethod
+    def _size(message: Dict[str, Any]) -> int:
+        return len(message["content"].encode()) + 64
+
+    def add(self, role: str, content: str, debug: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record a message; its debug payload goes to the store only"""
+        message = {"seq": self.total, "role": role, "content": content, "has_debug": debug is not None}
+        self.store.append(self.session_id, message["seq"], role, content, debug)
+        self.total += 1
+        self.recent.append(message)
+        self._recent_bytes += self._size(message)
+        while len(self.recent) > 1 and (len(self.recent) > self.max_messages or self._recent_bytes > self.max_bytes):
+            self._recent_bytes -= self._size(self.recent.pop(0))
+        return message
+
+    def has_older(self) -> bool:
+        return self.total > self.visible
+
+    def show_older(self) -> None:
+        """Widen the window by one page"""
+        self.visible += self.page_size
+
+    def reset_window(self) -> None:
+        self.visible = self.page_size
+
+    def visible_messages(self) -> List[Dict[str, Any]]:
+        """The last ``visible`` messages, reading the part older than the tail from the store"""
+        wanted = min(self.visible, self.total)
+        if wanted <= len(self.recent):
+            return self.recent[len(self.recent) - wanted:]
+        first_seq = self.recent[0]["seq"] if self.recent else self.total
+        return self.store.messages(self.session_id, first_seq, wanted - len(self.recent)) + self.recent
+
+    def debug(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fetch a message's debug payload from the store"""
+        if not message.get("has_debug"):
+            return None
+        return self.store.debug(self.session_id, message["seq"])
+
+    def size_bytes(self) -> int:
+        """Approximate session-state footprint of the transcript"""
+        return self._recent_bytes
@@ -0,0 +1,256 @@
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import re
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+DOCUMENT_CHUNKER = os.getenv("DOCUMENT_CHUNKER", "structure")
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "64"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "48"))
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+_NUMBERED_HEADING_RE = re.compile(r"^(\d+(?:\.\d+)*)\.?\s+([A-Z].{0,78})$")
+_TABLE_ROW_RE = re.compile(r"\S(?: {2,}|\t|\s\|\s)\S.*(?: {2,}|\t|\s\|\s)\S")
+
+
+def approximate_token_count(text: str) -> int:
+    """Estimate subword tokens: one per punctuation mark or short word, one more per extra five characters"""
+    return sum((len(piece) + 4) // 5 for piece in _WORD_RE.findall(text))
+
+
+class _Block:
+    """A heading, paragraph or table recovered from page text"""
+    __slots__ = ("kind", "text", "page_start", "page_end", "level")
+
+    def __init__(self, kind: str, text: str, page: int, level: int = 0):
+        self.kind = kind
+        self.text = text
+        self.page_start = page
+        self.page_end = page
+        self.level = level
+
+
+def _heading_level(line: str) -> int:
+    """Return the heading level of a line, or 0 if it is not a heading"""
+    if len(line) > 80 or line.endswith((".", ",", ";", ":")):
+        return 0
+    match = _NUMBERED_HEADING_RE.match(line)
+    if match:
+        return match.group(1).count(".") + 1
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) >= 3 and line.isupper() and len(line.split()) <= 8:
+        return 1
+    return 0
+
+
+def parse_blocks(pages: List[Tuple[int, str]]) -> List[_Block]:
+    """Turn (page number, text) pairs into headings, paragraphs and tables.
+
+    Wrapped lines are joined back into paragraphs, a paragraph that runs over a
+    page break is kept whole, and consecutive column-aligned rows form a table.
+    """
+    blocks: List[_Block] = []
+    current: Optional[_Block] = None
+
+    for page, text in pages:
+        for raw_line in text.splitlines():
+            line = raw_line.strip()
+            if not line:
+                current = None
+                continue
+
+            # Column-aligned rows are checked first: an upper-case header row is not a heading
+            is_table_row = bool(_TABLE_ROW_RE.search(raw_line)) or "|" in line
+            level = 0 if is_table_row else _heading_level(line)
+            if level:
+                blocks.append(_Block("heading", line, page, level))
+                current = None
+            elif is_table_row:
+                if current is not None and current.kind == "table":
+                    current.text += "\n" + line
+                    current.page_end = page
+                else:
+                    current = _Block("table", line, page)
+                    blocks.append(current)
+            elif current is not None and current.kind == "paragraph":
+                current.text += " " + line
+                current.page_end = page
+            else:
+                current = _Block("paragraph", line, page)
+                blocks.append(current)
+
+        # A paragraph only continues onto the next page if it did not end a sentence
+        if current is not None and (current.kind != "paragraph" or current.text.endswith((".", "!", "?", ":"))):
+            current = None
+
+    return blocks
+
+
+class StructureAwareChunker:
+    """Token-sized chunker that respects sections, paragraphs and tables.
+
+    Sections are hard boundaries without overlap. A chunk that ends between
+    paragraphs carries no overlap either; only a chunk cut in the middle of a
+    paragraph repeats its last sentences, up to ``overlap_tokens``. Tables are
+    kept whole where they fit and otherwise split by rows, repeating the header.
+    Each chunk records its page span and section path.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = CHUNK_MAX_TOKENS,
+        min_tokens: int = CHUNK_MIN_TOKENS,
+        overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+        token_counter: Callable[[str], int] = approximate_token_count
+    ):
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = token_counter
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Chunk page documents (one per page, as produced by the PDF loader), grouped by source"""
+        chunks: List[Document] = []
+        groups: Dict[Any, List[Document]] = {}
+        for doc in documents:
+            groups.setdefault(doc.metadata.get("source"), []).append(doc)
+
+        for pages in groups.values():
+            base_metadata = {k: v for k, v in pages[0].metadata.items() if k not in ("page", "page_label")}
+            numbered = [(doc.metadata.get("page", i), doc.page_content) for i, doc in enumerate(pages)]
+            chunks.extend(self._chunk_blocks(parse_blocks(numbered), base_metadata))
+
+        return chunks
+
+    def _split_sentences(self, text: str) -> List[str]:
+        sentences = _SENTENCE_RE.split(text)
+        pieces = []
+        for sentence in sentences:
+            # A single sentence longer than a chunk is cut on word boundaries
+            if self.count_tokens(sentence) > self.max_tokens:
+                words, current = sentence.split(), []
+                for word in words:
+                    current.append(word)
+                    if self.count_tokens(" ".join(current)) >= self.max_tokens:
+                        pieces.append(" ".join(current))
+                        current = []
+                if current:
+                    pieces.append(" ".join(current))
+            else:
+                pieces.append(sentence)
+        return pieces
+
+    def _chunk_blocks(self, blocks: List[_Block], base_metadata: Dict[str, Any]) -> List[Document]:
+        chunks: List[Document] = []
+        section_path: List[Tuple[int, str]] = []
+
+        # Parts of the chunk being built: (text, tokens, page_start, page_end, is_heading)
+        parts: List[Tuple[str, int, int, int, bool]] = []
+        tokens = 0
+        chunk_section = ""
+
+        def flush(overlap: Optional[List[Tuple[str, int, int, int, bool]]] = None, final: bool = False):
+            nonlocal parts, tokens, chunk_section
+            # A heading is never left dangling at the end of a chunk; it moves to the next one,
+            # unless this is the last chunk, where it is emitted rather than lost
+            heading = parts.pop() if parts and parts[-1][4] and not overlap and not final else None
+            if parts:
+                metadata = dict(base_metadata)
+                metadata.update({
+                    "page": parts[0][2],
+                    "page_start": parts[0][2],
+                    "page_end": max(part[3] for part in parts),
+                    "section": chunk_section,
+                    "chunk_index": len(chunks),
+                    "tokens": sum(part[1] for part in parts),
+                })
+                chunks.append(Document(page_content="\n".join(part[0] for part in parts), metadata=metadata))
+            parts = list(overlap or [])
+            if heading:
+                parts.append(heading)
+            tokens = sum(part[1] for part in parts)
+            chunk_section = " > ".join(title for _, title in section_path)
+
+        def add(text: str, count: int, block: _Block, is_heading: bool = False):
+            nonlocal tokens
+            parts.append((text, count, block.page_start, block.page_end, is_heading))
+            tokens += count
+
+        def sentence_overlap(budget: int) -> List[Tuple[str, int, int, int, bool]]:
+            carried, carried_tokens = [], 0
+            for part in reversed(parts):
+                if part[4] or carried_tokens + part[1] > budget:
+                    break
+                carried.insert(0, part)
+                carried_tokens += part[1]
+            return carried
+
+        for block in blocks:
+            if block.kind == "heading":
+                # Small sections are merged into the next one rather than emitted as tiny chunks
+                if tokens >= self.min_tokens:
+                    flush()
+                while section_path and section_path[-1][0] >= block.level:
+                    section_path.pop()
+                section_path.append((block.level, block.text))
+                if not parts:
+                    chunk_section = " > ".join(title for _, title in section_path)
+                add(block.text, self.count_tokens(block.text), block, is_heading=True)
+                continue
+
+            count = self.count_tokens(block.text)
+
+            if block.kind == "table":
+                if tokens + count <= self.max_tokens:
+                    add(block.text, count, block)
+                    continue
+                flush()
+                if tokens + count <= self.max_tokens:
+                    add(block.text, count, block)
+                    continue
+                rows = block.text.split("\n")
+                header, header_tokens = rows[0], self.count_tokens(rows[0])
+                add(header, header_tokens, block)
+                for row in rows[1:]:
+                    row_tokens = self.count_tokens(row)
+                    if tokens + row_tokens > self.max_tokens:
+                        flush()
+                        add(header, header_tokens, block)
+                    add(row, row_tokens, block)
+                continue
+
+            # Paragraph: whole if it fits, otherwise sentence by sentence
+            if tokens + count <= self.max_tokens:
+                add(block.text, count, block)
+                continue
+            flush()
+            if tokens + count <= self.max_tokens:
+                add(block.text, count, block)
+                continue
+
+            for sentence in self._split_sentences(block.text):
+                sentence_tokens = self.count_tokens(sentence)
+                if tokens + sentence_tokens > self.max_tokens:
+                    # Cut inside the paragraph: repeat its trailing sentences in the next chunk
+                    flush(sentence_overlap(min(self.overlap_tokens, self.max_tokens - sentence_tokens)))
+                add(sentence, sentence_tokens, block)
+
+        flush(final=True)
+        return chunks
+
+
+def get_chunker(name: str = DOCUMENT_CHUNKER):
+    """Build a chunker by name: 'structure' (default) or the legacy character-based 'recursive'"""
+    if name == "structure":
+        return StructureAwareChunker()
+    if name == "recursive":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200,
+            length_function=len,
+        )
+    raise ValueError(f"Unknown chunker '{name}'")
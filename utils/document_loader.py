@@ -3,22 +3,22 @@ from typing import List, Dict, Any
 import tempfile
 from pathlib import Path
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
+from utils.chunking import get_chunker
+from utils.pdf_extraction import PDFExtractor
+from utils.profiling import annotate
 
 
 
 class DocumentLoader:
     """Handles loading and processing PDF documents"""
     
-    def __init__(self, document_dir: str = "documents"):
+    def __init__(self, document_dir: str = "documents", chunker=None, extractor: PDFExtractor = None):
         self.document_dir = document_dir
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
+        # Any object with split_documents(); see utils.chunking for the built-in chunkers
+        self.text_splitter = chunker or get_chunker()
+        # Backend (PDF_BACKEND) and per-page text cache; see utils.pdf_extraction
+        self.extractor = extractor or PDFExtractor()
         
         # Create documents directory if it doesn't exist
         os.makedirs(document_dir, exist_ok=True)
@@ -26,26 +26,39 @@ class DocumentLoader:
     def load_pdf(self, file_path: str) -> List[Document]:
         """Load and split a PDF document into chunks"""
         try:
-            loader = PyPDFLoader(file_path)
-            documents = loader.load()
-            return self.text_splitter.split_documents(documents)
+            with annotate("parse_pdf"):
+                documents = self.extractor.extract(file_path)
+            with annotate("chunk"):
+                return self.text_splitter.split_documents(documents)
         except Exception as e:
             print(f"Error loading PDF: {str(e)}")
             return []
     
-    def save_uploaded_pdf(self, uploaded_file) -> str:
+    def tenant_dir(self, tenant_id: str = None) -> str:
+        """Directory holding a tenant's PDFs; documents_dir itself without a tenant"""
+        if not tenant_id:
+            return self.document_dir
+        # Tenant ids are validated upstream; basename guards against traversal regardless
+        return os.path.join(self.document_dir, "tenants", os.path.basename(tenant_id))
+
+    def save_uploaded_pdf(self, uploaded_file, tenant_id: str = None) -> str:
         """Save an uploaded PDF file with its original name and return its path"""
+        return self.save_pdf_bytes(uploaded_file.name, uploaded_file.getvalue(), tenant_id)
+    
+    def save_pdf_bytes(self, filename: str, content: bytes, tenant_id: str = None) -> str:
+        """Save raw PDF bytes under the given filename and return its path"""
         try:
-            # Make sure document_dir exists
-            os.makedirs(self.document_dir, exist_ok=True)
+            # Make sure the (tenant) directory exists
+            directory = self.tenant_dir(tenant_id)
+            os.makedirs(directory, exist_ok=True)
 
             # Sanitize the original filename to prevent path traversal or special characters
-            safe_filename = os.path.basename(uploaded_file.name)
-            save_path = os.path.join(self.document_dir, safe_filename)
+            safe_filename = os.path.basename(filename)
+            save_path = os.path.join(directory, safe_filename)
 
             # Save file content
             with open(save_path, 'wb') as f:
-                f.write(uploaded_file.getvalue())
+                f.write(content)
 
             return save_path
         except Exception as e:
@@ -53,10 +66,13 @@ class DocumentLoader:
             return ""
 
     
-    def get_available_documents(self) -> List[str]:
-        """Get a list of available PDF documents"""
+    def get_available_documents(self, tenant_id: str = None) -> List[str]:
+        """Get a list of available PDF documents, optionally of one tenant"""
         try:
-            return [f for f in os.listdir(self.document_dir) if f.endswith('.pdf')]
+            directory = self.tenant_dir(tenant_id)
+            if not os.path.isdir(directory):
+                return []
+            return [f for f in os.listdir(directory) if f.endswith('.pdf')]
         except Exception as e:
             print(f"Error listing documents: {str(e)}")
             return []
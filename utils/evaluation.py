@@ -3,6 +3,7 @@ from langsmith import Client
 from langchain.smith import RunEvalConfig
 from langsmith.evaluation import run_evaluator
 from langchain_google_genai import ChatGoogleGenerativeAI
+from utils.rate_limiter import get_admission_controller, LoadShedError, BACKGROUND
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -40,6 +41,14 @@ class LangSmithEvaluator:
             ]
         )
         
+        try:
+            # Evaluation is background work: it queues behind interactive calls and is shed first
+            with get_admission_controller().admit(priority=BACKGROUND):
+                return self._run_evaluation(query, response, eval_config)
+        except LoadShedError as e:
+            return {"error": str(e)}
+    
+    def _run_evaluation(self, query: str, response: str, eval_config: RunEvalConfig) -> Dict[str, Any]:
         try:
             # Create dataset with single example
             dataset = self.client.create_dataset(
@@ -0,0 +1,294 @@
+from typing import Dict, Any, List, Optional
+import hashlib
+import sqlite3
+import threading
+import time
+import uuid
+from pydantic import BaseModel, Field
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+INGESTION_DB_PATH = os.getenv("INGESTION_DB_PATH", "ingestion_jobs.db")
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+INGESTION_LEASE_SECONDS = float(os.getenv("INGESTION_LEASE_SECONDS", "120"))
+INGESTION_RETRY_BACKOFF_SECONDS = float(os.getenv("INGESTION_RETRY_BACKOFF_SECONDS", "5"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+_JOBS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id TEXT PRIMARY KEY,
+        file_path TEXT NOT NULL,
+        file_hash TEXT NOT NULL,
+        tenant_id TEXT NOT NULL DEFAULT '',
+        status TEXT NOT NULL,
+        progress REAL NOT NULL DEFAULT 0,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        chunks INTEGER NOT NULL DEFAULT 0,
+        error TEXT NOT NULL DEFAULT '',
+        worker_id TEXT,
+        available_at REAL NOT NULL,
+        lease_expires_at REAL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        UNIQUE (tenant_id, file_hash)
+    )
+"""
+
+
+class IngestionJob(BaseModel):
+    """A document ingestion job"""
+    id: str = Field(description="Job identifier")
+    file_path: str = Field(description="Path of the saved PDF")
+    file_hash: str = Field(description="SHA-256 of the file content, used for idempotency")
+    tenant_id: str = Field(description="Owning tenant; empty for single-tenant deployments", default="")
+    status: str = Field(description="One of 'queued', 'running', 'done' or 'failed'")
+    progress: float = Field(description="Fraction of chunks indexed, from 0 to 1", default=0.0)
+    attempts: int = Field(description="Number of times a worker has claimed the job", default=0)
+    chunks: int = Field(description="Number of chunks produced from the document", default=0)
+    error: str = Field(description="Last error message", default="")
+    created_at: float = Field(description="Enqueue time (epoch seconds)")
+    updated_at: float = Field(description="Last status change (epoch seconds)")
+
+
+def file_sha256(file_path: str) -> str:
+    """Hash a file in blocks so large PDFs are not read into memory at once"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionQueue:
+    """Persistent SQLite-backed queue of ingestion jobs shared by the app and the workers.
+
+    Workers claim jobs under a lease. A worker that dies stops renewing its lease,
+    and the job becomes claimable again once the lease expires.
+    """
+
+    def __init__(
+        self,
+        db_path: str = INGESTION_DB_PATH,
+        max_attempts: int = INGESTION_MAX_ATTEMPTS,
+        lease_seconds: float = INGESTION_LEASE_SECONDS,
+        retry_backoff_seconds: float = INGESTION_RETRY_BACKOFF_SECONDS
+    ):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute(_JOBS_SCHEMA.format(table="jobs"))
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if "tenant_id" not in columns:
+                self._migrate_tenant_column(conn, columns)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at)")
+
+    def _migrate_tenant_column(self, conn: sqlite3.Connection, columns: List[str]) -> None:
+        """Rebuild a queue created before tenants: idempotency moves from file_hash to (tenant_id, file_hash)"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(_JOBS_SCHEMA.format(table="jobs_migrated"))
+            names = ", ".join(columns)
+            conn.execute(f"INSERT INTO jobs_migrated ({names}) SELECT {names} FROM jobs")
+            conn.execute("DROP TABLE jobs")
+            conn.execute("ALTER TABLE jobs_migrated RENAME TO jobs")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets the app read status while workers write"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _to_job(self, row: Optional[sqlite3.Row]) -> Optional[IngestionJob]:
+        if row is None:
+            return None
+        return IngestionJob(**{key: row[key] for key in IngestionJob.model_fields})
+
+    def enqueue(self, file_path: str, tenant_id: str = "") -> IngestionJob:
+        """Queue a file for ingestion; re-enqueuing identical content for the same tenant returns the existing job"""
+        file_hash = file_sha256(file_path)
+        now = time.time()
+        conn = self._connect()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE tenant_id = ? AND file_hash = ?", (tenant_id, file_hash)).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO jobs (id, file_path, file_hash, tenant_id, status, available_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (uuid.uuid4().hex, file_path, file_hash, tenant_id, QUEUED, now, now, now)
+                )
+            elif row["status"] == FAILED:
+                # An explicit re-upload of a failed document gets a fresh set of attempts
+                conn.execute(
+                    "UPDATE jobs SET status = ?, file_path = ?, attempts = 0, progress = 0, error = '', "
+                    "available_at = ?, updated_at = ? WHERE id = ?",
+                    (QUEUED, file_path, now, now, row["id"])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return self._to_job(
+            conn.execute("SELECT * FROM jobs WHERE tenant_id = ? AND file_hash = ?", (tenant_id, file_hash)).fetchone()
+        )
+
+    def claim(self, worker_id: str) -> Optional[IngestionJob]:
+        """Atomically claim the oldest runnable job, including jobs whose lease has expired.
+
+        A job whose worker died on its last allowed attempt is marked failed
+        instead of being handed out again.
+        """
+        now = time.time()
+        conn = self._connect()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, worker_id = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires_at < ? AND attempts >= ?",
+                (FAILED, "Worker stopped responding (lease expired) on the last attempt", now,
+                 RUNNING, now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs "
+                "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, now, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, worker_id = ?, "
+                "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, worker_id, now + self.lease_seconds, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return self.get(row["id"])
+
+    def update_progress(self, job_id: str, worker_id: str, progress: float, chunks: int = 0) -> bool:
+        """Record progress and renew the lease; returns False if the job was taken over by another worker"""
+        now = time.time()
+        cursor = self._connect().execute(
+            "UPDATE jobs SET progress = ?, chunks = ?, lease_expires_at = ?, updated_at = ? "
+            "WHERE id = ? AND worker_id = ? AND status = ?",
+            (progress, chunks, now + self.lease_seconds, now, job_id, worker_id, RUNNING)
+        )
+        return cursor.rowcount == 1
+
+    def renew_lease(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease without touching progress; returns False if the job was taken over by another worker"""
+        now = time.time()
+        cursor = self._connect().execute(
+            "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+            (now + self.lease_seconds, now, job_id, worker_id, RUNNING)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str) -> None:
+        """Mark a job as done"""
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, progress = 1, error = '', lease_expires_at = NULL, updated_at = ? "
+            "WHERE id = ? AND worker_id = ?",
+            (DONE, time.time(), job_id, worker_id)
+        )
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> None:
+        """Requeue a failed job with exponential backoff, or mark it failed after the last attempt"""
+        now = time.time()
+        conn = self._connect()
+        job = self.get(job_id)
+        if job is None:
+            return
+
+        if job.attempts >= self.max_attempts:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ?",
+                (FAILED, error, now, job_id, worker_id)
+            )
+        else:
+            delay = self.retry_backoff_seconds * (2 ** (job.attempts - 1))
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ?",
+                (QUEUED, error, now + delay, now, job_id, worker_id)
+            )
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Fetch a job by id"""
+        return self._to_job(self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list_jobs(self, job_ids: Optional[List[str]] = None, limit: int = 50) -> List[IngestionJob]:
+        """List the given jobs, or the most recent ones"""
+        conn = self._connect()
+        if job_ids is not None:
+            if not job_ids:
+                return []
+            placeholders = ",".join("?" * len(job_ids))
+            rows = conn.execute(
+                f"SELECT * FROM jobs WHERE id IN ({placeholders}) ORDER BY created_at DESC", list(job_ids)
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def completed_jobs(self) -> List[IngestionJob]:
+        """All finished jobs, oldest first"""
+        rows = self._connect().execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at", (DONE,)).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def restore_jobs(self, jobs: List[IngestionJob]) -> int:
+        """Record jobs indexed elsewhere (e.g. from a snapshot) as done, so re-uploading them is a no-op.
+
+        Jobs for content this queue already knows are skipped; returns how many were added.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (id, file_path, file_hash, tenant_id, status, progress, chunks, "
+                "available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?)",
+                [
+                    (job.id, job.file_path, job.file_hash, job.tenant_id, DONE, job.chunks, job.created_at, job.created_at, job.updated_at)
+                    for job in jobs
+                ]
+            )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
@@ -0,0 +1,255 @@
+from typing import Callable, List, Optional, Tuple
+import argparse
+import importlib
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from utils.document_loader import DocumentLoader
+from utils.ingestion_queue import IngestionQueue, IngestionJob, INGESTION_DB_PATH
+from utils.profiling import annotate, profile_request
+from dotenv import load_dotenv
+load_dotenv()
+
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+INGESTION_BATCH_SIZE = int(os.getenv("INGESTION_BATCH_SIZE", "64"))
+INGESTION_POLL_SECONDS = float(os.getenv("INGESTION_POLL_SECONDS", "1"))
+# How often the pool checks for worker processes that died and replaces them
+INGESTION_SUPERVISE_SECONDS = float(os.getenv("INGESTION_SUPERVISE_SECONDS", "5"))
+INGESTION_COMPONENTS = os.getenv("INGESTION_COMPONENTS", "utils.ingestion_worker:default_components")
+
+
+def chunk_id(file_hash: str, index: int, tenant_id: str = "") -> str:
+    """Deterministic point id so a retried job overwrites the chunks it already wrote.
+
+    Tenants get their own ids, so the same file uploaded by two tenants does not
+    overwrite the other tenant's copy in a shared collection.
+    """
+    name = f"{tenant_id}/{file_hash}:{index}" if tenant_id else f"{file_hash}:{index}"
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, name))
+
+
+def default_components() -> Tuple[DocumentLoader, "VectorStore"]:
+    """Build the production document loader and vector store"""
+    from models.vector_store import VectorStore
+    return DocumentLoader(), VectorStore()
+
+
+def load_components(spec: str) -> Callable:
+    """Resolve a 'module:function' components factory"""
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class IngestionWorker:
+    """Claims jobs from the queue, then chunks and indexes their documents in batches"""
+
+    def __init__(
+        self,
+        queue: IngestionQueue,
+        doc_loader: DocumentLoader,
+        vector_store,
+        batch_size: int = INGESTION_BATCH_SIZE,
+        worker_id: Optional[str] = None,
+        heartbeat_seconds: Optional[float] = None
+    ):
+        self.queue = queue
+        self.doc_loader = doc_loader
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # Renew well before the lease runs out, so one slow renewal does not hand the job to another worker
+        self.heartbeat_seconds = heartbeat_seconds or max(queue.lease_seconds / 3, 0.1)
+
+    @contextmanager
+    def _heartbeat(self, job: IngestionJob):
+        """Renew the job's lease from a background thread while it is processed; yields an event set if the lease is lost"""
+        stop, lost = threading.Event(), threading.Event()
+
+        def beat():
+            while not stop.wait(self.heartbeat_seconds):
+                try:
+                    if not self.queue.renew_lease(job.id, self.worker_id):
+                        lost.set()
+                        return
+                except Exception as e:
+                    print(f"Error renewing lease of job {job.id}: {str(e)}")
+
+        thread = threading.Thread(target=beat, name=f"lease-heartbeat-{job.id[:8]}", daemon=True)
+        thread.start()
+        try:
+            yield lost
+        finally:
+            stop.set()
+            thread.join()
+
+    def process(self, job: IngestionJob) -> None:
+        """Index one job, reporting progress after every batch; sampled jobs are profiled.
+
+        The lease is renewed by a heartbeat for the whole job, not only between
+        batches, so a long parse or a slow embedding call does not lose it.
+        """
+        if not os.path.exists(job.file_path):
+            raise FileNotFoundError(f"File {job.file_path} not found")
+
+        with profile_request("ingestion"), self._heartbeat(job) as lease_lost:
+            documents = self.doc_loader.load_pdf(job.file_path)
+            if not documents:
+                raise ValueError("Failed to process the document")
+            if lease_lost.is_set():
+                raise RuntimeError("Lease lost to another worker")
+
+            total = len(documents)
+            self.queue.update_progress(job.id, self.worker_id, 0.0, total)
+
+            for start in range(0, total, self.batch_size):
+                batch = documents[start:start + self.batch_size]
+                ids = [chunk_id(job.file_hash, i, job.tenant_id) for i in range(start, start + len(batch))]
+                kwargs = {"tenant_id": job.tenant_id} if job.tenant_id else {}
+                with annotate("index"):
+                    if not self.vector_store.add_documents(batch, ids=ids, **kwargs):
+                        raise RuntimeError("Failed to index the document")
+
+                done = start + len(batch)
+                if lease_lost.is_set() or not self.queue.update_progress(job.id, self.worker_id, done / total, total):
+                    raise RuntimeError("Lease lost to another worker")
+
+    def run_once(self) -> bool:
+        """Process the next job if there is one; returns whether a job was claimed"""
+        job = self.queue.claim(self.worker_id)
+        if job is None:
+            return False
+
+        try:
+            self.process(job)
+        except Exception as e:
+            print(f"Error ingesting {job.file_path}: {str(e)}")
+            self.queue.fail(job.id, self.worker_id, str(e))
+        else:
+            self.queue.complete(job.id, self.worker_id)
+        return True
+
+    def run(self, stop_event, poll_seconds: float = INGESTION_POLL_SECONDS) -> None:
+        """Process jobs until the stop event is set"""
+        while not stop_event.is_set():
+            if not self.run_once():
+                stop_event.wait(poll_seconds)
+
+
+def _worker_main(db_path: str, components: str, batch_size: int, stop_event) -> None:
+    """Entry point of a worker process"""
+    # The parent handles Ctrl+C and sets the stop event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    doc_loader, vector_store = load_components(components)()
+    worker = IngestionWorker(IngestionQueue(db_path), doc_loader, vector_store, batch_size)
+    worker.run(stop_event)
+
+
+class IngestionWorkerPool:
+    """Pool of worker processes, so PDF parsing and embedding never share the GIL with the chat.
+
+    A supervisor thread replaces workers that die (e.g. killed by the OOM killer
+    on a huge PDF); the job a dead worker held is reclaimed once its lease expires.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = INGESTION_WORKERS,
+        db_path: str = INGESTION_DB_PATH,
+        components: str = INGESTION_COMPONENTS,
+        batch_size: int = INGESTION_BATCH_SIZE,
+        supervise_seconds: float = INGESTION_SUPERVISE_SECONDS
+    ):
+        self.num_workers = num_workers
+        self.db_path = db_path
+        self.components = components
+        self.batch_size = batch_size
+        self.supervise_seconds = supervise_seconds
+        self.restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._processes: List[multiprocessing.Process] = []
+        self._lock = threading.Lock()
+        self._supervisor: Optional[threading.Thread] = None
+
+    def _spawn(self, index: int) -> multiprocessing.Process:
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.db_path, self.components, self.batch_size, self._stop_event),
+            name=f"ingestion-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def start(self) -> "IngestionWorkerPool":
+        with self._lock:
+            self._processes = [self._spawn(i) for i in range(self.num_workers)]
+        self._supervisor = threading.Thread(target=self._supervise, name="ingestion-supervisor", daemon=True)
+        self._supervisor.start()
+        return self
+
+    def respawn_dead(self) -> int:
+        """Replace worker processes that have exited; returns how many were restarted"""
+        restarted = 0
+        with self._lock:
+            if self._stop_event.is_set():
+                return 0
+            for i, process in enumerate(self._processes):
+                if process.is_alive():
+                    continue
+                print(f"Ingestion worker {process.name} exited with code {process.exitcode}, restarting it")
+                self._processes[i] = self._spawn(i)
+                restarted += 1
+        self.restarts += restarted
+        return restarted
+
+    def _supervise(self) -> None:
+        while not self._stop_event.wait(self.supervise_seconds):
+            try:
+                self.respawn_dead()
+            except Exception as e:
+                print(f"Error restarting ingestion workers: {str(e)}")
+
+    def is_alive(self) -> bool:
+        return any(process.is_alive() for process in self._processes)
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop_event.set()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout)
+            self._supervisor = None
+        with self._lock:
+            for process in self._processes:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+            self._processes = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a pool of document ingestion workers")
+    parser.add_argument("--workers", type=int, default=INGESTION_WORKERS)
+    parser.add_argument("--db-path", default=INGESTION_DB_PATH)
+    parser.add_argument("--components", default=INGESTION_COMPONENTS, help="'module:function' returning (DocumentLoader, VectorStore)")
+    parser.add_argument("--batch-size", type=int, default=INGESTION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    pool = IngestionWorkerPool(args.workers, args.db_path, args.components, args.batch_size).start()
+    print(f"Started {args.workers} ingestion workers on {args.db_path}")
+    try:
+        # The supervisor restarts dead workers, so run until interrupted
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
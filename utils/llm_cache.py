@@ -0,0 +1,259 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+import contextvars
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, convert_to_messages, messages_from_dict, messages_to_dict
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig
+from utils.rate_limiter import AdmittedChatModel
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_DB_PATH = os.getenv("LLM_CACHE_DB_PATH", "llm_cache.db")
+LLM_CACHE_MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "1024"))
+LLM_CACHE_DEFAULT_TTL = float(os.getenv("LLM_CACHE_DEFAULT_TTL", "3600"))
+
+# Seconds a response stays valid, per chain. Routing and city extraction only
+# depend on the query; answers embed weather data or retrieved context in the
+# prompt, so a changed input is a different key anyway and the TTL only bounds
+# how long an identical answer is reused.
+DEFAULT_CHAIN_TTLS = {
+    "router": 7 * 24 * 3600,
+    "weather_city": 7 * 24 * 3600,
+    "weather_response": 600,
+    "rag": 3600,
+}
+
+_bypass: contextvars.ContextVar = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+def _parse_ttls(value: str) -> Dict[str, float]:
+    """Parse 'router=86400,rag=600' into a dict"""
+    ttls = {}
+    for item in value.split(","):
+        if "=" in item:
+            chain, seconds = item.split("=", 1)
+            ttls[chain.strip()] = float(seconds)
+    return ttls
+
+
+def chain_ttls_from_env() -> Dict[str, float]:
+    ttls = dict(DEFAULT_CHAIN_TTLS)
+    ttls.update(_parse_ttls(os.getenv("LLM_CACHE_TTLS", "")))
+    return ttls
+
+
+@contextmanager
+def bypass_cache() -> Iterator[None]:
+    """Skip cache lookups and writes inside the block, e.g. for evaluations that need fresh generations"""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def cache_key(llm_string: str, messages: List[BaseMessage], **kwargs: Any) -> str:
+    """Hash of the model with its parameters, the rendered messages and any call options"""
+    payload = json.dumps(
+        {"llm": llm_string, "messages": messages_to_dict(messages), "kwargs": kwargs},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Two-tier response cache: an in-process LRU in front of a SQLite table.
+
+    Entries carry an absolute expiry computed from the chain's TTL when they are
+    written. The SQLite tier survives restarts and is shared by processes using
+    the same file; a disk hit is promoted into the memory tier.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = LLM_CACHE_DB_PATH,
+        memory_size: int = LLM_CACHE_MEMORY_SIZE,
+        chain_ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = LLM_CACHE_DEFAULT_TTL
+    ):
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.chain_ttls = chain_ttls_from_env() if chain_ttls is None else chain_ttls
+        self.default_ttl = default_ttl
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._local = threading.local()
+        self.hits: Counter = Counter()
+        self.disk_hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        chain TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_expiry ON responses (expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ttl(self, chain: str) -> float:
+        return self.chain_ttls.get(chain, self.default_ttl)
+
+    def _remember(self, key: str, expires_at: float, value: str) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def lookup(self, key: str, chain: str) -> Optional[BaseMessage]:
+        """Return the cached message for a key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.hits[chain] += 1
+                    return messages_from_dict(json.loads(entry[1]))[0]
+                del self._memory[key]
+
+        if self.db_path:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                self._remember(key, row[1], row[0])
+                with self._lock:
+                    self.hits[chain] += 1
+                    self.disk_hits[chain] += 1
+                return messages_from_dict(json.loads(row[0]))[0]
+
+        with self._lock:
+            self.misses[chain] += 1
+        return None
+
+    def update(self, key: str, chain: str, message: BaseMessage) -> None:
+        """Store a response under the chain's TTL"""
+        ttl = self.ttl(chain)
+        if ttl <= 0:
+            return
+        now = time.time()
+        value = json.dumps(messages_to_dict([message]))
+        self._remember(key, now + ttl, value)
+        if self.db_path:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO responses (key, chain, value, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, chain, value, now, now + ttl)
+            )
+
+    def prune(self) -> int:
+        """Delete expired rows from the disk tier; returns the number removed"""
+        if not self.db_path:
+            return 0
+        return self._connect().execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            self._connect().execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hits, misses and hit rate per chain"""
+        with self._lock:
+            stats = {}
+            for chain in sorted(set(self.hits) | set(self.misses)):
+                hits, misses = self.hits[chain], self.misses[chain]
+                stats[chain] = {
+                    "hits": hits,
+                    "disk_hits": self.disk_hits[chain],
+                    "misses": misses,
+                    "hit_rate": hits / (hits + misses),
+                }
+            return stats
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """The process-wide cache shared by all chains, or None when LLM_CACHE_ENABLED=0"""
+    global _cache
+    with _cache_lock:
+        if _cache is None and LLM_CACHE_ENABLED:
+            _cache = LLMCache()
+        return _cache
+
+
+def set_llm_cache(cache: Optional[LLMCache]) -> None:
+    """Replace the shared cache (e.g. a memory-only one in benchmarks)"""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def _to_messages(input: Any) -> List[BaseMessage]:
+    if isinstance(input, PromptValue):
+        return input.to_messages()
+    if isinstance(input, str):
+        return convert_to_messages([("human", input)])
+    return convert_to_messages(input)
+
+
+class CachedChatModel(Runnable):
+    """Serves a chain's LLM calls from the shared cache before calling the model.
+
+    Sits above admission control, so a hit never waits for a rate-limit token.
+    """
+
+    def __init__(self, llm: Runnable, chain: str, cache: Optional[LLMCache] = None):
+        self.llm = llm
+        self.chain = chain
+        self.cache = cache
+        # Key on the underlying chat model, not on the admission wrapper
+        model = llm.llm if isinstance(llm, AdmittedChatModel) else llm
+        self.llm_string = model._get_llm_string() if isinstance(model, BaseChatModel) else repr(model)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        cache = self.cache or get_llm_cache()
+        if cache is None or _bypass.get():
+            return self.llm.invoke(input, config, **kwargs)
+
+        key = cache_key(self.llm_string, _to_messages(input), **kwargs)
+        message = cache.lookup(key, self.chain)
+        if message is None:
+            message = self.llm.invoke(input, config, **kwargs)
+            cache.update(key, self.chain, message)
+        return message
+
+
+def cached_llm(llm: Runnable, chain: str) -> CachedChatModel:
+    """Put a chain's model behind the shared response cache"""
+    return CachedChatModel(llm, chain)
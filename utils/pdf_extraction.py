@@ -0,0 +1,202 @@
+from typing import Dict, List, Optional, Type
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from langchain.schema import Document
+from utils.ingestion_queue import file_sha256
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pypdf")
+# Empty string disables the page cache
+PDF_PAGE_CACHE_PATH = os.getenv("PDF_PAGE_CACHE_PATH", "pdf_pages.db")
+
+
+class PDFBackend(ABC):
+    """Extracts the text of every page of a PDF"""
+    name = ""
+
+    @abstractmethod
+    def extract_pages(self, file_path: str) -> List[str]:
+        """One string per page, in page order"""
+
+
+class PyPDFBackend(PDFBackend):
+    """Pure-Python pypdf, the same engine PyPDFLoader uses"""
+    name = "pypdf"
+
+    def __init__(self):
+        import pypdf
+        self._pypdf = pypdf
+
+    def extract_pages(self, file_path: str) -> List[str]:
+        reader = self._pypdf.PdfReader(file_path)
+        return [page.extract_text() or "" for page in reader.pages]
+
+
+class PdfiumBackend(PDFBackend):
+    """PDFium through pypdfium2: native code, much faster than pypdf"""
+    name = "pdfium"
+
+    def __init__(self):
+        try:
+            import pypdfium2
+        except ImportError:
+            raise ImportError("The 'pdfium' PDF backend needs pypdfium2: pip install pypdfium2")
+        self._pdfium = pypdfium2
+
+    def extract_pages(self, file_path: str) -> List[str]:
+        pdf = self._pdfium.PdfDocument(file_path)
+        try:
+            pages = []
+            for i in range(len(pdf)):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                # PDFium separates lines with CRLF
+                pages.append(textpage.get_text_range().replace("\r\n", "\n"))
+                textpage.close()
+                page.close()
+            return pages
+        finally:
+            pdf.close()
+
+
+class PDFMinerBackend(PDFBackend):
+    """pdfminer.six with layout analysis: slower, but groups text into lines and columns"""
+    name = "pdfminer"
+
+    def __init__(self):
+        try:
+            from pdfminer.high_level import extract_pages
+            from pdfminer.layout import LAParams, LTTextContainer
+        except ImportError:
+            raise ImportError("The 'pdfminer' PDF backend needs pdfminer.six: pip install pdfminer.six")
+        self._extract_pages = extract_pages
+        self._laparams = LAParams
+        self._text_container = LTTextContainer
+
+    def extract_pages(self, file_path: str) -> List[str]:
+        pages = []
+        for layout in self._extract_pages(file_path, laparams=self._laparams()):
+            pages.append("".join(element.get_text() for element in layout if isinstance(element, self._text_container)))
+        return pages
+
+
+PDF_BACKENDS: Dict[str, Type[PDFBackend]] = {
+    "pypdf": PyPDFBackend,
+    "pdfium": PdfiumBackend,
+    "pdfminer": PDFMinerBackend,
+}
+
+
+def get_pdf_backend(name: str = PDF_BACKEND) -> PDFBackend:
+    """Build a PDF backend by name: 'pypdf' (default), 'pdfium' or 'pdfminer'"""
+    if name not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{name}'")
+    return PDF_BACKENDS[name]()
+
+
+class PageTextCache:
+    """Extracted page text in SQLite, keyed by file hash, backend and page number.
+
+    Re-chunking a document (new splitter settings, re-ingestion of the same
+    file) reads the pages from here instead of parsing the PDF again.
+    """
+
+    def __init__(self, db_path: str = PDF_PAGE_CACHE_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread, created with the tables on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    file_hash TEXT NOT NULL,
+                    backend TEXT NOT NULL,
+                    page_count INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (file_hash, backend)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    file_hash TEXT NOT NULL,
+                    backend TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    PRIMARY KEY (file_hash, backend, page)
+                )
+            """)
+            self._local.conn = conn
+        return conn
+
+    def get(self, file_hash: str, backend: str) -> Optional[List[str]]:
+        """All page texts of a document, or None if it was not (completely) extracted"""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT page_count FROM documents WHERE file_hash = ? AND backend = ?", (file_hash, backend)
+        ).fetchone()
+        if row is None:
+            return None
+        rows = conn.execute(
+            "SELECT text FROM pages WHERE file_hash = ? AND backend = ? ORDER BY page", (file_hash, backend)
+        ).fetchall()
+        if len(rows) != row[0]:
+            return None
+        return [text for (text,) in rows]
+
+    def put(self, file_hash: str, backend: str, pages: List[str]) -> None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO pages (file_hash, backend, page, text) VALUES (?, ?, ?, ?)",
+                [(file_hash, backend, i, text) for i, text in enumerate(pages)]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (file_hash, backend, page_count, created_at) VALUES (?, ?, ?, ?)",
+                (file_hash, backend, len(pages), time.time())
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class PDFExtractor:
+    """Turns a PDF into one Document per page using a backend and the page cache"""
+
+    def __init__(
+        self,
+        backend: Optional[PDFBackend] = None,
+        cache: Optional[PageTextCache] = None,
+        use_cache: bool = bool(PDF_PAGE_CACHE_PATH)
+    ):
+        self.backend = backend or get_pdf_backend()
+        if cache is None and use_cache:
+            cache = PageTextCache()
+        self.cache = cache if use_cache else None
+
+    def extract(self, file_path: str) -> List[Document]:
+        """Page documents with 'source', 'page' and 'total_pages' metadata, like PyPDFLoader"""
+        pages = None
+        if self.cache is not None:
+            file_hash = file_sha256(file_path)
+            pages = self.cache.get(file_hash, self.backend.name)
+
+        if pages is None:
+            pages = self.backend.extract_pages(file_path)
+            if self.cache is not None:
+                self.cache.put(file_hash, self.backend.name, pages)
+
+        return [
+            Document(page_content=text, metadata={"source": file_path, "page": i, "total_pages": len(pages)})
+            for i, text in enumerate(pages)
+        ]
@@ -0,0 +1,211 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+import functools
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "speedscope")
+
+# Threads currently being profiled -> stack of annotation labels (e.g. graph node names).
+# Only profiled threads have an entry, so annotating an unprofiled call is one dict lookup.
+_annotations: Dict[int, List[str]] = {}
+
+FrameKey = Tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler for a single thread.
+
+    A daemon thread reads the target thread's Python stack every ``interval_ms``
+    via ``sys._current_frames``; the profiled code is not instrumented, so its
+    overhead is bounded by the sampling rate. Labels pushed with ``annotate``
+    appear as synthetic root frames (``[router]``) and as timed spans.
+    """
+
+    def __init__(self, name: str = "profile", thread_id: Optional[int] = None, interval_ms: Optional[float] = None):
+        self.name = name
+        self.thread_id = thread_id or threading.get_ident()
+        # Read at call time so a changed PROFILE_INTERVAL_MS (e.g. in benchmarks) takes effect
+        self.interval = (PROFILE_INTERVAL_MS if interval_ms is None else interval_ms) / 1000
+        self.samples: List[Tuple[float, Tuple[FrameKey, ...]]] = []
+        self.spans: List[Tuple[str, float, float]] = []
+        self.start_time = 0.0
+        self.end_time = 0.0
+        self.output_path: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.start_time = time.perf_counter()
+        _annotations[self.thread_id] = []
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        _annotations.pop(self.thread_id, None)
+        self.end_time = time.perf_counter()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = tuple(("[" + label + "]", "", 0) for label in _annotations.get(self.thread_id, ()))
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append((time.perf_counter(), labels + tuple(stack)))
+
+    def record_span(self, label: str, start: float, end: float) -> None:
+        self.spans.append((label, start, end))
+
+    def to_speedscope(self) -> Dict[str, Any]:
+        """Speedscope JSON: the sampled stacks plus an evented profile of the annotated spans"""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[FrameKey, int] = {}
+
+        def frame_id(key: FrameKey) -> int:
+            if key not in index:
+                index[key] = len(frames)
+                name, path, line = key
+                frames.append({"name": name, "file": path, "line": line} if path else {"name": name})
+            return index[key]
+
+        end = (self.end_time - self.start_time) * 1000
+        samples, weights, previous = [], [], self.start_time
+        for timestamp, stack in self.samples:
+            samples.append([frame_id(key) for key in stack])
+            weights.append((timestamp - previous) * 1000)
+            previous = timestamp
+
+        events = []
+        for label, start, stop in sorted(self.spans, key=lambda span: span[1]):
+            frame = frame_id(("[" + label + "]", "", 0))
+            events.append({"type": "O", "frame": frame, "at": (start - self.start_time) * 1000})
+            events.append({"type": "C", "frame": frame, "at": (stop - self.start_time) * 1000})
+        events.sort(key=lambda event: event["at"])
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "doc-weather-bot",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {"type": "sampled", "name": f"{self.name} (samples)", "unit": "milliseconds",
+                 "startValue": 0, "endValue": end, "samples": samples, "weights": weights},
+                {"type": "evented", "name": f"{self.name} (nodes)", "unit": "milliseconds",
+                 "startValue": 0, "endValue": end, "events": events},
+            ],
+        }
+
+    def to_folded(self) -> str:
+        """Collapsed stacks ("a;b;c <microseconds>") for flamegraph.pl / inferno"""
+        totals: Dict[str, float] = {}
+        previous = self.start_time
+        for timestamp, stack in self.samples:
+            key = ";".join(name if not path else f"{name} ({os.path.basename(path)}:{line})" for name, path, line in stack)
+            totals[key] = totals.get(key, 0) + (timestamp - previous) * 1e6
+            previous = timestamp
+        return "".join(f"{key} {int(value)}\n" for key, value in totals.items())
+
+    def save(self, directory: str = PROFILE_DIR, fmt: str = PROFILE_FORMAT) -> str:
+        """Write the profile to ``directory`` as 'speedscope' JSON or 'folded' stacks; returns the path"""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}")
+        if fmt == "folded":
+            path = stem + ".folded"
+            content = self.to_folded()
+        elif fmt == "speedscope":
+            path = stem + ".speedscope.json"
+            content = json.dumps(self.to_speedscope())
+        else:
+            raise ValueError(f"Unknown profile format '{fmt}'")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self.output_path = path
+        return path
+
+
+_current = threading.local()
+
+
+def current_profiler() -> Optional[SamplingProfiler]:
+    """The profiler sampling the calling thread, if any"""
+    return getattr(_current, "profiler", None)
+
+
+@contextmanager
+def profile_request(
+    name: str,
+    force: bool = False,
+    sample_rate: Optional[float] = None,
+    directory: Optional[str] = None
+) -> Iterator[Optional[SamplingProfiler]]:
+    """Profile the block for a sampled fraction of calls, or always when ``force`` is set.
+
+    Yields the profiler (None when this call is not sampled); its ``output_path``
+    is set once the block exits. Nested calls reuse the outer profiler.
+    """
+    rate = PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+    if current_profiler() is not None or not (force or (rate > 0 and random.random() < rate)):
+        yield None
+        return
+
+    profiler = SamplingProfiler(name).start()
+    _current.profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _current.profiler = None
+        profiler.stop()
+        try:
+            profiler.save(directory or PROFILE_DIR)
+        except OSError as e:
+            print(f"Error saving profile: {str(e)}")
+
+
+@contextmanager
+def annotate(label: str) -> Iterator[None]:
+    """Mark a region (a graph node, an ingestion stage) in the current thread's profile"""
+    labels = _annotations.get(threading.get_ident())
+    if labels is None:
+        yield
+        return
+
+    labels.append(label)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        labels.pop()
+        profiler = current_profiler()
+        if profiler is not None:
+            profiler.record_span(label, start, time.perf_counter())
+
+
+def annotated(label: str, func: Callable) -> Callable:
+    """Wrap a callable (e.g. a graph node) so its calls are annotated with ``label``"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with annotate(label):
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,290 @@
+from typing import Any, Dict, Iterator, Optional
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from langchain_core.runnables import Runnable, RunnableConfig
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+try:
+    from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+    _RATE_LIMIT_ERRORS: tuple = (ResourceExhausted, TooManyRequests)
+except ImportError:
+    _RATE_LIMIT_ERRORS = ()
+
+LLM_GLOBAL_RATE = float(os.getenv("LLM_GLOBAL_RATE", "30"))
+LLM_GLOBAL_BURST = float(os.getenv("LLM_GLOBAL_BURST", "60"))
+LLM_SESSION_RATE = float(os.getenv("LLM_SESSION_RATE", "2"))
+LLM_SESSION_BURST = float(os.getenv("LLM_SESSION_BURST", "10"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_QUEUE_LIMIT = int(os.getenv("LLM_QUEUE_LIMIT", "128"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+LLM_RATE_LIMIT_COOLDOWN = float(os.getenv("LLM_RATE_LIMIT_COOLDOWN", "2"))
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "2"))
+# Passed as max_retries to the Gemini client: its own backoff on 429s would retry outside the
+# admission controller and sleep while holding a concurrency slot
+LLM_CLIENT_MAX_RETRIES = 1
+
+# Lower value is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_session_id: contextvars.ContextVar = contextvars.ContextVar("llm_session_id", default=None)
+
+
+class LoadShedError(Exception):
+    """Raised when an LLM call is not admitted; callers should fall back to a degraded response"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"LLM call shed: {reason}")
+        self.reason = reason
+
+
+@contextmanager
+def session_context(session_id: Optional[str]) -> Iterator[None]:
+    """Attribute the LLM calls made inside the block to a session for per-session limits"""
+    token = _session_id.set(session_id)
+    try:
+        yield
+    finally:
+        _session_id.reset(token)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an exception from the model provider is a quota / 429 error"""
+    if _RATE_LIMIT_ERRORS and isinstance(error, _RATE_LIMIT_ERRORS):
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+
+class TokenBucket:
+    """Classic token bucket; not thread-safe on its own, the controller holds the lock"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        start = max(self.updated, self.paused_until)
+        if now > start:
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, now: float) -> bool:
+        self._refill(now)
+        if now >= self.paused_until and self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available"""
+        self._refill(now)
+        wait = max(self.paused_until - now, 0.0)
+        if self.tokens < 1:
+            wait += (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+        return wait
+
+    def pause(self, now: float, seconds: float) -> None:
+        """Empty the bucket and stop refilling for a while, e.g. after the provider returned 429"""
+        self._refill(now)
+        self.tokens = 0
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class AdmissionController:
+    """Shared gate in front of every LLM call.
+
+    A call must pass its session's token bucket, then waits in a priority queue
+    (interactive before background, FIFO within a priority) for a concurrency
+    slot and a global token. Calls that cannot be admitted before their deadline,
+    or that arrive when the queue is full, are shed with LoadShedError.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = LLM_GLOBAL_RATE,
+        global_burst: float = LLM_GLOBAL_BURST,
+        session_rate: float = LLM_SESSION_RATE,
+        session_burst: float = LLM_SESSION_BURST,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        queue_limit: int = LLM_QUEUE_LIMIT,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+        rate_limit_cooldown: float = LLM_RATE_LIMIT_COOLDOWN,
+        max_sessions: int = 10000
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.max_concurrency = max_concurrency
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.max_sessions = max_sessions
+
+        self._condition = threading.Condition()
+        self._sessions: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._queue: list = []
+        self._sequence = itertools.count()
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed: Counter = Counter()
+
+    def _session_bucket(self, session_id: str) -> TokenBucket:
+        bucket = self._sessions.get(session_id)
+        if bucket is None:
+            bucket = TokenBucket(self.session_rate, self.session_burst)
+            self._sessions[session_id] = bucket
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return bucket
+
+    def record_shed(self, reason: str) -> LoadShedError:
+        """Count a shed call and build the error to raise"""
+        self.shed[reason] += 1
+        return LoadShedError(reason)
+
+    def acquire(self, priority: int = INTERACTIVE, session_id: Optional[str] = None, timeout: Optional[float] = None) -> None:
+        """Block until the call is admitted or raise LoadShedError"""
+        deadline = time.monotonic() + (self.queue_timeout if timeout is None else timeout)
+        session_id = session_id if session_id is not None else _session_id.get()
+
+        with self._condition:
+            if session_id is not None:
+                bucket = self._session_bucket(session_id)
+                # Wait for the session's own token before competing for global capacity. Other calls of the
+                # same session may take the token first, so the deadline is re-checked on every wake-up
+                while not bucket.try_acquire(time.monotonic()):
+                    now = time.monotonic()
+                    wait = bucket.wait_time(now)
+                    if now + wait > deadline:
+                        raise self.record_shed("session_rate")
+                    self._condition.wait(max(min(wait, deadline - now), 0.001))
+
+            if len(self._queue) >= self.queue_limit:
+                raise self.record_shed("queue_full")
+
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._queue[0] == entry and self.in_flight < self.max_concurrency:
+                        if self.global_bucket.try_acquire(now):
+                            break
+                        wait = self.global_bucket.wait_time(now)
+                    else:
+                        wait = deadline - now
+                    if now >= deadline:
+                        raise self.record_shed("deadline")
+                    self._condition.wait(max(min(wait, deadline - now), 0.001))
+            except LoadShedError:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+                raise
+
+            heapq.heappop(self._queue)
+            self.in_flight += 1
+            self.admitted += 1
+            # Let the next waiter re-check now that the head has moved
+            self._condition.notify_all()
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def admit(self, priority: int = INTERACTIVE, session_id: Optional[str] = None, timeout: Optional[float] = None) -> Iterator[None]:
+        self.acquire(priority, session_id, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record_rate_limited(self) -> None:
+        """The provider returned 429: stop handing out global tokens for the cooldown period"""
+        with self._condition:
+            self.rate_limited += 1
+            self.global_bucket.pause(time.monotonic(), self.rate_limit_cooldown)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "in_flight": self.in_flight,
+                "admitted": self.admitted,
+                "shed_count": sum(self.shed.values()),
+                "shed_by_reason": dict(self.shed),
+                "rate_limited": self.rate_limited,
+            }
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """The process-wide controller shared by all agents"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+        return _controller
+
+
+def set_admission_controller(controller: Optional[AdmissionController]) -> None:
+    """Replace the shared controller (e.g. with different limits in benchmarks)"""
+    global _controller
+    with _controller_lock:
+        _controller = controller
+
+
+class AdmittedChatModel(Runnable):
+    """Wraps a chat model so every call goes through the admission controller.
+
+    A 429 from the provider pauses the global bucket and the call is retried
+    through admission again; once retries are exhausted it is shed.
+    """
+
+    def __init__(
+        self,
+        llm: Runnable,
+        priority: int = INTERACTIVE,
+        controller: Optional[AdmissionController] = None,
+        max_retries: int = LLM_RATE_LIMIT_RETRIES
+    ):
+        self.llm = llm
+        self.priority = priority
+        self.controller = controller
+        self.max_retries = max_retries
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        controller = self.controller or get_admission_controller()
+        for attempt in range(self.max_retries + 1):
+            with controller.admit(self.priority):
+                try:
+                    return self.llm.invoke(input, config, **kwargs)
+                except Exception as e:
+                    if not is_rate_limit_error(e):
+                        raise
+                    controller.record_rate_limited()
+        raise controller.record_shed("rate_limited")
+
+
+def admit_llm(llm: Runnable, priority: int = INTERACTIVE) -> AdmittedChatModel:
+    """Put a chat model behind the shared admission controller"""
+    return AdmittedChatModel(llm, priority)
@@ -0,0 +1,272 @@
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+import argparse
+import base64
+import io
+import json
+import re
+import struct
+import tarfile
+import time
+
+from models.embedding import EMBEDDING_MODEL
+from qdrant_client.http import models as rest
+from utils.ingestion_queue import IngestionJob, IngestionQueue, INGESTION_DB_PATH
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_PART_POINTS = int(os.getenv("SNAPSHOT_PART_POINTS", "2000"))
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "256"))
+
+_POINTS_MEMBER_RE = re.compile(r"^points/(\d{3})/\d{6}\.jsonl$")
+
+
+class SnapshotError(ValueError):
+    """Raised for archives that are malformed or incompatible with the target store"""
+
+
+def embedding_metadata(vector_store) -> Dict[str, Any]:
+    """What produced the stored vectors; a snapshot only fits a store with the same values"""
+    return {
+        "model": EMBEDDING_MODEL,
+        "dimension": vector_store.config.dimension,
+        "distance": rest.Distance.COSINE.value,
+    }
+
+
+def _encode_vector(vector: List[float]) -> str:
+    return base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+
+
+def _decode_vector(data: str) -> List[float]:
+    raw = base64.b64decode(data)
+    return list(struct.unpack(f"<{len(raw) // 4}f", raw))
+
+
+def _add_member(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(data))
+
+
+def _open(target: Union[str, BinaryIO], mode: str) -> tarfile.TarFile:
+    # tarfile defaults to gzip level 9, which costs far more time than it saves space on float vectors
+    kwargs = {"compresslevel": 6} if mode.startswith("w") else {}
+    if isinstance(target, str):
+        return tarfile.open(target, mode, **kwargs)
+    return tarfile.open(fileobj=target, mode=mode, **kwargs)
+
+
+def _collections(vector_store) -> List[Tuple[str, Optional[str]]]:
+    """(collection, tenant) pairs to export: the shared collection, then each dedicated tenant collection"""
+    collections = [(vector_store.collection_name, None)]
+    if vector_store.config.multi_tenant:
+        for tenant in sorted(vector_store._dedicated_tenants(refresh=True)):
+            collections.append((vector_store.dedicated_collection_name(tenant), tenant))
+    return collections
+
+
+def export_snapshot(
+    vector_store,
+    target: Union[str, BinaryIO],
+    queue: Optional[IngestionQueue] = None,
+    part_points: int = SNAPSHOT_PART_POINTS
+) -> Dict[str, Any]:
+    """Write the store's points, document manifest and embedding metadata to a gzipped tar; returns the manifest.
+
+    The archive holds manifest.json (format version, embedding metadata, collection
+    config, one entry per collection), then points/<collection>/<part>.jsonl with
+    each point's id, payload and base64 float32 vector, then documents.json with
+    the indexed documents and finished ingestion jobs.
+    """
+    client = vector_store.client
+    collections = _collections(vector_store)
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": time.time(),
+        "embedding": embedding_metadata(vector_store),
+        "collection": {"name": vector_store.collection_name, "config": vector_store.config.model_dump()},
+        "collections": [
+            {"tenant": tenant, "points": client.count(collection_name=name, exact=True).count}
+            for name, tenant in collections
+        ],
+    }
+    documents: Dict[Tuple[str, str], int] = {}
+
+    with _open(target, "w:gz") as tar:
+        _add_member(tar, "manifest.json", json.dumps(manifest, indent=2).encode())
+
+        for index, (name, tenant) in enumerate(collections):
+            offset, part = None, 0
+            while True:
+                points, offset = client.scroll(
+                    collection_name=name, limit=part_points, offset=offset, with_payload=True, with_vectors=True
+                )
+                if not points:
+                    break
+                lines = []
+                for point in points:
+                    if not isinstance(point.vector, list):
+                        raise SnapshotError(f"Collection '{name}' uses named vectors, which snapshots do not support")
+                    lines.append(json.dumps({"id": point.id, "payload": point.payload, "vector": _encode_vector(point.vector)}))
+                    metadata = (point.payload or {}).get("metadata") or {}
+                    key = (metadata.get("tenant_id", tenant or ""), metadata.get("source", ""))
+                    documents[key] = documents.get(key, 0) + 1
+                _add_member(tar, f"points/{index:03d}/{part:06d}.jsonl", ("\n".join(lines) + "\n").encode())
+                part += 1
+                if offset is None:
+                    break
+
+        jobs = [job.model_dump() for job in queue.completed_jobs()] if queue is not None else []
+        manifest_documents = [
+            {"tenant_id": tenant, "source": source, "chunks": chunks}
+            for (tenant, source), chunks in sorted(documents.items())
+        ]
+        _add_member(tar, "documents.json", json.dumps({"documents": manifest_documents, "jobs": jobs}).encode())
+
+    return manifest
+
+
+def check_compatibility(manifest: Dict[str, Any], vector_store, allow_model_mismatch: bool = False) -> None:
+    """Raise SnapshotError unless the archive's vectors can be searched by this store"""
+    version = manifest.get("format_version")
+    if not isinstance(version, int) or version > SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format version {version}; this build reads up to {SNAPSHOT_FORMAT_VERSION}")
+
+    stored, expected = manifest.get("embedding", {}), embedding_metadata(vector_store)
+    if stored.get("dimension") != expected["dimension"] or stored.get("distance") != expected["distance"]:
+        raise SnapshotError(
+            f"Snapshot vectors are {stored.get('dimension')}-dim {stored.get('distance')}, "
+            f"the store expects {expected['dimension']}-dim {expected['distance']}"
+        )
+    if stored.get("model") != expected["model"] and not allow_model_mismatch:
+        raise SnapshotError(f"Snapshot was embedded with '{stored.get('model')}', the store queries with '{expected['model']}'")
+
+    snapshot_multi_tenant = manifest.get("collection", {}).get("config", {}).get("multi_tenant", False)
+    if snapshot_multi_tenant != vector_store.config.multi_tenant:
+        raise SnapshotError("Snapshot and store disagree on QDRANT_MULTI_TENANT; points would be routed to the wrong tenant")
+
+
+def _read_points(member: BinaryIO, counter: List[int]) -> Iterator[rest.PointStruct]:
+    for line in member:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            point = rest.PointStruct(id=record["id"], vector=_decode_vector(record["vector"]), payload=record["payload"])
+        except (ValueError, KeyError, TypeError, struct.error) as e:
+            raise SnapshotError(f"Malformed point record: {str(e)}")
+        counter[0] += 1
+        yield point
+
+
+def _targets(manifest: Dict[str, Any], vector_store) -> List[str]:
+    """Collection each manifest entry is imported into, creating dedicated tenant collections"""
+    entries = manifest.get("collections")
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise SnapshotError("Manifest has no valid 'collections' list")
+    targets = []
+    for entry in entries:
+        tenant = entry.get("tenant")
+        if not tenant:
+            targets.append(vector_store.collection_name)
+            continue
+        try:
+            targets.append(vector_store.create_dedicated_collection(tenant))
+        except (ValueError, TypeError) as e:
+            raise SnapshotError(f"Invalid tenant in manifest: {str(e)}")
+    return targets
+
+
+def import_snapshot(
+    vector_store,
+    source: Union[str, BinaryIO],
+    queue: Optional[IngestionQueue] = None,
+    batch_size: int = SNAPSHOT_BATCH_SIZE,
+    parallel: int = 1,
+    allow_model_mismatch: bool = False
+) -> Dict[str, Any]:
+    """Stream an archive into the store without embedding anything; returns import statistics.
+
+    Points keep their ids, so importing into a non-empty store overwrites the
+    same chunks instead of duplicating them. Finished ingestion jobs are
+    restored into ``queue`` so re-uploading an imported PDF is a no-op.
+    """
+    start = time.perf_counter()
+    counter = [0]
+    documents: Dict[str, Any] = {}
+    restored = 0
+
+    with _open(source, "r|gz") as tar:
+        members = iter(tar)
+        first = next(members, None)
+        if first is None or first.name != "manifest.json":
+            raise SnapshotError("Not a snapshot archive: manifest.json must come first")
+        manifest = json.load(tar.extractfile(first))
+        check_compatibility(manifest, vector_store, allow_model_mismatch)
+
+        targets = _targets(manifest, vector_store)
+
+        for member in members:
+            match = _POINTS_MEMBER_RE.match(member.name)
+            if match:
+                index = int(match.group(1))
+                if index >= len(targets) or not member.isfile():
+                    raise SnapshotError(f"Archive member '{member.name}' does not match the manifest")
+                vector_store.client.upload_points(
+                    collection_name=targets[index],
+                    points=_read_points(tar.extractfile(member), counter),
+                    batch_size=batch_size,
+                    parallel=parallel,
+                    wait=True
+                )
+            elif member.name == "documents.json" and member.isfile():
+                try:
+                    documents = json.load(tar.extractfile(member))
+                except ValueError as e:
+                    raise SnapshotError(f"Malformed documents.json: {str(e)}")
+            else:
+                raise SnapshotError(f"Unexpected archive member '{member.name}'")
+
+    if queue is not None and documents.get("jobs"):
+        restored = queue.restore_jobs([IngestionJob(**job) for job in documents["jobs"]])
+
+    return {
+        "points": counter[0],
+        "collections": len(targets),
+        "documents": len(documents.get("documents", [])),
+        "jobs_restored": restored,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import an index snapshot")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="Archive path, e.g. index.snapshot.tar.gz")
+    parser.add_argument("--db-path", default=INGESTION_DB_PATH, help="Ingestion queue whose finished jobs are exported / restored")
+    parser.add_argument("--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE)
+    parser.add_argument("--parallel", type=int, default=1, help="Upload processes used by import")
+    parser.add_argument("--allow-model-mismatch", action="store_true", help="Import vectors from another embedding model")
+    args = parser.parse_args()
+
+    from models.vector_store import VectorStore
+    vector_store = VectorStore()
+    queue = IngestionQueue(args.db_path) if args.db_path else None
+
+    try:
+        if args.command == "export":
+            manifest = export_snapshot(vector_store, args.path, queue)
+            points = sum(entry["points"] for entry in manifest["collections"])
+            print(f"Exported {points} points from {len(manifest['collections'])} collections to {args.path}")
+        else:
+            stats = import_snapshot(vector_store, args.path, queue, args.batch_size, args.parallel, args.allow_model_mismatch)
+            print(f"Imported {stats['points']} points and {stats['jobs_restored']} jobs in {stats['seconds']:.1f}s")
+    except SnapshotError as e:
+        raise SystemExit(f"Error: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
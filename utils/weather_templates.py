@@ -0,0 +1,179 @@
+from typing import Any, Dict, Optional
+import random
+import re
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+WEATHER_LOCALE = os.getenv("WEATHER_LOCALE", "en")
+
+# Queries that ask for advice or a judgement rather than the current readings;
+# these still go to the LLM
+_REASONING_RE = re.compile(
+    r"\b(should|shall|do i need|need (?:a|an|to)|umbrella|jacket|coat|sunscreen|sunglasses|wear|bring|pack|"
+    r"good (?:day|time|idea|weather) (?:for|to)|safe|recommend\w*|advice|advise|suggest\w*|"
+    r"is it (?:ok|okay|worth|too)|can i|could i|why|compare|better|worse|plan\w*)\b",
+    re.IGNORECASE
+)
+
+# OpenWeatherMap returns metric values (units=metric): °C and m/s
+UNIT_SYSTEMS = {
+    "metric": {"temp": "°C", "wind": "m/s"},
+    "imperial": {"temp": "°F", "wind": "mph"},
+}
+
+LOCALES: Dict[str, Dict[str, Any]] = {
+    "en": {
+        "units": "metric",
+        "decimal": ".",
+        "templates": [
+            "It's currently {temp} in {city}, {country} with {conditions}. It feels like {feels_like}, humidity is {humidity}% and the wind is blowing at {wind}.",
+            "Right now in {city}, {country}: {conditions}, {temp} (feels like {feels_like}). Humidity {humidity}%, wind {wind}.",
+            "{city}, {country} is seeing {conditions} at the moment. The temperature is {temp}, though it feels like {feels_like}, with {humidity}% humidity and winds of {wind}.",
+        ],
+        "not_found": "I couldn't find weather data for \"{city}\". Please check the city name and try again.",
+        "unavailable": "I couldn't reach the weather service right now. Please try again in a moment.",
+        "invalid": "The weather service returned incomplete data for {city}, so I can't give a reliable report.",
+        "conditions": None,  # Use OpenWeatherMap's English description as-is
+    },
+    "en_US": {
+        "units": "imperial",
+        "decimal": ".",
+        "inherit": "en",
+    },
+    "es": {
+        "units": "metric",
+        "decimal": ",",
+        "templates": [
+            "Ahora mismo en {city}, {country} hay {conditions} y {temp}, con una sensación térmica de {feels_like}. Humedad del {humidity}% y viento de {wind}.",
+            "{city}, {country}: {conditions}, {temp} (sensación de {feels_like}). Humedad {humidity}%, viento {wind}.",
+        ],
+        "not_found": "No encontré datos del tiempo para \"{city}\". Revisa el nombre de la ciudad e inténtalo de nuevo.",
+        "unavailable": "No puedo contactar con el servicio meteorológico ahora mismo. Inténtalo de nuevo en un momento.",
+        "invalid": "El servicio meteorológico devolvió datos incompletos para {city}.",
+        "conditions": {
+            "thunderstorm": "tormenta", "drizzle": "llovizna", "rain": "lluvia", "snow": "nieve",
+            "mist": "niebla", "clear": "cielo despejado", "partly_cloudy": "algunas nubes", "cloudy": "cielo nublado",
+        },
+    },
+    "fr": {
+        "units": "metric",
+        "decimal": ",",
+        "templates": [
+            "Il fait actuellement {temp} à {city} ({country}) avec {conditions}. Ressenti {feels_like}, humidité {humidity} % et vent à {wind}.",
+            "À {city} ({country}) : {conditions}, {temp} (ressenti {feels_like}). Humidité {humidity} %, vent {wind}.",
+        ],
+        "not_found": "Je n'ai pas trouvé de données météo pour « {city} ». Vérifiez le nom de la ville et réessayez.",
+        "unavailable": "Le service météo est injoignable pour le moment. Réessayez dans un instant.",
+        "invalid": "Le service météo a renvoyé des données incomplètes pour {city}.",
+        "conditions": {
+            "thunderstorm": "de l'orage", "drizzle": "de la bruine", "rain": "de la pluie", "snow": "de la neige",
+            "mist": "du brouillard", "clear": "un ciel dégagé", "partly_cloudy": "quelques nuages", "cloudy": "un ciel couvert",
+        },
+    },
+    "de": {
+        "units": "metric",
+        "decimal": ",",
+        "templates": [
+            "In {city} ({country}) ist es gerade {temp} bei {conditions}. Gefühlt sind es {feels_like}, die Luftfeuchtigkeit liegt bei {humidity} % und der Wind weht mit {wind}.",
+            "{city} ({country}): {conditions}, {temp} (gefühlt {feels_like}). Luftfeuchtigkeit {humidity} %, Wind {wind}.",
+        ],
+        "not_found": "Für „{city}“ habe ich keine Wetterdaten gefunden. Bitte prüfe den Städtenamen.",
+        "unavailable": "Der Wetterdienst ist gerade nicht erreichbar. Bitte versuche es gleich noch einmal.",
+        "invalid": "Der Wetterdienst hat unvollständige Daten für {city} geliefert.",
+        "conditions": {
+            "thunderstorm": "Gewitter", "drizzle": "Nieselregen", "rain": "Regen", "snow": "Schnee",
+            "mist": "Nebel", "clear": "klarem Himmel", "partly_cloudy": "leichter Bewölkung", "cloudy": "bedecktem Himmel",
+        },
+    },
+}
+
+
+def needs_reasoning(query: str) -> bool:
+    """Cheap classifier: does the query ask for advice rather than the current conditions?"""
+    return bool(_REASONING_RE.search(query))
+
+
+def _locale(name: str) -> Dict[str, Any]:
+    """Resolve a locale such as 'fr_CA' to its closest entry, falling back to English"""
+    name = name.replace("-", "_")
+    locale = LOCALES.get(name) or LOCALES.get(name.split("_")[0]) or LOCALES["en"]
+    if "inherit" in locale:
+        return {**LOCALES[locale["inherit"]], **{k: v for k, v in locale.items() if k != "inherit"}}
+    return locale
+
+
+def condition_group(weather: Dict[str, Any]) -> str:
+    """Map an OpenWeatherMap condition (by id, else by description) to a coarse group"""
+    code = weather.get("id")
+    if isinstance(code, int):
+        if code == 800:
+            return "clear"
+        if code in (801, 802):
+            return "partly_cloudy"
+        return {2: "thunderstorm", 3: "drizzle", 5: "rain", 6: "snow", 7: "mist", 8: "cloudy"}.get(code // 100, "cloudy")
+
+    description = weather.get("description", "").lower()
+    for keyword, group in (("thunder", "thunderstorm"), ("drizzle", "drizzle"), ("rain", "rain"), ("snow", "snow"),
+                           ("clear", "clear"), ("few", "partly_cloudy"), ("scattered", "partly_cloudy")):
+        if keyword in description:
+            return group
+    if any(word in description for word in ("mist", "fog", "haze", "smoke", "dust")):
+        return "mist"
+    return "cloudy"
+
+
+def _number(value: float, decimal: str) -> str:
+    text = f"{value:.1f}".rstrip("0").rstrip(".")
+    return text.replace(".", decimal)
+
+
+def render_weather_response(
+    weather_data: Dict[str, Any],
+    locale: str = WEATHER_LOCALE,
+    city: str = "",
+    variant: Optional[str] = None
+) -> str:
+    """Render an answer straight from an OpenWeatherMap payload.
+
+    ``variant`` picks one of the locale's phrasings deterministically (the query
+    is a good choice), so repeated questions get the same answer while different
+    questions get some variety. Error payloads from WeatherAPIHandler render as
+    localized error messages.
+    """
+    strings = _locale(locale)
+
+    if "error" in weather_data:
+        error = str(weather_data["error"]).lower()
+        key = "not_found" if "not found" in error or "404" in error else "unavailable"
+        return strings[key].format(city=city or weather_data.get("name", ""))
+
+    try:
+        main = weather_data["main"]
+        weather = weather_data["weather"][0]
+        units = UNIT_SYSTEMS[strings["units"]]
+        temp, feels_like, wind = main["temp"], main["feels_like"], weather_data["wind"]["speed"]
+        if strings["units"] == "imperial":
+            temp, feels_like, wind = temp * 9 / 5 + 32, feels_like * 9 / 5 + 32, wind * 2.23694
+
+        if strings["conditions"] is None:
+            conditions = weather["description"]
+        else:
+            conditions = strings["conditions"][condition_group(weather)]
+
+        decimal = strings["decimal"]
+        values = {
+            "city": weather_data["name"],
+            "country": weather_data["sys"]["country"],
+            "temp": f"{_number(temp, decimal)}{units['temp']}",
+            "feels_like": f"{_number(feels_like, decimal)}{units['temp']}",
+            "humidity": main["humidity"],
+            "wind": f"{_number(wind, decimal)} {units['wind']}",
+            "conditions": conditions,
+        }
+    except (KeyError, IndexError, TypeError):
+        return strings["invalid"].format(city=city or weather_data.get("name", "") or "this city")
+
+    templates = strings["templates"]
+    template = random.Random(variant).choice(templates) if variant is not None else templates[0]
+    return template.format(**values)